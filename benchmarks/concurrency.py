@@ -0,0 +1,133 @@
+"""
+Сравнительный тест под конкурентной нагрузкой.
+
+Один и тот же набор запросов отправляется к нескольким запущенным
+серверам (например, gunicorn + config.wsgi и uvicorn + config.asgi) при
+разном числе одновременных клиентов. Медленный клиент имитируется
+задержкой между чтениями кусков ответа (read_delay): под WSGI такой
+клиент держит воркер всё время скачивания, под ASGI — нет.
+
+Отчёт: пропускная способность (успешных запросов в секунду), p50/p95
+задержки и число ошибок по серверу, сценарию и уровню конкурентности.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+import requests
+from django.urls import reverse
+from movies.catalog import catalog_entries
+from movies.models import Movie
+from .runner import Scenario, _percentile, _git_commit
+
+READ_CHUNK_SIZE = 64 * 1024
+REQUEST_TIMEOUT = 60
+
+# Первый мегабайт видео — типичный запрос плеера при старте и перемотке
+VIDEO_RANGE = 'bytes=0-1048575'
+
+
+def concurrency_scenarios():
+    """Горячие эндпоинты чтения: DRF и асинхронный API, детальная страница, отдача видео."""
+    movie = catalog_entries('movie').order_by('-views').first()
+    scenarios = [
+        Scenario('api_movies', 'movie-list', reverse('movie-list')),
+        Scenario('api_catalog_movies', 'api_catalog_movies', reverse('api_catalog_movies')),
+    ]
+    if movie:
+        scenarios += [
+            Scenario('movie_detail', 'movie_detail', movie.get_absolute_url()),
+            Scenario('api_movie', 'movie-detail', reverse('movie-detail', args=[movie.content_id])),
+            Scenario('api_catalog_movie', 'api_catalog_movie', reverse('api_catalog_movie', args=[movie.content_id])),
+        ]
+    video = Movie.objects.filter(is_published=True).exclude(video_file='').exclude(video_file__isnull=True).first()
+    if video:
+        scenarios.append(Scenario(
+            'video_range', 'serve_movie_video', reverse('serve_movie_video', args=[video.slug]),
+            headers={'Range': VIDEO_RANGE},
+        ))
+    return scenarios
+
+
+class _Client(threading.local):
+    """Своя сессия requests (пул соединений) на каждый поток нагрузки."""
+
+    def __init__(self):
+        self.session = requests.Session()
+
+
+def _fetch(client, url, headers, read_delay):
+    started = time.perf_counter()
+    try:
+        with client.session.get(url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            for _ in response.iter_content(READ_CHUNK_SIZE):
+                if read_delay:
+                    time.sleep(read_delay)
+            ok = response.status_code < 400
+    except requests.RequestException:
+        ok = False
+    return ok, time.perf_counter() - started
+
+
+def run_level(base_url, scenario, concurrency, total, read_delay=0.0):
+    """total запросов сценария, из них одновременно выполняется concurrency."""
+    client = _Client()
+    url = urljoin(base_url, scenario.url)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: _fetch(client, url, scenario.headers, read_delay), range(total)))
+    wall = time.perf_counter() - started
+
+    timings = [elapsed * 1000 for ok, elapsed in results if ok]
+    return {
+        'requests': total,
+        'errors': total - len(timings),
+        'rps': round(len(timings) / wall, 1) if wall else None,
+        'p50_ms': round(_percentile(timings, 50), 2) if timings else None,
+        'p95_ms': round(_percentile(timings, 95), 2) if timings else None,
+    }
+
+
+def run(targets, scenarios, levels=(1, 8, 32), total=200, read_delay=0.0, log=None):
+    """
+    targets — {имя: base_url}. Возвращает отчёт
+    {'results': {сервер: {сценарий: {уровень: сводка}}}, ...}.
+    """
+    log = log or (lambda message: None)
+    results = {}
+    for name, base_url in targets.items():
+        for scenario in scenarios:
+            # Прогрев: индексы каталога и кэши строятся не в замере
+            run_level(base_url, scenario, 1, 2)
+            for level in levels:
+                summary = run_level(base_url, scenario, level, total, read_delay)
+                results.setdefault(name, {}).setdefault(scenario.name, {})[str(level)] = summary
+                log(f"{name:<8} {scenario.name:<20} x{level:<4} {summary['rps'] or 0:>8.1f} rps  "
+                    f"p95 {summary['p95_ms'] or 0:>9.2f} ms  errors {summary['errors']}")
+    return {
+        'commit': _git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'levels': list(levels),
+        'requests_per_level': total,
+        'read_delay_ms': round(read_delay * 1000, 1),
+        'targets': targets,
+        'results': results,
+    }
+
+
+def compare_targets(report):
+    """Строки сравнения серверов: (сценарий, уровень, {сервер: (rps, p95)})."""
+    rows = []
+    targets = list(report['targets'])
+    if not targets:
+        return rows
+    for scenario, levels in report['results'][targets[0]].items():
+        for level in levels:
+            rows.append((scenario, level, {
+                name: (
+                    report['results'][name].get(scenario, {}).get(level, {}).get('rps'),
+                    report['results'][name].get(scenario, {}).get(level, {}).get('p95_ms'),
+                )
+                for name in targets
+            }))
+    return rows
@@ -0,0 +1,61 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks import concurrency
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the hot read endpoints (API list/retrieve, detail page, video range) against one '
+        'or more running servers at several concurrency levels and compares throughput and '
+        'p95 latency, e.g. gunicorn with config.wsgi against uvicorn with config.asgi.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', dest='targets', required=True,
+            help='Server to benchmark as NAME=URL, e.g. wsgi=http://127.0.0.1:8000 (repeatable)'
+        )
+        parser.add_argument('--concurrency', default='1,8,32', help='Comma-separated numbers of concurrent clients')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario and concurrency level')
+        parser.add_argument('--read-delay', type=float, default=0, help='Milliseconds to wait between 64 KB reads (slow clients)')
+        parser.add_argument('--scenario', action='append', dest='scenarios', help='Run only the named scenario (repeatable)')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        targets = {}
+        for target in options['targets']:
+            name, _, url = target.partition('=')
+            if not name or not url:
+                raise CommandError(f'Target must be NAME=URL, got {target!r}')
+            targets[name] = url
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError('--concurrency must be comma-separated integers')
+
+        scenarios = concurrency.concurrency_scenarios()
+        if options['scenarios']:
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['scenarios']]
+            if not scenarios:
+                raise CommandError('No matching scenarios')
+
+        report = concurrency.run(
+            targets, scenarios,
+            levels=levels,
+            total=options['requests'],
+            read_delay=options['read_delay'] / 1000,
+            log=self.stderr.write,
+        )
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as report_file:
+                report_file.write(output)
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        if len(targets) > 1:
+            self.stderr.write('Throughput / p95 by server:')
+            for scenario, level, values in concurrency.compare_targets(report):
+                cells = '  '.join(f'{name} {rps} rps / {p95} ms' for name, (rps, p95) in values.items())
+                self.stderr.write(f'  {scenario} x{level}: {cells}')
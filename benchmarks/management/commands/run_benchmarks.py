@@ -0,0 +1,53 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks import runner
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the benchmark scenarios (home, lists, details, search, genre, API) through the '
+        'Django test client or against a running server and reports p50/p95 latency and '
+        'query counts as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests per scenario')
+        parser.add_argument('--base-url', help='Benchmark a running server (e.g. http://127.0.0.1:8000) instead of in-process')
+        parser.add_argument('--metrics-token', default='', help='Bearer token for /metrics in server mode')
+        parser.add_argument('--scenario', action='append', dest='scenarios', help='Run only the named scenario (repeatable)')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--compare', help='Baseline JSON report to compare against')
+
+    def handle(self, *args, **options):
+        scenarios = runner.default_scenarios()
+        if options['scenarios']:
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['scenarios']]
+            if not scenarios:
+                raise CommandError('No matching scenarios')
+
+        report = runner.run(
+            scenarios,
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            base_url=options['base_url'],
+            metrics_token=options['metrics_token'],
+            log=self.stderr.write,
+        )
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as report_file:
+                report_file.write(output)
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            baseline = runner.load_report(options['compare'])
+            self.stderr.write(f"Compared with {baseline.get('commit') or options['compare']}:")
+            for name, metrics in runner.compare(report, baseline).items():
+                changes = ', '.join(
+                    f'{metric} {before} -> {after}' + (f' ({percent:+}%)' if percent is not None else '')
+                    for metric, (before, after, percent) in metrics.items()
+                )
+                self.stderr.write(f'  {name}: {changes}')
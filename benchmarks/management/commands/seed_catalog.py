@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from benchmarks.seed import CatalogSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a realistic benchmark catalog with bulk inserts: movies, series with seasons '
+        'and episodes, genres, countries, persons, users, ratings, threaded comments, '
+        'favorites/watchlists and activity history.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movies', type=int, default=1000)
+        parser.add_argument('--series', type=int, default=200)
+        parser.add_argument('--persons', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--ratings-per-user', type=int, default=20)
+        parser.add_argument('--comments-per-title', type=int, default=5, help='Maximum comment threads per title')
+        parser.add_argument('--activities-per-user', type=int, default=30)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        CatalogSeeder(
+            movies=options['movies'],
+            series=options['series'],
+            persons=options['persons'],
+            users=options['users'],
+            ratings_per_user=options['ratings_per_user'],
+            comments_per_title=options['comments_per_title'],
+            activities_per_user=options['activities_per_user'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        ).run()
+        self.stdout.write(self.style.SUCCESS(f'Catalog seeded in {time.monotonic() - started:.1f} s'))
@@ -0,0 +1,208 @@
+"""
+Прогон сценариев нагрузочного теста и отчёт в JSON.
+
+Сценарий — именованный URL (главная, списки, детальные страницы, поиск,
+жанр, API). Каждый сценарий прогоняется iterations раз после прогрева:
+
+- в процессе (Django test client) — задержка и число запросов к БД
+  на каждый запрос (CaptureQueriesContext);
+- против запущенного сервера (base_url) — задержка по HTTP, а число
+  запросов к БД берётся как прирост db_queries_total в /metrics
+  (core.instrumentation) за время сценария.
+
+Отчёт содержит p50/p95/среднее/максимум задержки и запросов к БД на
+запрос и сравнивается с отчётом другого коммита через compare().
+"""
+import json
+import statistics
+import subprocess
+import time
+from urllib.parse import urljoin
+import requests
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from movies.catalog import catalog_entries
+from movies.models import Genre
+
+
+class Scenario:
+    def __init__(self, name, view, url, headers=None):
+        self.name = name
+        self.view = view
+        self.url = url
+        self.headers = headers or {}
+
+
+def default_scenarios():
+    """Сценарии по реальным данным: берутся самые просматриваемые тайтлы и жанр с контентом."""
+    movie = catalog_entries('movie').order_by('-views').first()
+    series = catalog_entries('series').order_by('-views').first()
+    genre = Genre.objects.filter(movie_set__isnull=False).distinct().first()
+    query = (movie.original_title or movie.title_uz).split()[0] if movie else 'film'
+
+    scenarios = [
+        Scenario('home', 'home', reverse('home')),
+        Scenario('movie_list', 'movie_list', reverse('movie_list')),
+        Scenario('movie_list_page_3', 'movie_list', reverse('movie_list') + '?page=3'),
+        Scenario('series_list', 'series_list', reverse('series_list')),
+        Scenario('search', 'search', reverse('search') + f'?q={query}'),
+        Scenario('api_movies', 'movie-list', reverse('movie-list')),
+        Scenario('api_series', 'series-list', reverse('series-list')),
+        Scenario('api_suggest', 'api_suggest', reverse('api_suggest') + f'?q={query[:3]}'),
+    ]
+    if genre:
+        scenarios += [
+            Scenario('genre', 'genre', reverse('genre', kwargs={'slug': genre.slug})),
+            Scenario('movie_list_filtered', 'movie_list', reverse('movie_list') + f'?genres={genre.pk}&year_from=2000'),
+            Scenario('api_movies_filtered', 'movie-list', reverse('movie-list') + f'?genres={genre.pk}&year_from=2000'),
+        ]
+    if movie:
+        scenarios.append(Scenario('movie_detail', 'movie_detail', movie.get_absolute_url()))
+    if series:
+        scenarios.append(Scenario('series_detail', 'series_detail', series.get_absolute_url()))
+    return scenarios
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    if not values:
+        return None
+    position = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[position]
+
+
+def _summary(timings, queries):
+    timings = [timing * 1000 for timing in timings]
+    summary = {
+        'requests': len(timings),
+        'p50_ms': round(_percentile(timings, 50), 2),
+        'p95_ms': round(_percentile(timings, 95), 2),
+        'mean_ms': round(statistics.mean(timings), 2),
+        'max_ms': round(max(timings), 2),
+    }
+    if queries is not None:
+        summary['queries_per_request'] = round(statistics.mean(queries), 2) if queries else 0
+        summary['queries_max'] = max(queries) if queries else 0
+    return summary
+
+
+class InProcessTarget:
+    """Запросы через Django test client в текущем процессе."""
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST='localhost')
+
+    def request(self, scenario):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = self.client.get(scenario.url)
+            elapsed = time.perf_counter() - started
+        return response.status_code, elapsed, len(captured)
+
+    def start(self, scenario):
+        pass
+
+    def scenario_queries(self, scenario, queries, iterations):
+        return queries
+
+
+class ServerTarget:
+    """Запросы к запущенному серверу по HTTP; запросы к БД — по приросту /metrics."""
+
+    def __init__(self, base_url, metrics_token=''):
+        self.session = requests.Session()
+        self.base_url = base_url
+        self.metrics_headers = {'Authorization': f'Bearer {metrics_token}'} if metrics_token else {}
+        self._before = None
+
+    def _db_queries(self, view):
+        response = self.session.get(urljoin(self.base_url, '/metrics'), headers=self.metrics_headers)
+        if response.status_code != 200:
+            return None
+        prefix = f'db_queries_total{{view="{view}"}} '
+        for line in response.text.splitlines():
+            if line.startswith(prefix):
+                return float(line[len(prefix):])
+        return 0.0
+
+    def start(self, scenario):
+        self._before = self._db_queries(scenario.view)
+
+    def request(self, scenario):
+        started = time.perf_counter()
+        response = self.session.get(urljoin(self.base_url, scenario.url))
+        return response.status_code, time.perf_counter() - started, None
+
+    def scenario_queries(self, scenario, queries, iterations):
+        after = self._db_queries(scenario.view)
+        if self._before is None or after is None:
+            return None
+        # Метрики одного воркера: при нескольких воркерах значение приблизительное
+        average = (after - self._before) / iterations
+        return [average] * iterations
+
+
+def run(scenarios, iterations=20, warmup=2, base_url=None, metrics_token='', log=None):
+    """Прогоняет сценарии и возвращает отчёт (dict, готовый к json.dumps)."""
+    log = log or (lambda message: None)
+    target = ServerTarget(base_url, metrics_token) if base_url else InProcessTarget()
+    results = {}
+    for scenario in scenarios:
+        for _ in range(warmup):
+            target.request(scenario)
+        target.start(scenario)
+
+        timings, queries, statuses = [], [], {}
+        for _ in range(iterations):
+            status, elapsed, query_count = target.request(scenario)
+            timings.append(elapsed)
+            if query_count is not None:
+                queries.append(query_count)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+        summary = _summary(timings, target.scenario_queries(scenario, queries, iterations))
+        summary['url'] = scenario.url
+        summary['status'] = statuses
+        results[scenario.name] = summary
+        log(f"{scenario.name:<22} p50 {summary['p50_ms']:>8.2f} ms  p95 {summary['p95_ms']:>8.2f} ms  "
+            f"queries {summary.get('queries_per_request', '-')}")
+
+    return {
+        'commit': _git_commit(),
+        'mode': 'server' if base_url else 'in-process',
+        'iterations': iterations,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'scenarios': results,
+    }
+
+
+def compare(report, baseline):
+    """Разница с базовым отчётом по p50/p95 и запросам к БД: {сценарий: {метрика: (было, стало, %)}}."""
+    changes = {}
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'queries_per_request'):
+            before, after = previous.get(metric), current.get(metric)
+            if before is None or after is None:
+                continue
+            percent = round((after - before) / before * 100, 1) if before else None
+            changes.setdefault(name, {})[metric] = (before, after, percent)
+    return changes
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as report_file:
+        return json.load(report_file)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
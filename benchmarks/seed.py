@@ -0,0 +1,303 @@
+"""
+Генерация правдоподобного каталога для нагрузочных тестов.
+
+Все записи создаются пакетными вставками (bulk_create), поэтому сигналы
+не срабатывают: ключи поиска, slug, рейтинги и поля деревьев комментариев
+считаются здесь же, а витрина каталога перестраивается в конце.
+"""
+import io
+import random
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+from core.storage import media_storage
+from movies.catalog import rebuild_catalog
+from movies.models import (
+    Genre, Country, Person, Movie, Series, Season, Episode, Rating, Comment
+)
+from movies.search_keys import search_key
+from movies.slugs import allocate_slugs
+from users.models import UserProfile, UserActivity
+
+GENRES = [
+    ('Action', 'Jangari', 'Döyüş'), ('Comedy', 'Komediya', 'Komediya'), ('Drama', 'Drama', 'Dram'),
+    ('Thriller', 'Triller', 'Triller'), ('Horror', 'Qo‘rqinchli', 'Qorxu'), ('Romance', 'Romantika', 'Romantika'),
+    ('Adventure', 'Sarguzasht', 'Macəra'), ('Animation', 'Multfilm', 'Cizgi filmi'), ('Crime', 'Jinoyat', 'Cinayət'),
+    ('Fantasy', 'Fantastika', 'Fantastika'), ('Documentary', 'Hujjatli', 'Sənədli'), ('Family', 'Oilaviy', 'Ailə'),
+]
+
+COUNTRIES = [
+    ('USA', 'AQSH', 'ABŞ'), ('UZB', 'O‘zbekiston', 'Özbəkistan'), ('AZE', 'Ozarbayjon', 'Azərbaycan'),
+    ('TUR', 'Turkiya', 'Türkiyə'), ('RUS', 'Rossiya', 'Rusiya'), ('GBR', 'Buyuk Britaniya', 'Böyük Britaniya'),
+    ('FRA', 'Fransiya', 'Fransa'), ('KOR', 'Janubiy Koreya', 'Cənubi Koreya'), ('IND', 'Hindiston', 'Hindistan'),
+    ('JPN', 'Yaponiya', 'Yaponiya'),
+]
+
+TITLE_WORDS_UZ = ['Shahar', 'Tun', 'Yulduz', 'Sirli', 'Oxirgi', 'Qora', 'Oltin', 'Yo‘l', 'Dengiz', 'Sevgi', 'Qasos', 'Bahor']
+TITLE_WORDS_AZ = ['Şəhər', 'Gecə', 'Ulduz', 'Sirli', 'Sonuncu', 'Qara', 'Qızıl', 'Yol', 'Dəniz', 'Sevgi', 'İntiqam', 'Bahar']
+TITLE_WORDS_EN = ['City', 'Night', 'Star', 'Secret', 'Last', 'Black', 'Golden', 'Road', 'Sea', 'Love', 'Revenge', 'Spring']
+FIRST_NAMES = ['Aziz', 'Leyla', 'John', 'Emma', 'Rustam', 'Nigar', 'Kamol', 'Sevinc', 'Michael', 'Anna', 'Elchin', 'Dilnoza']
+LAST_NAMES = ['Karimov', 'Aliyeva', 'Smith', 'Brown', 'Mammadov', 'Tursunova', 'Hasanov', 'Johnson', 'Quliyev', 'Lee']
+COMMENT_TEXTS = [
+    'Juda zo‘r film!', 'Çox maraqlı idi.', 'Aktyorlar ajoyib o‘ynagan.', 'Sonu gözlənilməz oldu.',
+    'Ikkinchi qismini kutamiz.', 'Musiqisi çox gözəldir.', 'Biroz cho‘zilib ketgan.', 'Tövsiyə edirəm!',
+]
+
+# Постеры и фоны: несколько одноцветных изображений на весь каталог
+IMAGE_COLORS = ['#1f3b73', '#7a1f2b', '#2e6b3a', '#6b4f1f', '#4b2e6b', '#1f6b6b']
+POSTER_SIZE = (300, 450)
+BACKDROP_SIZE = (1280, 720)
+
+DESCRIPTION = (
+    'Ushbu film shahar hayoti, do‘stlik va tanlov haqida hikoya qiladi. '
+    'Bu film şəhər həyatı, dostluq və seçim haqqında danışır.'
+)
+
+
+class CatalogSeeder:
+    """Генератор данных: параметры объёма задаются в конструкторе, run() создаёт всё по порядку."""
+
+    def __init__(self, movies=1000, series=200, persons=2000, users=500, ratings_per_user=20,
+                 comments_per_title=5, activities_per_user=30, batch_size=1000, seed=None, log=None):
+        self.counts = {
+            'movies': movies, 'series': series, 'persons': persons, 'users': users,
+        }
+        self.ratings_per_user = ratings_per_user
+        self.comments_per_title = comments_per_title
+        self.activities_per_user = activities_per_user
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.run_tag = self.random.randint(100000, 999999)
+
+    def run(self):
+        with transaction.atomic():
+            self.images = self.seed_images()
+            genres = self.seed_genres()
+            countries = self.seed_countries()
+            persons = self.seed_persons()
+            movies = self.seed_content(Movie, self.counts['movies'], genres, countries, persons)
+            series = self.seed_content(Series, self.counts['series'], genres, countries, persons)
+            self.seed_episodes(series)
+            users = self.seed_users()
+            titles = [('movie', movie) for movie in movies] + [('series', show) for show in series]
+            self.seed_ratings(users, titles)
+            self.seed_comments(users, titles)
+            self.seed_library(users, movies, series)
+            self.seed_activities(users, titles)
+        entries = rebuild_catalog()
+        self.log(f'Catalog rebuilt: {entries} entries')
+
+    # --- Справочники ---
+
+    def seed_images(self):
+        """Имена файлов постеров и фонов в хранилище медиа (одинаковые файлы хранятся один раз)."""
+        storage = media_storage()
+        images = {'poster': [], 'backdrop': []}
+        for color in IMAGE_COLORS:
+            for kind, size, directory in (('poster', POSTER_SIZE, 'posters'), ('backdrop', BACKDROP_SIZE, 'backdrops')):
+                buffer = io.BytesIO()
+                Image.new('RGB', size, color).save(buffer, 'JPEG', quality=80)
+                images[kind].append(storage.save(f'{directory}/benchmark.jpg', ContentFile(buffer.getvalue())))
+        return images
+
+    def seed_genres(self):
+        Genre.objects.bulk_create([
+            Genre(name=name, name_uz=name_uz, name_az=name_az, slug=name.lower(),
+                  search_key=search_key(name_uz, name_az, name))
+            for name, name_uz, name_az in GENRES
+        ], ignore_conflicts=True)
+        return list(Genre.objects.all())
+
+    def seed_countries(self):
+        Country.objects.bulk_create([
+            Country(code=code, name_uz=name_uz, name_az=name_az) for code, name_uz, name_az in COUNTRIES
+        ], ignore_conflicts=True)
+        return list(Country.objects.all())
+
+    def seed_persons(self):
+        persons = []
+        for number in range(self.counts['persons']):
+            name = f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)} {number}'
+            role = 'director' if number % 10 == 0 else 'actor'
+            persons.append(Person(name=name, role=role, search_key=search_key(name)))
+        persons = self._bulk(Person, persons)
+        self.log(f'Persons: {len(persons)}')
+        return persons
+
+    # --- Контент ---
+
+    def _title(self):
+        words = self.random.sample(range(len(TITLE_WORDS_EN)), self.random.randint(1, 3))
+        suffix = f' {self.run_tag % 1000}-{self.random.randint(1, 9999)}'
+        return (
+            ' '.join(TITLE_WORDS_UZ[word] for word in words) + suffix,
+            ' '.join(TITLE_WORDS_AZ[word] for word in words) + suffix,
+            ' '.join(TITLE_WORDS_EN[word] for word in words) + suffix,
+        )
+
+    def seed_content(self, model, count, genres, countries, persons):
+        actors = [person for person in persons if person.role == 'actor'] or persons
+        directors = [person for person in persons if person.role == 'director'] or persons
+        # bulk_create не вызывает save(): ключи поиска заполняются здесь
+        description_key = search_key(DESCRIPTION, DESCRIPTION)
+        objects = []
+        for _ in range(count):
+            title_uz, title_az, original_title = self._title()
+            obj = model(
+                title_uz=title_uz, title_az=title_az, original_title=original_title,
+                description_uz=DESCRIPTION, description_az=DESCRIPTION,
+                year=self.random.randint(1970, self.now.year),
+                duration=self.random.randint(80, 180),
+                content_type='cartoon' if model is Movie and self.random.random() < 0.1 else model._meta.model_name,
+                views=int(self.random.paretovariate(1.2) * 100),
+                is_featured=self.random.random() < 0.02,
+                poster=self.random.choice(self.images['poster']),
+                backdrop=self.random.choice(self.images['backdrop']),
+                search_key=search_key(title_uz, title_az, original_title),
+                description_key=description_key,
+            )
+            if model is Series:
+                obj.seasons_count = self.random.randint(1, 5)
+                obj.status = self.random.choice(['ongoing', 'completed', 'cancelled'])
+            objects.append(obj)
+        allocate_slugs(model, objects, lambda obj: obj.title_az)
+        objects = self._bulk(model, objects)
+
+        # created_at проставляется auto_now_add при вставке: разносим по последним трём годам
+        for obj in objects:
+            obj.created_at = self.now - timedelta(minutes=self.random.randint(0, 3 * 365 * 24 * 60))
+        model.objects.bulk_update(objects, ['created_at'], batch_size=self.batch_size)
+
+        relations = (
+            (model.genres.through, 'genre_id', genres, (1, 3)),
+            (model.countries.through, 'country_id', countries, (1, 2)),
+            (model.actors.through, 'person_id', actors, (3, 8)),
+            (model.directors.through, 'person_id', directors, (1, 1)),
+        )
+        field = f'{model._meta.model_name}_id'
+        for through, target, choices, (low, high) in relations:
+            rows = []
+            for obj in objects:
+                for choice in self.random.sample(choices, min(len(choices), self.random.randint(low, high))):
+                    rows.append(through(**{field: obj.pk, target: choice.pk}))
+            through.objects.bulk_create(rows, batch_size=self.batch_size)
+        self.log(f'{model._meta.verbose_name_plural}: {len(objects)}')
+        return objects
+
+    def seed_episodes(self, series):
+        seasons = []
+        for show in series:
+            for number in range(show.seasons_count):
+                seasons.append(Season(series=show, season_number=number, title_uz=f'{number + 1}-mavsum'))
+        seasons = self._bulk(Season, seasons)
+        episodes = []
+        for season in seasons:
+            for number in range(self.random.randint(6, 12)):
+                episodes.append(Episode(
+                    season=season, episode_number=number, title_uz=f'{number + 1}-qism',
+                    duration=self.random.randint(30, 60),
+                ))
+        self._bulk(Episode, episodes)
+        self.log(f'Seasons: {len(seasons)}, episodes: {len(episodes)}')
+
+    # --- Пользователи и их активность ---
+
+    def seed_users(self):
+        password = make_password('benchmark')
+        users = self._bulk(User, [
+            User(username=f'bench_{self.run_tag}_{number}', email=f'bench_{self.run_tag}_{number}@example.com',
+                 password=password)
+            for number in range(self.counts['users'])
+        ])
+        self._bulk(UserProfile, [UserProfile(user=user) for user in users])
+        self.log(f'Users: {len(users)}')
+        return users
+
+    def seed_ratings(self, users, titles):
+        ratings = []
+        scores = {}
+        for user in users:
+            for content_type, obj in self.random.sample(titles, min(len(titles), self.ratings_per_user)):
+                score = self.random.randint(1, 5)
+                ratings.append(Rating(user=user, content_type=content_type, score=score, **{content_type: obj}))
+                scores.setdefault(obj, []).append(score)
+        self._bulk(Rating, ratings)
+
+        # Средний рейтинг считается один раз по сгенерированным оценкам
+        for model in (Movie, Series):
+            rated = [obj for obj in scores if isinstance(obj, model)]
+            for obj in rated:
+                obj.rating_count = len(scores[obj])
+                obj.rating_avg = round(sum(scores[obj]) / obj.rating_count, 2)
+            model.objects.bulk_update(rated, ['rating_avg', 'rating_count'], batch_size=self.batch_size)
+        self.log(f'Ratings: {len(ratings)}')
+
+    def seed_comments(self, users, titles):
+        """Ветки комментариев: корень, ответы и ответы на ответы с готовыми полями MPTT."""
+        tree_id = (Comment.objects.order_by('-tree_id').values_list('tree_id', flat=True).first() or 0)
+        levels = [[], [], []]
+        for content_type, obj in titles:
+            for _ in range(self.random.randint(0, self.comments_per_title)):
+                tree_id += 1
+                counter = iter(range(1, 1000))
+                root = self._comment(users, content_type, obj, tree_id, 0, next(counter))
+                levels[0].append((root, None))
+                for _ in range(self.random.randint(0, 3)):
+                    reply = self._comment(users, content_type, obj, tree_id, 1, next(counter))
+                    levels[1].append((reply, root))
+                    for _ in range(self.random.randint(0, 2)):
+                        nested = self._comment(users, content_type, obj, tree_id, 2, next(counter))
+                        nested.rght = next(counter)
+                        levels[2].append((nested, reply))
+                    reply.rght = next(counter)
+                root.rght = next(counter)
+
+        # Родитель должен получить pk раньше детей: вставка по уровням
+        for level in levels:
+            for comment, parent in level:
+                comment.parent = parent
+            self._bulk(Comment, [comment for comment, _ in level])
+        self.log(f'Comments: {sum(len(level) for level in levels)} in {len(levels[0])} threads')
+
+    def _comment(self, users, content_type, obj, tree_id, level, lft):
+        return Comment(
+            user=self.random.choice(users), content_type=content_type, text=self.random.choice(COMMENT_TEXTS),
+            is_approved=self.random.random() < 0.9, tree_id=tree_id, level=level, lft=lft, rght=0,
+            **{content_type: obj},
+        )
+
+    def seed_library(self, users, movies, series):
+        profiles = {profile.user_id: profile.pk for profile in UserProfile.objects.filter(user__in=users)}
+        relations = (
+            (UserProfile.favorite_movies.through, 'movie_id', movies),
+            (UserProfile.favorite_series.through, 'series_id', series),
+            (UserProfile.watchlist_movies.through, 'movie_id', movies),
+            (UserProfile.watchlist_series.through, 'series_id', series),
+        )
+        for through, field, titles in relations:
+            rows = []
+            for user in users:
+                for obj in self.random.sample(titles, min(len(titles), self.random.randint(0, 10))):
+                    rows.append(through(userprofile_id=profiles[user.pk], **{field: obj.pk}))
+            through.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def seed_activities(self, users, titles):
+        activities = []
+        for user in users:
+            for _ in range(self.activities_per_user):
+                content_type, obj = self.random.choice(titles)
+                activities.append(UserActivity(
+                    user=user, activity_type=self.random.choice(['view', 'view', 'view', 'rating', 'favorite']),
+                    content_type=content_type, content_id=obj.pk, content_title=obj.title_uz,
+                ))
+        self._bulk(UserActivity, activities)
+        self.log(f'Activities: {len(activities)}')
+
+    def _bulk(self, model, objects):
+        return model.objects.bulk_create(objects, batch_size=self.batch_size)
@@ -0,0 +1,12 @@
+"""
+ASGI config for kinosite project.
+
+Запуск: uvicorn config.asgi:application (или gunicorn с воркером
+uvicorn.workers.UvicornWorker). Асинхронные представления — отдача видео,
+предпросмотр TMDB, API каталога — не занимают поток на время ожидания.
+"""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+application = get_asgi_application()
@@ -2,7 +2,7 @@
 Django settings for kinosite project.
 """
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 import os
 
 # Build paths inside the project
@@ -26,7 +26,7 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'rest_framework_simplejwt',
     'allauth',
-    'allauth.account',
+    'core.apps.AccountConfig',  # allauth.account с проверкой async-варианта AccountMiddleware
     'allauth.socialaccount',
     'allauth.socialaccount.providers.google',
     'allauth.socialaccount.providers.facebook',
@@ -54,11 +54,13 @@ INSTALLED_APPS = [
     'core',
     'movies',
     'users',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.AsyncWhiteNoiseMiddleware',
+    'core.middleware.InstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'core.middleware.AdminLanguageMiddleware',
@@ -67,7 +69,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'allauth.account.middleware.AccountMiddleware',
+    'core.middleware.AsyncAccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.ViewCountMiddleware',
@@ -77,7 +79,7 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -89,12 +91,14 @@ TEMPLATES = [
                 'django.template.context_processors.i18n',
                 'core.context_processors.site_settings',
                 'core.context_processors.google_analytics',
+                'core.context_processors.library_state',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database
 DATABASES = {
@@ -145,13 +149,41 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Адаптивные изображения: число потоков для генерации производных
+IMAGE_DERIVATIVE_WORKERS = config('IMAGE_DERIVATIVE_WORKERS', default=2, cast=int)
+# Потоков удаления файлов из очереди после массового удаления контента
+MEDIA_DELETE_WORKERS = config('MEDIA_DELETE_WORKERS', default=8, cast=int)
+
+# Загрузка видео по частям (movies.uploads): размер части в браузере, предел части
+# на сервере и через сколько часов брошенная загрузка считается мусором
+VIDEO_UPLOAD_CHUNK_SIZE = config('VIDEO_UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+VIDEO_UPLOAD_MAX_CHUNK_SIZE = config('VIDEO_UPLOAD_MAX_CHUNK_SIZE', default=64 * 1024 * 1024, cast=int)
+VIDEO_UPLOAD_EXPIRY_HOURS = config('VIDEO_UPLOAD_EXPIRY_HOURS', default=7 * 24, cast=int)
+# Обработка видео после загрузки (movies.video_processing): пути к ffmpeg/ffprobe,
+# одновременных обработок и предел времени на перенос moov (секунды)
+FFMPEG_BINARY = config('FFMPEG_BINARY', default='ffmpeg')
+FFPROBE_BINARY = config('FFPROBE_BINARY', default='ffprobe')
+VIDEO_PROCESSING_WORKERS = config('VIDEO_PROCESSING_WORKERS', default=1, cast=int)
+VIDEO_PROCESSING_TIMEOUT = config('VIDEO_PROCESSING_TIMEOUT', default=3600, cast=int)
+
+# Карта сайта: заранее сгенерированные шарды (build_sitemaps)
+SITE_URL = config('SITE_URL', default='http://localhost:8000')
+SITEMAP_ROOT = Path(config('SITEMAP_ROOT', default=str(BASE_DIR / 'sitemaps')))
+SITEMAP_SHARD_SIZE = config('SITEMAP_SHARD_SIZE', default=10000, cast=int)
+
+# Фильтры каталога через инвертированный индекс в памяти процесса (movies.catalog_index)
+CATALOG_INDEX_ENABLED = config('CATALOG_INDEX_ENABLED', default=True, cast=bool)
+# Как часто (секунды) процесс перечитывает общую версию каталога из БД: изменения из
+# других воркеров и команд попадают в индексы фильтров и подсказок не позже этого
+CATALOG_VERSION_TTL = config('CATALOG_VERSION_TTL', default=2, cast=float)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Redis Cache (временно отключено)
 # CACHES = {
 #     'default': {
-#         'BACKEND': 'django_redis.cache.RedisCache',
+#         'BACKEND': 'core.instrumentation.InstrumentedRedisCache',
 #         'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
 #         'OPTIONS': {
 #             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
@@ -164,7 +196,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Временное кэширование в памяти
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.instrumentation.InstrumentedLocMemCache',
         'LOCATION': 'unique-snowflake',
     }
 }
@@ -242,6 +274,19 @@ GEOIP_PATH = BASE_DIR / config('GEOIP_PATH', default='geoip')
 
 # TMDB API
 TMDB_API_KEY = config('TMDB_API_KEY', default='4ff5f9695fe6dbf04ea1e8afb376fd39')
+TMDB_API_URL = config('TMDB_API_URL', default='https://api.themoviedb.org/3')
+TMDB_IMAGE_DOWNLOADS = config('TMDB_IMAGE_DOWNLOADS', default=4, cast=int)
+# Фоновые импорты из админки: одновременных заданий и потоков запросов к TMDB на задание
+TMDB_IMPORT_JOBS = config('TMDB_IMPORT_JOBS', default=2, cast=int)
+TMDB_IMPORT_WORKERS = config('TMDB_IMPORT_WORKERS', default=4, cast=int)
+# Через сколько минут без обновления задание импорта считается потерянным (перезапуск воркера)
+TMDB_IMPORT_STALE_MINUTES = config('TMDB_IMPORT_STALE_MINUTES', default=15, cast=int)
+# Потоков запросов к TMDB при синхронизации изменений (sync_tmdb_changes)
+TMDB_SYNC_WORKERS = config('TMDB_SYNC_WORKERS', default=8, cast=int)
+
+# Перевод UZ → AZ (translate_db_to_az): потоков и запросов к переводчику в секунду
+TRANSLATION_WORKERS = config('TRANSLATION_WORKERS', default=4, cast=int)
+TRANSLATION_RATE_LIMIT = config('TRANSLATION_RATE_LIMIT', default=5, cast=float)
 
 # Email - отключаем отправку email для разработки
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -308,9 +353,37 @@ LOGGING = {
             'class': 'logging.StreamHandler',
         },
     },
+    'loggers': {
+        # Строка JSON на каждый запрос (core.middleware.InstrumentationMiddleware)
+        'core.requests': {
+            'handlers': ['console'],
+            'level': config('REQUEST_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
     'root': {
         'handlers': ['console'],
         'level': 'INFO',
     },
 }
 
+# Метрики и бюджеты запросов (core.instrumentation)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv())
+# Бюджет запросов к БД по имени URL (вместе с 3 запросами сессии в middleware);
+# превышение — предупреждение в лог, при QUERY_BUDGET_STRICT (тесты) — QueryBudgetExceeded
+QUERY_BUDGETS = {
+    'home': 15,
+    'movie_list': 12,
+    'series_list': 12,
+    'genre': 10,
+    'search': 10,
+    'api_suggest': 4,
+    'sitemap': 4,
+    'sitemap_shard': 4,
+    'movie-list': 8,
+    'series-list': 8,
+}
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=None, cast=lambda value: int(value) if value else None)
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=False, cast=bool)
+
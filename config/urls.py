@@ -5,9 +5,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
-from core.sitemaps_config import sitemaps
-from core.views import RobotsTxtView
+from core.views import RobotsTxtView, sitemap_index, sitemap_shard, metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -17,10 +15,14 @@ urlpatterns = [
     path('api/', include('movies.api_urls')),
 
     # Sitemap
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap_index, name='sitemap'),
+    path('sitemaps/<slug:name>.xml.gz', sitemap_shard, name='sitemap_shard'),
 
     # robots.txt
     path("robots.txt", RobotsTxtView.as_view()),
+
+    # Метрики Prometheus
+    path('metrics', metrics, name='metrics'),
 ]
 
 # Custom admin site titles
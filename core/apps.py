@@ -1,4 +1,9 @@
+from allauth.account.apps import AccountConfig as AllauthAccountConfig
 from django.apps import AppConfig
+from django.conf import settings
+from django.core import checks
+
+ACCOUNT_MIDDLEWARE = 'core.middleware.AsyncAccountMiddleware'
 
 
 class CoreConfig(AppConfig):
@@ -6,3 +11,26 @@ class CoreConfig(AppConfig):
     name = 'core'
     verbose_name = 'Основные настройки'
 
+    def ready(self):
+        import core.sitemap_shards  # Перестройка шардов карты сайта при изменении контента
+        import core.instrumentation  # Счётчик запросов к БД на каждом новом соединении
+
+
+class AccountConfig(AllauthAccountConfig):
+    """
+    allauth.account с проверкой MIDDLEWARE на AsyncAccountMiddleware.
+
+    AccountConfig.ready allauth ищет в MIDDLEWARE свою AccountMiddleware по
+    имени, а она только синхронная: под ASGI весь запрос ниже неё ушёл бы в
+    один общий поток. Вместо неё подключена её async-совместимая
+    подклассовая версия, а проверка имени заменена системной проверкой.
+    """
+
+    def ready(self):
+        checks.register(check_account_middleware)
+
+
+def check_account_middleware(app_configs, **kwargs):
+    if ACCOUNT_MIDDLEWARE not in settings.MIDDLEWARE:
+        return [checks.Error(f'{ACCOUNT_MIDDLEWARE} must be added to settings.MIDDLEWARE', id='core.E001')]
+    return []
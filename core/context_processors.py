@@ -2,6 +2,8 @@
 Context processors for global template variables.
 """
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from users.library_service import get_request_library
 
 
 def site_settings(request):
@@ -19,3 +21,10 @@ def google_analytics(request):
         'GOOGLE_ANALYTICS_ID': settings.GOOGLE_ANALYTICS_ID,
     }
 
+
+
+def library_state(request):
+    """Добавляет состояние библиотеки пользователя (загружается только при обращении)."""
+    return {
+        'library': SimpleLazyObject(lambda: get_request_library(request)),
+    }
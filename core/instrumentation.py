@@ -0,0 +1,276 @@
+"""
+Инструментирование запросов: время, запросы к БД, кэш, шаблоны.
+
+Статистика текущего запроса (RequestStats) лежит в contextvar и
+заполняется точками подключения:
+
+- запросы к БД — обёртка record_query, которая ставится на каждое
+  соединение при подключении (сигнал connection_created), поэтому
+  считаются и запросы из потоков sync_to_async под ASGI: contextvar
+  копируется в поток вместе с контекстом;
+- попадания/промахи кэша — InstrumentedCacheMixin в бэкенде CACHES;
+- рендеринг шаблонов — бэкенд InstrumentedDjangoTemplates в TEMPLATES
+  (время верхнеуровневых шаблонов, включая вложенные include).
+
+По завершении запроса статистика пишется строкой JSON в лог
+core.requests и агрегируется в реестре метрик, который отдаётся
+в формате Prometheus на /metrics. Реестр — в памяти процесса, поэтому
+при нескольких воркерах gunicorn каждый воркер считает свои метрики.
+
+Бюджет запросов к БД задаётся декоратором query_budget (или атрибутом
+query_budget у класса представления) либо по имени URL в QUERY_BUDGETS.
+Превышение пишется в лог, а при QUERY_BUDGET_STRICT = True (в тестах)
+поднимает QueryBudgetExceeded.
+"""
+import contextvars
+import threading
+import time
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+# Границы корзин гистограммы длительности запроса, секунды
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов к БД, чем разрешено бюджетом."""
+
+
+class RequestStats:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.duration = 0.0
+        self.queries = 0
+        self.query_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.monotonic() - started
+
+    def finish(self):
+        self.duration = time.monotonic() - self.started
+        return self
+
+
+def current_stats():
+    """Статистика текущего запроса или None вне запроса."""
+    return _current.get()
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка выполнения запроса: пишет в статистику текущего запроса, если он есть."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.record_query(execute, sql, params, many, context)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # connection_created приходит при каждом переподключении того же объекта
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper, dispatch_uid='core_instrumentation_queries')
+
+
+# --- Кэш ---
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """Считает попадания и промахи get/get_many в статистике текущего запроса."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        stats = _current.get()
+        if value is _MISSING:
+            if stats is not None:
+                stats.cache_misses += 1
+            return default
+        if stats is not None:
+            stats.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version)
+        stats = _current.get()
+        if stats is not None:
+            stats.cache_hits += len(values)
+            stats.cache_misses += len(keys) - len(values)
+        return values
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+try:
+    from django_redis.cache import RedisCache
+except ImportError:  # django-redis нужен только при кэше в Redis
+    pass
+else:
+    class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+        pass
+
+
+# --- Шаблоны ---
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None or stats.template_depth:
+            # render_to_string внутри шаблона уже входит во время внешнего рендеринга
+            return super().render(context, request)
+        stats.template_depth += 1
+        started = time.monotonic()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_time += time.monotonic() - started
+            stats.template_depth -= 1
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates, замеряющий время рендеринга шаблонов представлений."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+# --- Бюджеты запросов ---
+
+def query_budget(limit):
+    """Декоратор функции представления: не больше limit запросов к БД на запрос."""
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+    return decorator
+
+
+def budget_for(view_func, view_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if view_name in budgets:
+        return budgets[view_name]
+    view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+    for target in (view_func, view_class):
+        limit = getattr(target, 'query_budget', None)
+        if limit is not None:
+            return limit
+    return getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+
+
+# --- Реестр метрик ---
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """Агрегаты по представлениям в памяти процесса и их вывод в формате Prometheus."""
+
+    COUNTERS = (
+        ('db_queries_total', 'Database queries executed by view.', 'queries'),
+        ('db_query_seconds_total', 'Time spent in database queries by view.', 'query_time'),
+        ('cache_hits_total', 'Cache hits by view.', 'cache_hits'),
+        ('cache_misses_total', 'Cache misses by view.', 'cache_misses'),
+        ('template_render_seconds_total', 'Time spent rendering templates by view.', 'template_time'),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.durations = {}
+            self.totals = {}
+            self.budget_exceeded = {}
+
+    def observe(self, view, method, status, stats, over_budget=False):
+        with self._lock:
+            key = (view, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            buckets, total, count = self.durations.get(view, ([0] * len(DURATION_BUCKETS), 0.0, 0))
+            for position, bound in enumerate(DURATION_BUCKETS):
+                if stats.duration <= bound:
+                    buckets[position] += 1
+            self.durations[view] = (buckets, total + stats.duration, count + 1)
+
+            totals = self.totals.setdefault(view, dict.fromkeys((name for _, _, name in self.COUNTERS), 0))
+            for _, _, name in self.COUNTERS:
+                totals[name] += getattr(stats, name)
+
+            if over_budget:
+                self.budget_exceeded[view] = self.budget_exceeded.get(view, 0) + 1
+
+    def render(self):
+        with self._lock:
+            lines = [
+                '# HELP http_requests_total HTTP requests by view, method and status.',
+                '# TYPE http_requests_total counter',
+            ]
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{_labels(view=view, method=method, status=status)} {count}')
+
+            lines += [
+                '# HELP http_request_duration_seconds Request wall time by view.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for view, (buckets, total, count) in sorted(self.durations.items()):
+                for bound, observed in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{_labels(view=view, le=bound)} {observed}')
+                lines.append(f'http_request_duration_seconds_bucket{_labels(view=view, le="+Inf")} {count}')
+                lines.append(f'http_request_duration_seconds_sum{_labels(view=view)} {total:.6f}')
+                lines.append(f'http_request_duration_seconds_count{_labels(view=view)} {count}')
+
+            for metric, help_text, name in self.COUNTERS:
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+                for view, totals in sorted(self.totals.items()):
+                    lines.append(f'{metric}{_labels(view=view)} {totals[name]:g}')
+
+            lines += [
+                '# HELP query_budget_exceeded_total Requests that exceeded the view query budget.',
+                '# TYPE query_budget_exceeded_total counter',
+            ]
+            for view, count in sorted(self.budget_exceeded.items()):
+                lines.append(f'query_budget_exceeded_total{_labels(view=view)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
@@ -1,31 +1,131 @@
 """
 Custom middleware for kinosite project.
 """
+import json
+import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.utils import translation
 from django.conf import settings
+from allauth.account.middleware import AccountMiddleware
+from allauth.core import context as allauth_context
+from whitenoise.middleware import WhiteNoiseMiddleware
 import geoip2.database
 import geoip2.errors
 from pathlib import Path
+from core.instrumentation import (
+    start_request, end_request, budget_for, registry, QueryBudgetExceeded
+)
 
+request_logger = logging.getLogger('core.requests')
+
+
+class HybridMiddleware:
+    """
+    Основа middleware, работающего и под WSGI, и под ASGI.
+
+    Под ASGI Django оборачивает каждый синхронный middleware в
+    sync_to_async, и запрос проходит цепочку в общем потоке. Здесь
+    синхронный путь — handle(), асинхронный — __acall__(), и цепочка
+    остаётся асинхронной до самого представления.
+    """
+    sync_capable = True
+    async_capable = True
 
-class AdminLanguageMiddleware:
-    """Force Russian language in Django admin, keep site language unaffected."""
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware с асинхронным путём (в whitenoise 6.6 он только синхронный)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class AsyncAccountMiddleware(AccountMiddleware):
+    """
+    AccountMiddleware allauth с асинхронным путём: завершающая обработка
+    allauth (очистка брошенного входа в сессии) выполняется её же
+    синхронным __call__ в потоке. Подключается в MIDDLEWARE вместо
+    allauth.account.middleware.AccountMiddleware (см. core.apps.AccountConfig).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        with allauth_context.request_context(request):
+            response = await self.get_response(request)
+        finish = AccountMiddleware(lambda request: response)
+        return await sync_to_async(finish)(request)
+
+
+class AdminLanguageMiddleware(HybridMiddleware):
+    """Force Russian language in Django admin, keep site language unaffected."""
+
+    def activate(self, request):
         if request.path.startswith('/admin'):
             translation.activate('ru')
             request.LANGUAGE_CODE = 'ru'
+
+    def handle(self, request):
+        self.activate(request)
         return self.get_response(request)
 
+    async def __acall__(self, request):
+        self.activate(request)
+        return await self.get_response(request)
 
-class LanguageDetectionMiddleware:
+
+class LanguageDetectionMiddleware(HybridMiddleware):
     """
     Автоматическое определение языка пользователя по IP-адресу.
     """
     def __init__(self, get_response):
-        self.get_response = get_response
+        super().__init__(get_response)
         self.reader = None
         
         # Инициализация GeoIP2 reader
@@ -36,7 +136,7 @@ class LanguageDetectionMiddleware:
             except Exception as e:
                 print(f"GeoIP2 initialization error: {e}")
 
-    def __call__(self, request):
+    def handle(self, request):
         # Если это админка, язык уже активирован в AdminLanguageMiddleware
         if request.path.startswith('/admin'):
             return self.get_response(request)
@@ -47,6 +147,15 @@ class LanguageDetectionMiddleware:
         response = self.get_response(request)
         return response
 
+    async def __acall__(self, request):
+        if request.path.startswith('/admin'):
+            return await self.get_response(request)
+        language = 'az'
+        translation.activate(language)
+        # Сессия в БД загружается при первом обращении — это синхронный запрос
+        await sync_to_async(request.session.__setitem__)('django_language', language)
+        return await self.get_response(request)
+
     def get_client_ip(self, request):
         """Получение реального IP-адреса клиента."""
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -57,14 +166,11 @@ class LanguageDetectionMiddleware:
         return ip
 
 
-class ViewCountMiddleware:
+class ViewCountMiddleware(HybridMiddleware):
     """
     Подсчет просмотров фильмов/сериалов.
     """
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
+    def handle(self, request):
         response = self.get_response(request)
         
         # Увеличение счетчика просмотров для детальных страниц
@@ -76,3 +182,61 @@ class ViewCountMiddleware:
         
         return response
 
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        content = getattr(request, 'content_object', None)
+        if hasattr(content, 'views'):
+            content.views += 1
+            await content.asave(update_fields=['views'])
+        return response
+
+
+class InstrumentationMiddleware(HybridMiddleware):
+    """
+    Метрики запроса: время, число и время запросов к БД, попадания/промахи
+    кэша, время рендеринга шаблонов. Пишет строку JSON в лог core.requests,
+    агрегирует метрики для /metrics и проверяет бюджет запросов представления.
+    """
+    def handle(self, request):
+        stats, token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.report(request, response, stats.finish())
+
+    async def __acall__(self, request):
+        stats, token = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.report(request, response, stats.finish())
+
+    def report(self, request, response, stats):
+        match = request.resolver_match
+        view_name = (match.view_name if match else '') or '<unresolved>'
+        # Бюджет — по представлению из resolver_match, без process_view (под ASGI это переход в поток)
+        budget = budget_for(match.func, match.view_name) if match else None
+        over_budget = budget is not None and stats.queries > budget
+
+        registry.observe(view_name, request.method, response.status_code, stats, over_budget)
+        request_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'duration_ms': round(stats.duration * 1000, 2),
+            'db_queries': stats.queries,
+            'db_time_ms': round(stats.query_time * 1000, 2),
+            'cache_hits': stats.cache_hits,
+            'cache_misses': stats.cache_misses,
+            'template_ms': round(stats.template_time * 1000, 2),
+        }, ensure_ascii=False))
+
+        if over_budget:
+            message = f'{view_name}: {stats.queries} запросов к БД при бюджете {budget} ({request.path})'
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            request_logger.warning(message)
+        return response
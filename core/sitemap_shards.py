@@ -0,0 +1,328 @@
+"""
+Карта сайта: индекс и заранее сгенерированные gzip-шарды.
+
+Каждый шард покрывает один тип контента и диапазон id
+(movies-0.xml.gz — фильмы с id 0..9999 при SITEMAP_SHARD_SIZE=10000),
+поэтому лимит в 50 000 URL на файл не превышается, а изменение одной
+записи перестраивает только её шард и индекс. Файлы лежат в SITEMAP_ROOT
+и отдаются без обращения к БД; manifest.json хранит lastmod шардов,
+чтобы индекс можно было переписать без запросов.
+"""
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from xml.sax.saxutils import escape
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.signals import post_save, post_delete
+from django.urls import reverse
+from django.utils import timezone
+from movies.models import Movie, Series, News
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = 'sitemap.xml'
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = '.lock'
+STATIC_SHARD = 'static-0'
+
+# Раздел -> модель, имя URL, поле изображения, changefreq, priority
+SECTIONS = {
+    'movies': {'model': Movie, 'url_name': 'movie_detail', 'image': 'poster', 'changefreq': 'weekly', 'priority': '0.9'},
+    'series': {'model': Series, 'url_name': 'series_detail', 'image': 'poster', 'changefreq': 'weekly', 'priority': '0.9'},
+    'news': {'model': News, 'url_name': 'news_detail', 'image': 'image', 'changefreq': 'daily', 'priority': '0.6'},
+}
+
+MODEL_SECTIONS = {section['model']: name for name, section in SECTIONS.items()}
+
+# Поля, попадающие в карту сайта: сохранение только других полей
+# (просмотры, рейтинг, метаданные видео) шард не перестраивает
+SITEMAP_FIELDS = {'slug', 'is_published', 'updated_at'}
+
+STATIC_URLS = ['home', 'movie_list', 'series_list', 'news_list']
+
+URLSET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">\n'
+)
+
+_lock = threading.Lock()
+_pending_lock = threading.Lock()
+_executor = None
+_pending = set()
+
+# Ключ очереди для полной перегенерации
+BUILD_ALL = ('*', None)
+
+
+def sitemap_root():
+    return Path(getattr(settings, 'SITEMAP_ROOT', Path(settings.BASE_DIR) / 'sitemaps'))
+
+
+def shard_size():
+    return getattr(settings, 'SITEMAP_SHARD_SIZE', 10000)
+
+
+def absolute_url(path):
+    if path.startswith(('http://', 'https://')):
+        return path
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def shard_name(section, number):
+    return f'{section}-{number}'
+
+
+def shard_url(name):
+    return absolute_url(reverse('sitemap_shard', kwargs={'name': name}))
+
+
+def _write_atomic(path, data):
+    """Пишет файл через временный и os.replace, чтобы не отдать недописанный."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _url_entry(loc, lastmod=None, changefreq=None, priority=None, image=None):
+    parts = [f'<url><loc>{escape(loc)}</loc>']
+    if lastmod:
+        parts.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+    if changefreq:
+        parts.append(f'<changefreq>{changefreq}</changefreq>')
+    if priority:
+        parts.append(f'<priority>{priority}</priority>')
+    if image:
+        parts.append(f'<image:image><image:loc>{escape(image)}</image:loc></image:image>')
+    parts.append('</url>\n')
+    return ''.join(parts)
+
+
+def _write_shard(name, entries):
+    xml = URLSET_OPEN + ''.join(entries) + '</urlset>\n'
+    _write_atomic(sitemap_root() / f'{name}.xml.gz', gzip.compress(xml.encode('utf-8'), mtime=0))
+
+
+def build_shard(section, number):
+    """
+    Перестраивает один шард одним запросом по диапазону id.
+    Возвращает lastmod шарда или None, если в диапазоне нет опубликованных записей.
+    """
+    config = SECTIONS[section]
+    model = config['model']
+    image_field = config['image']
+    storage = model._meta.get_field(image_field).storage
+    size = shard_size()
+
+    rows = (
+        model.objects
+        .filter(is_published=True, pk__gte=number * size, pk__lt=(number + 1) * size)
+        .order_by('pk')
+        .values_list('slug', 'updated_at', image_field)
+    )
+
+    entries = []
+    lastmod = None
+    for slug, updated_at, image in rows.iterator():
+        entries.append(_url_entry(
+            absolute_url(reverse(config['url_name'], kwargs={'slug': slug})),
+            lastmod=updated_at,
+            changefreq=config['changefreq'],
+            priority=config['priority'],
+            image=absolute_url(storage.url(image)) if image else None,
+        ))
+        if lastmod is None or updated_at > lastmod:
+            lastmod = updated_at
+
+    name = shard_name(section, number)
+    if not entries:
+        (sitemap_root() / f'{name}.xml.gz').unlink(missing_ok=True)
+        return None
+    _write_shard(name, entries)
+    return lastmod
+
+
+def build_static_shard():
+    entries = [_url_entry(absolute_url(reverse(url_name)), changefreq='daily', priority='0.5') for url_name in STATIC_URLS]
+    _write_shard(STATIC_SHARD, entries)
+    return timezone.now()
+
+
+def _read_manifest():
+    try:
+        with open(sitemap_root() / MANIFEST_NAME, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(manifest):
+    """Переписывает manifest.json и sitemap.xml по lastmod шардов."""
+    _write_atomic(sitemap_root() / MANIFEST_NAME, json.dumps(manifest, sort_keys=True).encode('utf-8'))
+
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n',
+    ]
+    for name, lastmod in sorted(manifest.items()):
+        parts.append(f'<sitemap><loc>{escape(shard_url(name))}</loc><lastmod>{lastmod}</lastmod></sitemap>\n')
+    parts.append('</sitemapindex>\n')
+    _write_atomic(sitemap_root() / INDEX_NAME, ''.join(parts).encode('utf-8'))
+
+
+@contextmanager
+def _locked():
+    """
+    Сериализует перестройку между потоками (threading.Lock) и между
+    процессами — воркерами и командами (flock, на Windows msvcrt.locking
+    на SITEMAP_ROOT/.lock):
+    manifest.json читается и переписывается целиком.
+    """
+    root = sitemap_root()
+    root.mkdir(parents=True, exist_ok=True)
+    with _lock, open(root / LOCK_NAME, 'a') as lock_file:
+        _lock_file(lock_file)
+        try:
+            yield
+        finally:
+            _unlock_file(lock_file)
+
+
+def _lock_file(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return
+    # Windows: блокировка первого байта; LK_LOCK сдаётся примерно через 10 секунд
+    lock_file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock_file(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _build_all():
+    manifest = {STATIC_SHARD: build_static_shard().date().isoformat()}
+    size = shard_size()
+    for section, config in SECTIONS.items():
+        max_id = config['model'].objects.filter(is_published=True).aggregate(max_id=Max('pk'))['max_id']
+        if max_id is None:
+            continue
+        for number in range(max_id // size + 1):
+            lastmod = build_shard(section, number)
+            if lastmod:
+                manifest[shard_name(section, number)] = lastmod.date().isoformat()
+
+    _write_index(manifest)
+    # Шарды разделов, которых больше нет в индексе
+    for stale in sitemap_root().glob('*.xml.gz'):
+        if stale.name[:-len('.xml.gz')] not in manifest:
+            stale.unlink()
+    return len(manifest)
+
+
+def build_all():
+    """Полная перегенерация всех шардов и индекса. Возвращает число шардов."""
+    with _locked():
+        return _build_all()
+
+
+def rebuild_shard(section, number):
+    """Перестраивает один шард и обновляет индекс."""
+    with _locked():
+        manifest = _read_manifest()
+        if not manifest:
+            # Индекса ещё нет: собираем всё целиком
+            _build_all()
+            return
+
+        name = shard_name(section, number)
+        lastmod = build_shard(section, number)
+        if lastmod:
+            manifest[name] = lastmod.date().isoformat()
+        else:
+            manifest.pop(name, None)
+        _write_index(manifest)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Один поток: изменения в пачке (импорт) схлопываются в одну перестройку шарда
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sitemap')
+    return _executor
+
+
+def _run_rebuild(key):
+    with _pending_lock:
+        _pending.discard(key)
+    try:
+        if key == BUILD_ALL:
+            build_all()
+        else:
+            rebuild_shard(*key)
+    except Exception as e:
+        logger.error(f"Ошибка перестройки шарда карты сайта {key}: {e}", exc_info=True)
+
+
+def _schedule(key):
+    with _pending_lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    _get_executor().submit(_run_rebuild, key)
+
+
+def schedule_rebuild(section, number):
+    """Ставит перестройку шарда в очередь, если она ещё не запланирована."""
+    _schedule((section, number))
+
+
+def schedule_build_all():
+    """Ставит полную перегенерацию в очередь (например, если индекса ещё нет)."""
+    _schedule(BUILD_ALL)
+
+
+def rebuild_on_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    section = MODEL_SECTIONS[sender]
+    if update_fields and not set(update_fields) & (SITEMAP_FIELDS | {SECTIONS[section]['image']}):
+        return
+    number = instance.pk // shard_size()
+    transaction.on_commit(lambda: schedule_rebuild(section, number))
+
+
+for _model in MODEL_SECTIONS:
+    post_save.connect(rebuild_on_change, sender=_model, dispatch_uid=f'sitemap_save_{_model.__name__}')
+    post_delete.connect(rebuild_on_change, sender=_model, dispatch_uid=f'sitemap_delete_{_model.__name__}')
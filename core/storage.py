@@ -0,0 +1,88 @@
+"""
+Хранилище медиафайлов с адресацией по содержимому.
+"""
+import hashlib
+import posixpath
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+
+class BlobExists(Exception):
+    """Файл с таким содержимым уже записан (параллельной загрузкой)."""
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, в котором имя файла — SHA-256 его содержимого:
+    posters/poster_1.jpg -> posters/3f/3fa9...c1.jpg.
+
+    Одинаковые изображения, импортированные разными путями (админка, сигнал,
+    разные поля), хранятся один раз и повторно не записываются. Файл удаляется,
+    только когда на него больше не ссылается ни одно поле в БД.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        hexdigest = digest.hexdigest()
+        dirname, filename = posixpath.split(name.replace('\\', '/'))
+        ext = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(dirname, hexdigest[:2], f'{hexdigest}{ext}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        try:
+            return self._save(name, content)
+        except BlobExists:
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        # Вызывается только при гонке в _save: тот же хэш — тот же файл
+        if self.exists(name):
+            raise BlobExists(name)
+        return name
+
+    def referencing_fields(self):
+        """Все файловые поля моделей, использующие это хранилище."""
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if isinstance(field, models.FileField) and field.storage is self:
+                    yield model, field
+
+    def is_referenced(self, name):
+        """
+        Ссылается ли на файл хоть одна строка. По одному EXISTS на поле
+        (колонки проиндексированы), проверка останавливается на первом совпадении.
+        """
+        return any(
+            model._default_manager.filter(**{field.name: name}).exists()
+            for model, field in self.referencing_fields()
+        )
+
+    def delete(self, name):
+        if self.is_referenced(name):
+            return
+        super().delete(name)
+
+
+_media_storage = None
+
+
+def media_storage():
+    """Общий экземпляр хранилища для полей изображений."""
+    global _media_storage
+    if _media_storage is None:
+        _media_storage = ContentAddressedStorage()
+    return _media_storage
@@ -1,4 +1,8 @@
 from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from core.storage import media_storage
+from movies import image_derivatives
 
 register = template.Library()
 
@@ -9,3 +13,63 @@ def get_list(dict, key):
     Usage: {{ request.GET|get_list:"genres" }}
     """
     return dict.getlist(key)
+
+
+def _library_key(content):
+    """(content_type, id) for a Movie/Series or a CatalogEntry."""
+    key = getattr(content, 'library_key', None)
+    return key if key else (content._meta.model_name, content.pk)
+
+
+@register.filter(name='is_favorite')
+def is_favorite(library, content):
+    """
+    Usage: {% if library|is_favorite:movie %}
+    """
+    return library.is_favorite(*_library_key(content))
+
+
+@register.filter(name='in_watchlist')
+def in_watchlist(library, content):
+    """
+    Usage: {% if library|in_watchlist:movie %}
+    """
+    return library.in_watchlist(*_library_key(content))
+
+
+@register.filter(name='user_rating')
+def user_rating(library, content):
+    """
+    Usage: {{ library|user_rating:movie }}
+    """
+    return library.user_rating(*_library_key(content))
+
+
+@register.simple_tag
+def responsive_image(image, kind='poster', alt='', sizes='200px', css_class='', placeholder='img/no-poster.png'):
+    """
+    Renders a <picture> with AVIF/WebP/JPEG srcsets of pre-generated derivatives.
+    Falls back to the original file until derivatives exist.
+    Accepts an image field file or a stored file name (CatalogEntry.poster).
+    Usage: {% responsive_image movie.poster 'poster' alt=movie.title_uz sizes="(max-width: 576px) 45vw, 200px" %}
+    """
+    if not image:
+        return format_html('<img src="{}" alt="{}" class="{}" loading="lazy">', static(placeholder), alt, css_class)
+
+    if isinstance(image, str):
+        name, url = image, media_storage().url(image)
+    else:
+        name, url = image.name, image.url
+
+    if not image_derivatives.derivatives_ready(name, kind):
+        return format_html('<img src="{}" alt="{}" class="{}" loading="lazy">', url, alt, css_class)
+
+    srcsets = image_derivatives.srcsets(name, kind)
+    sources = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((ext, srcset, sizes) for ext, srcset in srcsets.items() if ext != 'jpg')
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="lazy" decoding="async"></picture>',
+        sources, image_derivatives.fallback_url(name, kind), srcsets['jpg'], sizes, alt, css_class
+    )
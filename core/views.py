@@ -1,5 +1,10 @@
+import hmac
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
 from django.views.generic import TemplateView
+from core import sitemap_shards
+from core.instrumentation import registry
 
 class RobotsTxtView(TemplateView):
     template_name = "robots.txt"
@@ -9,3 +14,44 @@ class RobotsTxtView(TemplateView):
         context = super().get_context_data(**kwargs)
         context['request'] = self.request
         return context
+
+
+def _sitemap_file(filename, content_type):
+    path = sitemap_shards.sitemap_root() / filename
+    if not path.is_file():
+        raise Http404('Sitemap not found')
+    response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+def sitemap_index(request):
+    """Индекс карты сайта из заранее сгенерированного файла (без запросов к БД)."""
+    if not (sitemap_shards.sitemap_root() / sitemap_shards.INDEX_NAME).is_file():
+        # Первый запрос после развёртывания, если build_sitemaps ещё не запускали:
+        # генерация уходит в фон, запрос её не ждёт
+        sitemap_shards.schedule_build_all()
+        response = HttpResponse('Sitemap is being generated', status=503, content_type='text/plain')
+        response['Retry-After'] = '300'
+        return response
+    return _sitemap_file(sitemap_shards.INDEX_NAME, 'application/xml')
+
+
+def sitemap_shard(request, name):
+    """Шард карты сайта (gzip) из SITEMAP_ROOT."""
+    return _sitemap_file(f'{name}.xml.gz', 'application/gzip')
+
+
+def _metrics_allowed(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return hmac.compare_digest(header, f'Bearer {token}')
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request):
+    """Метрики запросов этого процесса в текстовом формате Prometheus."""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -2,7 +2,7 @@
 Custom admin panel for movies app.
 """
 from django.contrib import admin
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 import nested_admin
 from .models import (
     Genre, Country, Person, Movie, Series, Season, Episode,
@@ -10,15 +10,38 @@ from .models import (
 )
 from .admin_forms import TMDBMovieForm, TMDBSeriesForm, EpisodeForm, SeasonForm
 from django.contrib import messages
-from django.utils.text import slugify
-from django.core.files.base import ContentFile
-from unidecode import unidecode
-from .tmdb_service import TMDBService
+from .models import TMDBImportJob, TMDBSyncRun, VideoUpload
+from .tmdb_import import start_import_job
+from . import moderation
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def start_tmdb_import(model_admin, request, content_type, objects):
+    """Запускает фоновый импорт из TMDB и сообщает об этом; итог — в панели прогресса над списком."""
+    job = start_import_job(content_type, [obj.pk for obj in objects], request.user)
+    model_admin.message_user(
+        request,
+        f"Импорт из TMDB запущен в фоне ({job.total} шт., задание #{job.pk}). Прогресс — над списком.",
+        messages.INFO
+    )
+
+
+def video_info(obj):
+    """Сведения о видеофайле из ffprobe (movies.video_processing)."""
+    if not obj.video_file:
+        return '-'
+    if obj.video_processed != obj.video_file.name:
+        return 'Обрабатывается...'
+    parts = [obj.video_resolution, '/'.join(codec for codec in (obj.video_codec, obj.audio_codec) if codec)]
+    if obj.video_bitrate:
+        parts.append(f'{obj.video_bitrate / 1_000_000:.1f} Мбит/с')
+    if obj.video_duration:
+        parts.append(f'{obj.video_duration // 3600}:{obj.video_duration // 60 % 60:02d}:{obj.video_duration % 60:02d}')
+    return ', '.join(part for part in parts if part) or '-'
+
+
 @admin.register(Genre)
 class GenreAdmin(admin.ModelAdmin):
     list_display = ['name', 'name_az', 'name_uz', 'slug']
@@ -70,16 +93,19 @@ class MovieAdmin(admin.ModelAdmin):
     search_fields = ('title_az', 'title_uz', 'original_title')
     filter_horizontal = ('genres', 'countries', 'directors', 'actors')
     actions = ['fill_from_tmdb_action']
+    change_list_template = 'admin/movies/tmdb_import_change_list.html'
+    change_form_template = 'admin/movies/resumable_upload_change_form.html'
+    readonly_fields = ('video_info',)
     
     fieldsets = (
         ('Основная информация', {
-            'fields': ('title_az', 'title_uz', 'original_title', 'slug', 'tmdb_id')
+            'fields': ('title_az', 'title_uz', 'original_title', 'slug', 'tmdb_id', 'fill_from_tmdb')
         }),
         ('Описание', {
             'fields': ('description_az', 'description_uz')
         }),
         ('Медиа', {
-            'fields': ('poster', 'backdrop', 'trailer_url', 'video_file')
+            'fields': ('poster', 'backdrop', 'trailer_url', 'video_file', 'video_info')
         }),
         ('Данные', {
             'fields': ('year', 'duration', 'rating_avg')
@@ -97,6 +123,10 @@ class MovieAdmin(admin.ModelAdmin):
             return format_html('<img src="{}" width="50" height="75" />', obj.poster.url)
         return '-'
     poster_preview.short_description = 'Постер'
+
+    def video_info(self, obj):
+        return video_info(obj)
+    video_info.short_description = 'Сведения о видео'
     
     def poster_preview_large(self, obj):
         if obj.poster:
@@ -112,115 +142,14 @@ class MovieAdmin(admin.ModelAdmin):
     def fill_from_tmdb_action(self, request, queryset):
         """
         Admin action для заполнения выбранных фильмов данными из TMDB.
+        Импорт идёт в фоне, прогресс показывается над списком.
         """
-        updated_count = 0
-        error_count = 0
-        service = TMDBService()
-
-        for movie in queryset:
-            tmdb_id = movie.tmdb_id
-            # Если TMDB ID не указан, пытаемся найти по названию
-            if not tmdb_id and movie.original_title:
-                search_results = service.search_movie(movie.original_title, language='en-US')
-                if search_results and search_results.get('results'):
-                    tmdb_id = search_results['results'][0]['id']
-                    movie.tmdb_id = tmdb_id  # Сохраняем найденный ID
-                    self.message_user(request, f"Найден TMDB ID ({tmdb_id}) для '{movie.original_title}' по названию.", messages.INFO)
-                else:
-                    self.message_user(request, f"Не удалось найти фильм '{movie.original_title}' в TMDB по названию.", messages.WARNING)
-                    error_count += 1
-                    continue
-
-            if not tmdb_id:
-                self.message_user(request, f"У фильма '{movie.title_uz or movie.original_title}' не указан ни TMDB ID, ни оригинальное название для поиска.", messages.WARNING)
-                error_count += 1
-                continue
-
-            try:
-                movie_data = service.get_movie_data_multilang(tmdb_id)
-                formatted = service.format_movie_data(movie_data)
-
-                if not formatted:
-                    self.message_user(request, f"Не удалось получить данные из TMDB для '{movie.title_uz}' (TMDB ID: {tmdb_id}).", messages.ERROR)
-                    error_count += 1
-                    continue
-
-                # --- Заполняем поля ---
-                movie.title_az = formatted.get('title_az', movie.title_az)
-                # ... (заполняем остальные поля, как в management command)
-                movie.original_title = formatted.get('original_title', '')
-                movie.description_az = formatted.get('description_az', '')
-                movie.year = formatted.get('year')
-                movie.duration = formatted.get('duration', 0)
-                movie.rating_avg = round(formatted.get('imdb_rating', 0) / 2, 1)
-                movie.trailer_url = formatted.get('trailer_url', '')
-                if not movie.slug:
-                    movie.slug = slugify(unidecode(movie.title_az or movie.title_uz or movie.original_title))
-                
-                # --- Изображения ---
-                if formatted.get('poster_path'):
-                    poster_content = service.download_image(formatted['poster_path'])
-                    if poster_content:
-                        movie.poster.save(f"poster_{movie.tmdb_id}.jpg", ContentFile(poster_content), save=False)
-                
-                if formatted.get('backdrop_path'):
-                    backdrop_content = service.download_image(formatted['backdrop_path'])
-                    if backdrop_content:
-                        movie.backdrop.save(f"backdrop_{movie.tmdb_id}.jpg", ContentFile(backdrop_content), save=False)
-                
-                movie.save() # Сохраняем основные поля
-
-                # --- M2M Связи ---
-                # Жанры
-                genre_names = formatted.get('genres', [])
-                genres_to_set = []
-                for name in genre_names: # These are English names from TMDB
-                    genre, created = Genre.objects.get_or_create(
-                        name=name,
-                        defaults={'name_az': service._translate_text(name, 'az')}
-                    )
-                    if created:
-                        logger.info(f"Created new genre: '{name}' with Azerbaijani translation '{genre.name_az}'")
-                    genres_to_set.append(genre)
-                if genres_to_set: movie.genres.set(genres_to_set)
-
-                # Страны
-                country_names = formatted.get('countries', [])
-                countries_to_set = []
-                for name in country_names:
-                    code = ''.join(filter(str.isalpha, unidecode(name)))[:3].upper()
-                    country, _ = Country.objects.get_or_create(code=code, defaults={'name_az': name})
-                    countries_to_set.append(country)
-                if countries_to_set: movie.countries.set(countries_to_set)
-
-                # Актеры
-                actors_data = formatted.get('actors', [])
-                actors_to_set = []
-                for actor_data in actors_data:
-                    name = actor_data.get('name')
-                    if name:
-                        person, _ = Person.objects.get_or_create(name=name, defaults={'role': 'actor'})
-                        actors_to_set.append(person)
-                if actors_to_set: movie.actors.set(actors_to_set)
-
-                # Режиссеры
-                director_names = formatted.get('directors', [])
-                directors_to_set = []
-                for name in director_names:
-                    person, _ = Person.objects.get_or_create(name=name, defaults={'role': 'director'})
-                    directors_to_set.append(person)
-                if directors_to_set: movie.directors.set(directors_to_set)
-                
-                updated_count += 1
-
-            except Exception as e:
-                self.message_user(request, f"Ошибка при обновлении '{movie.title_uz}': {e}", messages.ERROR)
-                error_count += 1
-
-        if updated_count > 0:
-            self.message_user(request, f"Успешно обновлено {updated_count} фильмов.", messages.SUCCESS)
-        if error_count > 0:
-            self.message_user(request, f"Не удалось обновить {error_count} фильмов.", messages.ERROR)
+        start_tmdb_import(self, request, 'movie', queryset)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if form.cleaned_data.get('fill_from_tmdb'):
+            start_tmdb_import(self, request, 'movie', [obj])
 
 
 @admin.register(Series)
@@ -236,11 +165,14 @@ class SeriesAdmin(nested_admin.NestedModelAdmin):
     readonly_fields = ['rating_avg', 'rating_count', 'views', 'created_at', 'updated_at', 'poster_preview_large']
     inlines = [SeasonInline]
     actions = ['fill_from_tmdb_action']
+    change_list_template = 'admin/movies/tmdb_import_change_list.html'
+    change_form_template = 'admin/movies/resumable_upload_change_form.html'
     
     fieldsets = [
         ('Основная информация', {
             'fields': [
-                'title_az', 'title_uz', 'original_title', 'slug', 'content_type', 'year', 'seasons_count', 'status',
+                'title_az', 'title_uz', 'original_title', 'slug', 'tmdb_id', 'fill_from_tmdb',
+                'content_type', 'year', 'seasons_count', 'status',
             ]
         }),
         ('Описание', {
@@ -284,133 +216,12 @@ class SeriesAdmin(nested_admin.NestedModelAdmin):
 
     @admin.action(description='Заполнить данные из TMDB для сериалов')
     def fill_from_tmdb_action(self, request, queryset):
-        updated_count = 0
-        error_count = 0
-        service = TMDBService()
-
-        for series in queryset:
-            tmdb_id = series.tmdb_id
-            if not tmdb_id and series.original_title:
-                search_results = service.search_series(series.original_title, language='en-US')
-                if search_results and search_results.get('results'):
-                    tmdb_id = search_results['results'][0]['id']
-                    series.tmdb_id = tmdb_id
-                    self.message_user(request, f"Найден TMDB ID ({tmdb_id}) для '{series.original_title}' по названию.", messages.INFO)
-                else:
-                    self.message_user(request, f"Не удалось найти сериал '{series.original_title}' в TMDB.", messages.WARNING)
-                    error_count += 1
-                    continue
-            
-            if not tmdb_id:
-                self.message_user(request, f"У сериала '{series.title_uz or series.original_title}' не указан TMDB ID или оригинальное название.", messages.WARNING)
-                error_count += 1
-                continue
-
-            try:
-                series_data = service.get_series_data_multilang(tmdb_id)
-                formatted = service.format_series_data(series_data)
-
-                if not formatted:
-                    self.message_user(request, f"Не удалось получить данные из TMDB для '{series.title_uz}' (ID: {tmdb_id}).", messages.ERROR)
-                    error_count += 1
-                    continue
-                
-                series.title_az = formatted.get('title_az', series.title_az)
-                series.original_title = formatted.get('original_title', series.original_title)
-                series.description_az = formatted.get('description_az', series.description_az)
-                series.year = formatted.get('year', series.year)
-                series.seasons_count = formatted.get('seasons_count', series.seasons_count)
-                series.status = formatted.get('status', series.status)
-                series.rating_avg = round(formatted.get('imdb_rating', 0) / 2, 1)
-                series.trailer_url = formatted.get('trailer_url', series.trailer_url)
-                if not series.slug:
-                    series.slug = slugify(unidecode(series.title_az or series.title_uz or series.original_title))
-                
-                if formatted.get('poster_path'):
-                    content = service.download_image(formatted['poster_path'])
-                    if content: series.poster.save(f"poster_{tmdb_id}.jpg", ContentFile(content), save=False)
-                
-                if formatted.get('backdrop_path'):
-                    content = service.download_image(formatted['backdrop_path'])
-                    if content: series.backdrop.save(f"backdrop_{tmdb_id}.jpg", ContentFile(content), save=False)
-
-                series.save()
-
-                # Связи M2M
-                genre_names = formatted.get('genres', [])
-                genres_to_set = []
-                for name in genre_names:
-                    genre, _ = Genre.objects.get_or_create(name=name, defaults={'name_az': service._translate_text(name, 'az')})
-                    genres_to_set.append(genre)
-                if genres_to_set: series.genres.set(genres_to_set)
-                
-                country_names = formatted.get('countries', [])
-                countries_to_set = []
-                for name in country_names:
-                    code = ''.join(filter(str.isalpha, unidecode(name)))[:3].upper()
-                    country, _ = Country.objects.get_or_create(code=code, defaults={'name_az': name})
-                    countries_to_set.append(country)
-                if countries_to_set: series.countries.set(countries_to_set)
-
-                actors_data = formatted.get('actors', [])
-                actors_to_set = []
-                for actor_data in actors_data:
-                    if name := actor_data.get('name'):
-                        person, _ = Person.objects.get_or_create(name=name, defaults={'role': 'actor'})
-                        actors_to_set.append(person)
-                if actors_to_set: series.actors.set(actors_to_set)
-
-                director_names = formatted.get('directors', [])
-                directors_to_set = []
-                for name in director_names:
-                    person, _ = Person.objects.get_or_create(name=name, defaults={'role': 'director'})
-                    directors_to_set.append(person)
-                if directors_to_set: series.directors.set(directors_to_set)
-
-                # --- Создание сезонов и эпизодов ---
-                seasons_data = formatted.get('seasons', [])
-                for season_data in seasons_data:
-                    # Пропускаем "спецвыпуски" с нулевым номером, если они есть
-                    if season_data['season_number'] < 1:
-                        continue
-                    
-                    season, created = Season.objects.update_or_create(
-                        series=series,
-                        season_number=season_data['season_number'] - 1,  # Сохраняем как 0-based
-                        defaults={
-                            'title_az': season_data.get('title_az', ''),
-                            'description_az': season_data.get('description_az', ''),
-                            'release_date': season_data.get('release_date') or None,
-                        }
-                    )
-                    if created:
-                        self.message_user(request, f"Создан Сезон {season.season_number} для '{series.title_uz}'", messages.SUCCESS)
-                    
-                    if season_data.get('poster_path'):
-                        content = service.download_image(season_data['poster_path'])
-                        if content: season.poster.save(f"s{season.season_number}_poster_{tmdb_id}.jpg", ContentFile(content), save=True)
-
-                    for episode_data in season_data.get('episodes', []):
-                        Episode.objects.update_or_create(
-                            season=season,
-                            episode_number=episode_data['episode_number'] - 1,  # Сохраняем как 0-based
-                            defaults={
-                                'title_az': episode_data.get('title_az', ''),
-                                'description_az': episode_data.get('description_az', ''),
-                                'duration': episode_data.get('duration'),
-                                'release_date': episode_data.get('release_date') or None,
-                            }
-                        )
-
-                updated_count += 1
-            except Exception as e:
-                self.message_user(request, f"Ошибка при обновлении '{series.title_uz}': {e}", messages.ERROR)
-                error_count += 1
-        
-        if updated_count > 0:
-            self.message_user(request, f"Успешно обновлено {updated_count} сериалов.", messages.SUCCESS)
-        if error_count > 0:
-            self.message_user(request, f"Не удалось обновить {error_count} сериалов.", messages.ERROR)
+        start_tmdb_import(self, request, 'series', queryset)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if form.cleaned_data.get('fill_from_tmdb'):
+            start_tmdb_import(self, request, 'series', [obj])
 
 
 @admin.register(Season)
@@ -420,6 +231,7 @@ class SeasonAdmin(nested_admin.NestedModelAdmin):
     list_filter = ['series']
     search_fields = ['series__title_uz', 'title_uz']
     inlines = [EpisodeInline]
+    change_form_template = 'admin/movies/resumable_upload_change_form.html'
 
 
 @admin.register(Episode)
@@ -428,6 +240,12 @@ class EpisodeAdmin(admin.ModelAdmin):
     list_display = ['__str__', 'episode_number', 'duration', 'release_date']
     list_filter = ['season__series']
     search_fields = ['title_uz']
+    change_form_template = 'admin/movies/resumable_upload_change_form.html'
+    readonly_fields = ['video_info']
+
+    def video_info(self, obj):
+        return video_info(obj)
+    video_info.short_description = 'Сведения о видео'
 
 
 @admin.register(Rating)
@@ -442,12 +260,34 @@ class RatingAdmin(admin.ModelAdmin):
     content_display.short_description = 'Контент'
 
 
+class ModerationStateFilter(admin.SimpleListFilter):
+    title = 'Модерация'
+    parameter_name = 'moderation'
+
+    def lookups(self, request, model_admin):
+        return [
+            ('pending', 'В очереди'),
+            ('approved', 'Одобренные'),
+            ('rejected', 'Отклонённые'),
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'pending':
+            return queryset.filter(is_approved=False, moderated_at__isnull=True)
+        if self.value() == 'approved':
+            return queryset.filter(is_approved=True)
+        if self.value() == 'rejected':
+            return queryset.filter(is_approved=False, moderated_at__isnull=False)
+        return queryset
+
+
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ['user', 'content_display', 'text_preview', 'is_approved', 'created_at']
-    list_filter = ['content_type', 'is_approved', 'created_at']
+    list_display = ['user', 'content_display', 'text_preview', 'is_approved', 'moderated_at', 'created_at']
+    list_filter = [ModerationStateFilter, 'content_type', 'is_approved', 'created_at']
+    list_select_related = ['user', 'movie', 'series']
     search_fields = ['user__username', 'text']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'moderated_at']
     actions = ['approve_comments', 'disapprove_comments']
     
     def content_display(self, obj):
@@ -459,11 +299,13 @@ class CommentAdmin(admin.ModelAdmin):
     text_preview.short_description = 'Текст'
     
     def approve_comments(self, request, queryset):
-        queryset.update(is_approved=True)
+        count = moderation.approve_comments(queryset)
+        self.message_user(request, f"Одобрено комментариев: {count}.", messages.SUCCESS)
     approve_comments.short_description = 'Одобрить выбранные комментарии'
     
     def disapprove_comments(self, request, queryset):
-        queryset.update(is_approved=False)
+        count = moderation.reject_comments(queryset)
+        self.message_user(request, f"Отклонено комментариев: {count}.", messages.SUCCESS)
     disapprove_comments.short_description = 'Отклонить выбранные комментарии'
 
 
@@ -526,3 +368,58 @@ class StaticPageAdmin(admin.ModelAdmin):
         }),
     ]
 
+
+@admin.register(TMDBImportJob)
+class TMDBImportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'content_type', 'status', 'processed', 'total', 'succeeded', 'failed', 'created_by', 'created_at']
+    list_filter = ['status', 'content_type']
+    fields = [
+        'content_type', 'status', 'total', 'processed', 'succeeded', 'failed', 'error',
+        'created_by', 'created_at', 'finished_at', 'results_table',
+    ]
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def results_table(self, obj):
+        return format_html_join(
+            '', '<div>{} — {}: {}</div>',
+            ((result['title'], 'OK' if result['status'] == 'ok' else 'ошибка', result['message']) for result in obj.results)
+        )
+    results_table.short_description = 'Результаты'
+
+
+@admin.register(TMDBSyncRun)
+class TMDBSyncRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'start_date', 'end_date', 'status', 'changed', 'checked', 'updated', 'failed', 'api_calls', 'started_at']
+    list_filter = ['status']
+    fields = [
+        'start_date', 'end_date', 'status', 'changed', 'checked', 'updated', 'failed', 'api_calls',
+        'started_at', 'finished_at', 'report',
+    ]
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(VideoUpload)
+class VideoUploadAdmin(admin.ModelAdmin):
+    list_display = ['id', 'filename', 'content_type', 'object_id', 'status', 'offset', 'size', 'created_by', 'updated_at']
+    list_filter = ['status', 'content_type']
+    fields = ['content_type', 'object_id', 'filename', 'name', 'status', 'offset', 'size', 'created_by', 'created_at', 'updated_at']
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
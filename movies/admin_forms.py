@@ -2,19 +2,71 @@
 Custom admin forms
 """
 from django import forms
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import format_html
 from .models import Movie, Series, Season, Episode, Person
+from .uploads import completed_file
+
+
+class ResumableFileInput(forms.ClearableFileInput):
+    """
+    Поле видеофайла, которое админка загружает по частям (movies.uploads)
+    ещё до отправки формы. В форму уходит только id завершённой загрузки:
+    файл уже лежит в хранилище и при сохранении не копируется.
+    Обычная загрузка файла формой по-прежнему работает.
+    """
+
+    def __init__(self, upload_type, attrs=None):
+        super().__init__(attrs)
+        self.upload_type = upload_type
+
+    @staticmethod
+    def upload_field_name(name):
+        return f'{name}_upload'
+
+    def render(self, name, value, attrs=None, renderer=None):
+        return format_html(
+            '<div class="resumable-upload" data-type="{}" data-url="{}" data-chunk-size="{}">'
+            '{}<input type="hidden" name="{}"><div class="resumable-upload-status help"></div></div>',
+            self.upload_type, reverse('api_video_uploads'), settings.VIDEO_UPLOAD_CHUNK_SIZE,
+            super().render(name, value, attrs, renderer), self.upload_field_name(name),
+        )
+
+    def value_from_datadict(self, data, files, name):
+        upload_id = data.get(self.upload_field_name(name), '')
+        if upload_id.isdigit():
+            uploaded = completed_file(self.upload_type, int(upload_id))
+            if uploaded is not None:
+                return uploaded
+        return super().value_from_datadict(data, files, name)
+
+    def value_omitted_from_data(self, data, files, name):
+        return (
+            super().value_omitted_from_data(data, files, name)
+            and not data.get(self.upload_field_name(name))
+        )
 
 
 class TMDBMovieForm(forms.ModelForm):
     tmdb_id = forms.IntegerField(label='TMDB ID', required=False)
+    fill_from_tmdb = forms.BooleanField(
+        label='Заполнить из TMDB', required=False,
+        help_text='После сохранения данные загрузятся из TMDB в фоне (по TMDB ID или оригинальному названию)'
+    )
 
     class Meta:
         model = Movie
         fields = '__all__'
+        widgets = {'video_file': ResumableFileInput('movie')}
 
 
 class TMDBSeriesForm(forms.ModelForm):
     tmdb_id = forms.IntegerField(label='TMDB ID', required=False)
+    fill_from_tmdb = forms.BooleanField(
+        label='Заполнить из TMDB', required=False,
+        help_text='После сохранения данные загрузятся из TMDB в фоне (по TMDB ID или оригинальному названию)'
+    )
 
     class Meta:
         model = Series
@@ -36,6 +88,7 @@ class EpisodeForm(forms.ModelForm):
     class Meta:
         model = Episode
         fields = '__all__'
+        widgets = {'video_file': ResumableFileInput('episode')}
 
 
 class SeasonForm(forms.ModelForm):
@@ -1,9 +1,23 @@
 """
-Admin views for getting next episode/season numbers
+Admin views for getting next episode/season numbers, TMDB preview, import jobs and chunked video uploads
 """
-from django.http import JsonResponse
+import asyncio
+import json
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, HttpResponse
 from django.contrib.admin.views.decorators import staff_member_required
-from .models import Season, Episode
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+from .models import Season, Episode, Movie, Series, TMDBImportJob, VideoUpload
+from .tmdb_service import TMDBService, TMDB_IMAGE_BASE_URL, TMDB_IMAGE_SIZES
+from .tmdb_import import IMPORTERS, start_import_job, job_payload, fail_stale_jobs
+from .uploads import UploadError, create_upload, write_chunk, cancel_upload, upload_payload
+
+# Сколько показывать завершённые задания в панели над списком
+TMDB_JOB_RECENT = timedelta(hours=1)
 
 @staff_member_required
 def get_next_episode_number(request):
@@ -39,3 +53,166 @@ def get_next_season_number(request):
         return JsonResponse({'error': 'Series not found'}, status=404)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
+TMDB_PREVIEW_TYPES = {
+    'movie': (Movie, 'get_movie_details', 'release_date', 'admin:movies_movie_change'),
+    'series': (Series, 'get_series_details', 'first_air_date', 'admin:movies_series_change'),
+}
+
+
+def _is_staff(request):
+    return request.user.is_active and request.user.is_staff
+
+
+async def tmdb_preview(request):
+    """
+    Предпросмотр тайтла TMDB перед импортом: ?tmdb_id=&type=movie|series.
+
+    Асинхронное представление: английская и азербайджанская версии
+    запрашиваются у TMDB параллельно в потоках, и ожидание ответа
+    TMDB не занимает воркер. Перевод (как при импорте) не выполняется.
+    """
+    if not await sync_to_async(_is_staff)(request):
+        return JsonResponse({'error': 'Staff only'}, status=403)
+    try:
+        tmdb_id = int(request.GET.get('tmdb_id', ''))
+    except ValueError:
+        return JsonResponse({'error': 'tmdb_id required'}, status=400)
+    content_type = request.GET.get('type', 'movie')
+    if content_type not in TMDB_PREVIEW_TYPES:
+        return JsonResponse({'error': 'type must be movie or series'}, status=400)
+    model, method, date_field, admin_url = TMDB_PREVIEW_TYPES[content_type]
+
+    service = TMDBService()
+    fetch = getattr(service, method)
+    en_data, az_data, existing = await asyncio.gather(
+        asyncio.to_thread(fetch, tmdb_id, 'en-US'),
+        asyncio.to_thread(fetch, tmdb_id, 'az-AZ'),
+        model.objects.filter(tmdb_id=tmdb_id).values('pk', 'title_uz').afirst(),
+    )
+    if not en_data:
+        return JsonResponse({'error': 'Not found in TMDB'}, status=404)
+
+    az_data = az_data or {}
+    release_date = en_data.get(date_field) or ''
+    poster_path = en_data.get('poster_path')
+    return JsonResponse({
+        'tmdb_id': tmdb_id,
+        'type': content_type,
+        'title': en_data.get('title') or en_data.get('name'),
+        'title_az': az_data.get('title') or az_data.get('name'),
+        'original_title': en_data.get('original_title') or en_data.get('original_name'),
+        'year': int(release_date[:4]) if release_date[:4].isdigit() else None,
+        'overview': az_data.get('overview') or en_data.get('overview'),
+        'poster_url': f"{TMDB_IMAGE_BASE_URL}/{TMDB_IMAGE_SIZES['poster']}{poster_path}" if poster_path else None,
+        'genres': [genre['name'] for genre in en_data.get('genres', [])],
+        'cast': [person['name'] for person in en_data.get('credits', {}).get('cast', [])[:5]],
+        'imported': existing and {
+            'id': existing['pk'],
+            'title_uz': existing['title_uz'],
+            'admin_url': reverse(admin_url, args=[existing['pk']]),
+        },
+    })
+
+
+@staff_member_required
+@require_http_methods(['GET', 'POST'])
+def tmdb_import_jobs(request):
+    """
+    GET — задания импорта текущего пользователя: активные и завершённые
+    за последний час (?type=movie|series). POST {"type", "ids"} — запуск
+    фонового импорта, ответ 202 с состоянием задания.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body or '{}')
+            content_type = data.get('type')
+            ids = [int(pk) for pk in data.get('ids', [])]
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'error': 'JSON body with type and ids required'}, status=400)
+        if content_type not in IMPORTERS or not ids:
+            return JsonResponse({'error': 'type must be movie or series, ids must not be empty'}, status=400)
+        job = start_import_job(content_type, ids, request.user)
+        return JsonResponse(job_payload(job), status=202)
+
+    fail_stale_jobs()
+    jobs = TMDBImportJob.objects.filter(created_by=request.user).filter(
+        Q(status__in=[TMDBImportJob.PENDING, TMDBImportJob.RUNNING])
+        | Q(finished_at__gte=timezone.now() - TMDB_JOB_RECENT)
+    )
+    if request.GET.get('type'):
+        jobs = jobs.filter(content_type=request.GET['type'])
+    return JsonResponse({'jobs': [job_payload(job) for job in jobs[:5]]})
+
+
+@staff_member_required
+def tmdb_import_job(request, job_id):
+    """Состояние одного задания импорта."""
+    try:
+        job = TMDBImportJob.objects.get(pk=job_id)
+    except TMDBImportJob.DoesNotExist:
+        return JsonResponse({'error': 'Job not found'}, status=404)
+    return JsonResponse(job_payload(job))
+
+
+@staff_member_required
+@require_http_methods(['POST'])
+def video_uploads(request):
+    """POST {"type": "movie"|"episode", "filename", "size", "object_id"?} — новая загрузка по частям (201)."""
+    try:
+        data = json.loads(request.body or '{}')
+        object_id = data.get('object_id')
+        upload = create_upload(
+            data.get('type'),
+            str(data.get('filename') or 'video.mp4'),
+            int(data.get('size') or 0),
+            object_id=int(object_id) if object_id not in (None, '') else None,
+            user=request.user,
+        )
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': 'JSON body with type, filename and size required'}, status=400)
+    except UploadError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    response = JsonResponse(upload_payload(upload), status=201)
+    response['Location'] = reverse('api_video_upload', args=[upload.pk])
+    response['Upload-Offset'] = str(upload.offset)
+    return response
+
+
+@staff_member_required
+@require_http_methods(['GET', 'HEAD', 'PATCH', 'DELETE'])
+def video_upload(request, upload_id):
+    """
+    GET/HEAD — принятое смещение (Upload-Offset), PATCH — очередная часть
+    (заголовки Upload-Offset и Upload-Checksum), DELETE — отмена.
+    """
+    try:
+        upload = VideoUpload.objects.get(pk=upload_id)
+    except VideoUpload.DoesNotExist:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+
+    if request.method == 'DELETE':
+        cancel_upload(upload)
+        return HttpResponse(status=204)
+
+    if request.method == 'PATCH':
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return JsonResponse({'error': 'Upload-Offset and Content-Length headers required'}, status=400)
+        try:
+            upload = write_chunk(upload, offset, length, request, request.headers.get('Upload-Checksum'))
+        except UploadError as e:
+            upload.refresh_from_db(fields=['offset'])
+            response = JsonResponse({'error': str(e), 'offset': upload.offset}, status=e.status, reason=e.reason)
+            response['Upload-Offset'] = str(upload.offset)
+            return response
+
+    response = JsonResponse(upload_payload(upload))
+    response['Upload-Offset'] = str(upload.offset)
+    response['Upload-Length'] = str(upload.size)
+    response['Cache-Control'] = 'no-store'
+    return response
+
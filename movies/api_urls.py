@@ -5,8 +5,11 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .api_views import (
     MovieViewSet, SeriesViewSet, CommentViewSet,
-    toggle_favorite, toggle_watchlist
+    toggle_favorite, toggle_watchlist, user_timeline, library_state,
+    library_item, library_batch, moderation_queue, search_suggest
 )
+from . import async_api_views
+from .admin_views import tmdb_preview, tmdb_import_jobs, tmdb_import_job, video_uploads, video_upload
 
 router = DefaultRouter()
 router.register('movies', MovieViewSet)
@@ -17,5 +20,22 @@ urlpatterns = [
     path('', include(router.urls)),
     path('favorites/toggle/', toggle_favorite, name='api_toggle_favorite'),
     path('watchlist/toggle/', toggle_watchlist, name='api_toggle_watchlist'),
+    path('timeline/', user_timeline, name='api_user_timeline'),
+    path('favorites/<str:content_type>/<int:content_id>/', library_item, {'relation': 'favorites'}, name='api_favorite_item'),
+    path('watchlist/<str:content_type>/<int:content_id>/', library_item, {'relation': 'watchlist'}, name='api_watchlist_item'),
+    path('library/', library_state, name='api_library_state'),
+    path('library/batch/', library_batch, name='api_library_batch'),
+    path('suggest/', search_suggest, name='api_suggest'),
+    # Асинхронные list/retrieve каталога (для ASGI)
+    path('catalog/movies/', async_api_views.movie_list, name='api_catalog_movies'),
+    path('catalog/movies/<int:pk>/', async_api_views.movie_detail, name='api_catalog_movie'),
+    path('catalog/series/', async_api_views.series_list, name='api_catalog_series'),
+    path('catalog/series/<int:pk>/', async_api_views.series_detail, name='api_catalog_series_detail'),
+    path('moderation/comments/', moderation_queue, name='api_moderation_queue'),
+    path('tmdb/preview/', tmdb_preview, name='api_tmdb_preview'),
+    path('tmdb/import-jobs/', tmdb_import_jobs, name='api_tmdb_import_jobs'),
+    path('tmdb/import-jobs/<int:job_id>/', tmdb_import_job, name='api_tmdb_import_job'),
+    path('uploads/', video_uploads, name='api_video_uploads'),
+    path('uploads/<int:upload_id>/', video_upload, name='api_video_upload'),
 ]
 
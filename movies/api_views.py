@@ -2,16 +2,57 @@
 API Views for movies app.
 """
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
 from .models import Movie, Series, Rating, Comment
 from .serializers import (
-    MovieListSerializer, SeriesListSerializer,
-    RatingSerializer, CommentSerializer
+    MovieListSerializer, SeriesListSerializer, CatalogMovieSerializer, CatalogSeriesSerializer,
+    RatingSerializer, CommentSerializer, UserActivitySerializer, SuggestionSerializer
 )
+from .comment_threads import load_threads, attach_replies
+from .catalog import catalog_entries
+from .facets import compute_facets
+from .catalog_index import filtered_catalog
+from .suggest import suggest, SUGGEST_LIMIT, SUGGEST_MAX_LIMIT
+from .filters import MovieFilter, SeriesFilter
+from . import moderation
 from users.models import UserActivity
+from users.timeline_service import resolve_activities
+from users.library_service import (
+    CONTENT_MODELS, get_library_state, add_to_library, remove_from_library,
+    toggle_in_library, apply_library_batch
+)
+
+
+CATALOG_ORDERING_FIELDS = ['title_uz', 'year', 'rating_avg', 'rating_count', 'views', 'created_at']
+
+
+def catalog_list(viewset, content_type, serializer_class, filterset_class):
+    """
+    Список из витрины каталога: одна узкая таблица без JOIN и prefetch.
+    Принимает те же фильтры, что и страницы каталога, и отдаёт счётчики фасетов.
+    """
+    params = viewset.request.query_params
+    filterset = filterset_class(params, queryset=catalog_entries(content_type))
+    if params.get('ordering'):
+        queryset = viewset.filter_queryset(filterset.qs)
+    else:
+        # Порядок по умолчанию (-created_at) совпадает с порядком индекса в памяти
+        queryset = filtered_catalog(filterset, content_type)
+    facets = compute_facets(filterset_class, params, content_type)
+
+    page = viewset.paginate_queryset(queryset)
+    if page is not None:
+        serializer = serializer_class(page, many=True, context=viewset.get_serializer_context())
+        response = viewset.get_paginated_response(serializer.data)
+        response.data['facets'] = facets
+        return response
+    serializer = serializer_class(queryset, many=True, context=viewset.get_serializer_context())
+    return Response({'results': serializer.data, 'facets': facets})
 
 
 class MovieViewSet(viewsets.ReadOnlyModelViewSet):
@@ -19,6 +60,10 @@ class MovieViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Movie.objects.filter(is_published=True)
     serializer_class = MovieListSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    ordering_fields = CATALOG_ORDERING_FIELDS
+
+    def list(self, request, *args, **kwargs):
+        return catalog_list(self, 'movie', CatalogMovieSerializer, MovieFilter)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def rate(self, request, pk=None):
@@ -72,6 +117,10 @@ class SeriesViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Series.objects.filter(is_published=True)
     serializer_class = SeriesListSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    ordering_fields = CATALOG_ORDERING_FIELDS
+
+    def list(self, request, *args, **kwargs):
+        return catalog_list(self, 'series', CatalogSeriesSerializer, SeriesFilter)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def rate(self, request, pk=None):
@@ -120,24 +169,41 @@ class SeriesViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'rating': None})
 
 
+def attach_missing_replies(comments):
+    """Догружает ответы одним запросом, если ветки ещё не собраны."""
+    pending = [comment for comment in comments if not hasattr(comment, 'thread_replies')]
+    if pending:
+        attach_replies(pending)
+    return comments
+
+
 class CommentViewSet(viewsets.ModelViewSet):
     """API для комментариев."""
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     
     def get_queryset(self):
-        queryset = Comment.objects.filter(is_approved=True)
+        return Comment.objects.filter(is_approved=True).select_related('user')
+    
+    def list(self, request, *args, **kwargs):
+        # Фильтрация по контенту: все ветки одним запросом, страницы по корневым комментариям
+        content_type = request.query_params.get('content_type')
+        content_id = request.query_params.get('content_id', '')
         
-        # Фильтрация по контенту
-        content_type = self.request.query_params.get('content_type')
-        content_id = self.request.query_params.get('content_id')
+        if content_type in ('movie', 'series') and content_id.isdigit():
+            comments = load_threads(content_type, int(content_id))
+        else:
+            comments = self.filter_queryset(self.get_queryset())
         
-        if content_type == 'movie' and content_id:
-            queryset = queryset.filter(movie_id=content_id, parent__isnull=True)
-        elif content_type == 'series' and content_id:
-            queryset = queryset.filter(series_id=content_id, parent__isnull=True)
+        page = self.paginate_queryset(comments)
+        if page is not None:
+            attach_missing_replies(page)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         
-        return queryset.select_related('user').prefetch_related('children')
+        comments = attach_missing_replies(list(comments))
+        serializer = self.get_serializer(comments, many=True)
+        return Response(serializer.data)
     
     def perform_create(self, serializer):
         comment = serializer.save(user=self.request.user)
@@ -154,60 +220,156 @@ class CommentViewSet(viewsets.ModelViewSet):
             )
 
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def toggle_favorite(request):
-    """Переключение избранного."""
+LIBRARY_FLAGS = {
+    'favorites': 'is_favorite',
+    'watchlist': 'in_watchlist',
+}
+
+LIBRARY_BATCH_LIMIT = 500
+
+
+def _toggle_library(request, relation):
+    """Общая логика устаревших toggle-эндпоинтов."""
     content_type = request.data.get('content_type')
     content_id = request.data.get('content_id')
-    
-    if content_type == 'movie':
-        movie = get_object_or_404(Movie, id=content_id)
-        if request.user.profile.favorite_movies.filter(id=movie.id).exists():
-            request.user.profile.favorite_movies.remove(movie)
-            is_favorite = False
-        else:
-            request.user.profile.favorite_movies.add(movie)
-            is_favorite = True
-    elif content_type == 'series':
-        series = get_object_or_404(Series, id=content_id)
-        if request.user.profile.favorite_series.filter(id=series.id).exists():
-            request.user.profile.favorite_series.remove(series)
-            is_favorite = False
-        else:
-            request.user.profile.favorite_series.add(series)
-            is_favorite = True
-    else:
+
+    if content_type not in CONTENT_MODELS:
         return Response({'error': 'Invalid content type'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    return Response({'is_favorite': is_favorite})
+
+    content = get_object_or_404(CONTENT_MODELS[content_type], id=content_id)
+    added = toggle_in_library(request.user.profile, relation, content_type, content.id)
+    return Response({LIBRARY_FLAGS[relation]: added})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def toggle_favorite(request):
+    """Переключение избранного (устарело, используйте PUT/DELETE)."""
+    return _toggle_library(request, 'favorites')
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def toggle_watchlist(request):
-    """Переключение списка к просмотру."""
-    content_type = request.data.get('content_type')
-    content_id = request.data.get('content_id')
-    
-    if content_type == 'movie':
-        movie = get_object_or_404(Movie, id=content_id)
-        if request.user.profile.watchlist_movies.filter(id=movie.id).exists():
-            request.user.profile.watchlist_movies.remove(movie)
-            in_watchlist = False
-        else:
-            request.user.profile.watchlist_movies.add(movie)
-            in_watchlist = True
-    elif content_type == 'series':
-        series = get_object_or_404(Series, id=content_id)
-        if request.user.profile.watchlist_series.filter(id=series.id).exists():
-            request.user.profile.watchlist_series.remove(series)
-            in_watchlist = False
-        else:
-            request.user.profile.watchlist_series.add(series)
-            in_watchlist = True
-    else:
+    """Переключение списка к просмотру (устарело, используйте PUT/DELETE)."""
+    return _toggle_library(request, 'watchlist')
+
+
+@api_view(['PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def library_item(request, relation, content_type, content_id):
+    """
+    Идемпотентное добавление (PUT) и удаление (DELETE) элемента
+    избранного или списка к просмотру.
+    """
+    if content_type not in CONTENT_MODELS:
         return Response({'error': 'Invalid content type'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    return Response({'in_watchlist': in_watchlist})
 
+    profile = request.user.profile
+    if request.method == 'PUT':
+        if not CONTENT_MODELS[content_type].objects.filter(pk=content_id, is_published=True).exists():
+            return Response({'error': 'Content not found'}, status=status.HTTP_404_NOT_FOUND)
+        version = add_to_library(profile, relation, content_type, [content_id])
+        present = True
+    else:
+        version = remove_from_library(profile, relation, content_type, [content_id])
+        present = False
+
+    return Response({LIBRARY_FLAGS[relation]: present, 'version': version})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def library_batch(request):
+    """
+    Пакетная синхронизация избранного и списка к просмотру.
+    Тело: {"operations": [{"list": "favorites", "op": "add", "content_type": "movie", "content_id": 1}, ...]}
+    """
+    operations = request.data.get('operations')
+    if not isinstance(operations, list) or not all(isinstance(op, dict) for op in operations):
+        return Response({'error': 'operations must be a list of objects'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(operations) > LIBRARY_BATCH_LIMIT:
+        return Response(
+            {'error': f'Too many operations (max {LIBRARY_BATCH_LIMIT})'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    applied, rejected = apply_library_batch(request.user.profile, operations)
+    return Response({
+        'applied': applied,
+        'rejected': rejected,
+        'library': get_library_state(request.user).to_dict(),
+    })
+
+
+SUGGEST_TYPES = {'movie', 'series', 'person', 'genre'}
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def search_suggest(request):
+    """
+    Подсказки для строки поиска: ?q=<префикс>&limit=10&type=movie,series,person,genre.
+    Отдаются из префиксного индекса в памяти, без запросов к БД.
+    """
+    query = request.query_params.get('q', '')
+    try:
+        limit = min(max(int(request.query_params.get('limit', SUGGEST_LIMIT)), 1), SUGGEST_MAX_LIMIT)
+    except ValueError:
+        limit = SUGGEST_LIMIT
+    kinds = {kind for kind in request.query_params.get('type', '').split(',') if kind in SUGGEST_TYPES}
+
+    items = suggest(query, limit, kinds or None)
+    response = Response({
+        'query': query,
+        'results': SuggestionSerializer(items, many=True, context={'request': request}).data,
+    })
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def user_timeline(request):
+    """Лента активности текущего пользователя."""
+    queryset = UserActivity.objects.filter(user=request.user).order_by('-created_at')
+    paginator = PageNumberPagination()
+    page = resolve_activities(paginator.paginate_queryset(queryset, request))
+    serializer = UserActivitySerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def library_state(request):
+    """Избранное, список к просмотру и оценки пользователя одним ответом."""
+    return Response(get_library_state(request.user).to_dict())
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAdminUser])
+def moderation_queue(request):
+    """
+    Очередь модерации комментариев.
+    GET — страница ожидающих комментариев, POST {"approve": [id...], "reject": [id...]}
+    применяет решения (одним UPDATE на каждое действие).
+    """
+    if request.method == 'GET':
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(moderation.pending_comments(), request)
+        for comment in page:
+            # Ответы в очереди не нужны, не догружаем их
+            comment.thread_replies = []
+        serializer = CommentSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+    approve_ids = request.data.get('approve', [])
+    reject_ids = request.data.get('reject', [])
+    if not all(isinstance(ids, list) and all(isinstance(i, int) for i in ids) for ids in (approve_ids, reject_ids)):
+        return Response({'error': 'approve and reject must be lists of ids'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'approved': moderation.approve_comments(approve_ids) if approve_ids else 0,
+        'rejected': moderation.reject_comments(reject_ids) if reject_ids else 0,
+    })
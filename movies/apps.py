@@ -5,7 +5,12 @@ class MoviesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'movies'
     
-    # def ready(self):
-    #     import movies.signals  # Подключаем сигналы (ОТКЛЮЧЕНО)
     verbose_name = 'Фильмы и Сериалы'
 
+    def ready(self):
+        # import movies.signals  # Подключаем сигналы (ОТКЛЮЧЕНО)
+        import movies.image_derivatives  # Генерация адаптивных изображений
+        import movies.catalog  # Инкрементальное обновление витрины каталога
+        import movies.catalog_index  # Инвертированный индекс фильтров каталога
+        import movies.video_processing  # Метаданные и faststart загруженных видео
+
@@ -0,0 +1,107 @@
+"""
+Асинхронные read-only эндпоинты каталога (список и карточка).
+
+Те же данные и формат ответа, что у MovieViewSet/SeriesViewSet
+(list/retrieve), но без DRF: представления асинхронные и под ASGI не
+занимают поток на время запросов к БД. Валидация фильтров и фасеты
+считаются в потоке (формы и кэш синхронные), страница витрины и карточка
+читаются через асинхронный ORM.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, HttpResponseNotAllowed
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+from .models import Movie, Series
+from .serializers import (
+    MovieListSerializer, SeriesListSerializer, CatalogMovieSerializer, CatalogSeriesSerializer
+)
+from .catalog import catalog_entries
+from .catalog_index import filtered_catalog, IndexedResult
+from .facets import compute_facets
+from .filters import MovieFilter, SeriesFilter
+from .api_views import CATALOG_ORDERING_FIELDS
+
+
+def _ordering(params):
+    """Поля сортировки из ?ordering= (как OrderingFilter DRF: неизвестные поля отбрасываются)."""
+    fields = [field.strip() for field in params.get('ordering', '').split(',')]
+    return [field for field in fields if field.lstrip('-') in CATALOG_ORDERING_FIELDS]
+
+
+def _prepare_list(params, content_type, filterset_class):
+    filterset = filterset_class(params, queryset=catalog_entries(content_type))
+    ordering = _ordering(params)
+    if ordering:
+        result = filterset.qs.order_by(*ordering)
+    else:
+        result = filtered_catalog(filterset, content_type)
+    return result, compute_facets(filterset_class, params, content_type)
+
+
+def _page_url(request, number, last):
+    url = request.build_absolute_uri()
+    if number < 1 or number > last:
+        return None
+    if number == 1:
+        return remove_query_param(url, 'page')
+    return replace_query_param(url, 'page', number)
+
+
+async def _catalog_list(request, content_type, serializer_class, filterset_class):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    result, facets = await sync_to_async(_prepare_list)(request.GET, content_type, filterset_class)
+
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    try:
+        number = int(request.GET.get('page') or 1)
+    except ValueError:
+        number = 0
+    if isinstance(result, IndexedResult):
+        count = result.count()
+    else:
+        count = await result.acount()
+    last = max((count + page_size - 1) // page_size, 1)
+    if not 1 <= number <= last:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+
+    start = (number - 1) * page_size
+    if isinstance(result, IndexedResult):
+        page = await result.aslice(start, start + page_size)
+    else:
+        page = [entry async for entry in result[start:start + page_size]]
+
+    return JsonResponse({
+        'count': count,
+        'next': _page_url(request, number + 1, last),
+        'previous': _page_url(request, number - 1, last),
+        'results': serializer_class(page, many=True, context={'request': request}).data,
+        'facets': facets,
+    })
+
+
+async def _content_detail(request, model, serializer_class, pk):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    queryset = model.objects.filter(is_published=True).prefetch_related('genres')
+    try:
+        content = await queryset.aget(pk=pk)
+    except model.DoesNotExist:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    return JsonResponse(serializer_class(content, context={'request': request}).data)
+
+
+async def movie_list(request):
+    return await _catalog_list(request, 'movie', CatalogMovieSerializer, MovieFilter)
+
+
+async def series_list(request):
+    return await _catalog_list(request, 'series', CatalogSeriesSerializer, SeriesFilter)
+
+
+async def movie_detail(request, pk):
+    return await _content_detail(request, Movie, MovieListSerializer, pk)
+
+
+async def series_detail(request, pk):
+    return await _content_detail(request, Series, SeriesListSerializer, pk)
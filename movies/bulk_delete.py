@@ -0,0 +1,200 @@
+"""
+Массовое удаление контента (команда clear_content).
+
+QuerySet.delete() сначала собирает в память все связанные объекты и
+отправляет pre/post_delete на каждый из них (django_cleanup, производные
+изображений, витрина, карта сайта), поэтому на большом каталоге он
+съедает память и работает часами. Здесь строки удаляются пачками по pk
+сырыми DELETE (_raw_delete):
+
+- каскад повторяет on_delete связей: CASCADE — рекурсивно теми же
+  пачками, SET_NULL — UPDATE, строки M2M-таблиц удаляются по id пачки;
+- имена файлов из FileField/ImageField пачки ставятся в очередь
+  PendingFileDeletion в той же транзакции, а сами файлы удаляются потом
+  (delete_queued_files) параллельно и только если на них больше никто
+  не ссылается;
+- вместо сигналов удаляются строки витрины и состояния перевода, а
+  версия витрины и карта сайта обновляются один раз в конце (finish).
+"""
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models, transaction
+from .models import CatalogEntry, TranslationState, PendingFileDeletion
+from .catalog import MODEL_CONTENT_TYPES, bump_catalog_version
+from .image_derivatives import IMAGE_FIELDS, delete_derivatives
+from core.sitemap_shards import build_all
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+
+
+def estimated_rows(model):
+    """Число строк по статистике PostgreSQL (pg_class.reltuples) без COUNT(*); иначе — точный count()."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 — таблица ещё не анализировалась
+        if row and row[0] >= 0:
+            return row[0]
+    return model._base_manager.count()
+
+
+def _file_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+
+
+class ChunkedDeleter:
+    def __init__(self, batch_size=BATCH_SIZE, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress or (lambda model, deleted: None)
+        self.deleted = Counter()
+        self.files_queued = 0
+
+    def delete_all(self, model):
+        """Удаляет все строки модели пачками по pk; возвращает число удалённых строк."""
+        last_pk = None
+        before = self.deleted[model._meta.label]
+        while True:
+            queryset = model._base_manager.order_by('pk')
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            pks = list(queryset.values_list('pk', flat=True)[:self.batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                self.delete_batch(model, pks)
+            last_pk = pks[-1]
+            self.progress(model, self.deleted[model._meta.label] - before)
+        return self.deleted[model._meta.label] - before
+
+    def delete_batch(self, model, pks):
+        """Удаляет строки с pk из pks вместе с зависимыми (внутри транзакции вызывающего)."""
+        for relation in model._meta.related_objects:
+            if relation.many_to_many:
+                # Обратная M2M: строки промежуточной таблицы чужой модели
+                field = relation.field
+                rows = field.remote_field.through._base_manager.filter(**{f'{field.m2m_reverse_field_name()}__in': pks})
+                rows._raw_delete(rows.db)
+                continue
+            self._delete_dependents(relation, pks)
+
+        for field in model._meta.many_to_many:
+            rows = field.remote_field.through._base_manager.filter(**{f'{field.m2m_field_name()}__in': pks})
+            rows._raw_delete(rows.db)
+
+        self._queue_files(model, pks)
+        if model in MODEL_CONTENT_TYPES:
+            entries = CatalogEntry.objects.filter(content_type=MODEL_CONTENT_TYPES[model], content_id__in=pks)
+            entries._raw_delete(entries.db)
+        states = TranslationState.objects.filter(model=model._meta.label_lower, object_id__in=pks)
+        states._raw_delete(states.db)
+
+        queryset = model._base_manager.filter(pk__in=pks)
+        self.deleted[model._meta.label] += queryset._raw_delete(queryset.db)
+
+    def _delete_dependents(self, relation, pks):
+        field = relation.field
+        related_model = relation.related_model
+        dependents = related_model._base_manager.filter(**{f'{field.name}__in': pks})
+        on_delete = field.remote_field.on_delete
+        if on_delete is models.DO_NOTHING:
+            return
+        if on_delete is models.SET_NULL:
+            dependents.update(**{field.name: None})
+            return
+        if on_delete is not models.CASCADE:
+            raise models.ProtectedError(
+                f'{related_model._meta.label}.{field.name} не даёт удалить {field.remote_field.model._meta.label}',
+                set()
+            )
+        # Ссылки на себя (ответы на комментарии) уже входят в удаляемую пачку
+        if related_model is field.remote_field.model:
+            dependents = dependents.exclude(pk__in=pks)
+        child_pks = list(dependents.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(child_pks), self.batch_size):
+            self.delete_batch(related_model, child_pks[start:start + self.batch_size])
+
+    def _queue_files(self, model, pks):
+        fields = _file_fields(model)
+        if not fields:
+            return
+        label = model._meta.label
+        rows = model._base_manager.filter(pk__in=pks).values_list(*(field.name for field in fields))
+        queued = [
+            PendingFileDeletion(model=label, field=field.name, name=name)
+            for row in rows.iterator()
+            for field, name in zip(fields, row) if name
+        ]
+        PendingFileDeletion.objects.bulk_create(queued)
+        self.files_queued += len(queued)
+
+    def finish(self):
+        """Обновления, которые при обычном delete() делали бы сигналы, — один раз на всё удаление."""
+        bump_catalog_version()
+        build_all()
+
+
+def _delete_file(path, name, kind):
+    """Удаляет файл и его производные изображения; возвращает число освобождённых байт."""
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+    except FileNotFoundError:
+        size = 0
+    if kind:
+        delete_derivatives(name, kind)
+    return size
+
+
+def referenced_names(names):
+    """Имена из names, на которые ещё ссылается хотя бы одно файловое поле."""
+    referenced = set()
+    for model in apps.get_models():
+        for field in _file_fields(model):
+            referenced.update(
+                model._base_manager.filter(**{f'{field.name}__in': names}).values_list(field.name, flat=True)
+            )
+    return referenced
+
+
+def delete_queued_files(workers=None, batch_size=BATCH_SIZE, progress=None):
+    """
+    Удаляет файлы из очереди PendingFileDeletion в пуле потоков. Файлы, на
+    которые снова ссылается какая-то строка (одинаковые изображения хранятся
+    один раз), остаются на месте. Возвращает (удалено файлов, освобождено байт).
+    """
+    workers = workers or getattr(settings, 'MEDIA_DELETE_WORKERS', 8)
+    deleted_files = reclaimed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media-delete') as pool:
+        while True:
+            queued = list(PendingFileDeletion.objects.order_by('pk')[:batch_size])
+            if not queued:
+                break
+            referenced = referenced_names({entry.name for entry in queued})
+            tasks = {}
+            for entry in queued:
+                if entry.name in referenced or entry.name in tasks:
+                    continue
+                try:
+                    model = apps.get_model(entry.model)
+                    storage = model._meta.get_field(entry.field).storage
+                except (LookupError, ValueError):
+                    logger.warning(f"Файл '{entry.name}': поле {entry.model}.{entry.field} больше не существует")
+                    continue
+                kind = IMAGE_FIELDS.get(model, {}).get(entry.field)
+                tasks[entry.name] = (storage.path(entry.name), entry.name, kind)
+
+            sizes = list(pool.map(lambda task: _delete_file(*task), tasks.values()))
+            deleted_files += sum(1 for size in sizes if size)
+            reclaimed += sum(sizes)
+            done = PendingFileDeletion.objects.filter(pk__in=[entry.pk for entry in queued])
+            done._raw_delete(done.db)
+            if progress:
+                progress(deleted_files, reclaimed)
+    return deleted_files, reclaimed
@@ -0,0 +1,227 @@
+"""
+Витрина каталога (CatalogEntry).
+
+Списки фильмов/сериалов, жанров, главная и API читают одну таблицу
+catalog, где жанры, страны, постер и ключи сортировки уже лежат в строке.
+Витрина обновляется инкрементально после коммита:
+
+- сохранение фильма/сериала перестраивает его строку (1 запрос + 2 prefetch + upsert);
+- счётчики (просмотры, рейтинг) обновляются одним узким UPDATE;
+- изменение жанров/стран фильма и переименование жанра/страны
+  перестраивают только затронутые строки.
+"""
+import time
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from .models import Movie, Series, Genre, Country, CatalogEntry, CatalogVersion
+
+CONTENT_MODELS = {
+    'movie': Movie,
+    'series': Series,
+}
+
+MODEL_CONTENT_TYPES = {model: content_type for content_type, model in CONTENT_MODELS.items()}
+
+# through-таблица -> (тип контента, имя связи)
+THROUGH_RELATIONS = {
+    Movie.genres.through: ('movie', 'genres'),
+    Movie.countries.through: ('movie', 'countries'),
+    Series.genres.through: ('series', 'genres'),
+    Series.countries.through: ('series', 'countries'),
+}
+
+RELATION_NAMES = {
+    Genre: 'genres',
+    Country: 'countries',
+}
+
+# Поля, которые обновляются без перестройки строки
+COUNTER_FIELDS = {'views', 'rating_avg', 'rating_count'}
+
+ENTRY_FIELDS = [
+    'slug', 'title_uz', 'title_az', 'original_title', 'poster', 'year', 'kind', 'status',
+    'genre_ids', 'genres', 'country_ids', 'country_codes',
+    'rating_avg', 'rating_count', 'views', 'is_featured', 'created_at', 'search_key',
+]
+
+REFRESH_BATCH_SIZE = 500
+
+# Версия витрины, прочитанная из БД, и когда её перечитать (time.monotonic)
+_version = (None, 0.0)
+
+
+def catalog_version():
+    """
+    Версия витрины: меняется при любом изменении состава или связей записей.
+    Общая для всех процессов (строка CatalogVersion), в процессе
+    запоминается на CATALOG_VERSION_TTL секунд.
+    """
+    global _version
+    version, expires = _version
+    now = time.monotonic()
+    if version is None or now >= expires:
+        version = CatalogVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+        if version is None:
+            # Начальная версия из времени, чтобы не совпасть с версией до очистки таблицы
+            version = CatalogVersion.objects.get_or_create(pk=1, defaults={'version': int(time.time() * 1000)})[0].version
+        _version = (version, now + getattr(settings, 'CATALOG_VERSION_TTL', 2))
+    return version
+
+
+def bump_catalog_version():
+    """Увеличивает общую версию; внутри транзакции новая версия видна другим после коммита."""
+    global _version
+    if not CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        CatalogVersion.objects.get_or_create(pk=1, defaults={'version': int(time.time() * 1000)})
+    # Этот процесс перечитает версию при следующем обращении
+    _version = (None, 0.0)
+
+
+def catalog_entries(content_type=None):
+    """Записи витрины (только опубликованный контент)."""
+    queryset = CatalogEntry.objects.all()
+    if content_type:
+        queryset = queryset.filter(content_type=content_type)
+    return queryset
+
+
+def build_entry(content_type, obj):
+    """CatalogEntry из объекта с предзагруженными genres и countries."""
+    genres = sorted(obj.genres.all(), key=lambda genre: genre.pk)
+    countries = sorted(obj.countries.all(), key=lambda country: country.pk)
+    return CatalogEntry(
+        content_type=content_type,
+        content_id=obj.pk,
+        slug=obj.slug,
+        title_uz=obj.title_uz,
+        title_az=obj.title_az,
+        original_title=obj.original_title,
+        poster=obj.poster.name if obj.poster else '',
+        year=obj.year,
+        kind=obj.content_type if content_type == 'movie' else '',
+        status=getattr(obj, 'status', ''),
+        genre_ids=[genre.pk for genre in genres],
+        genres=[
+            {'id': genre.pk, 'slug': genre.slug, 'name_uz': genre.name_uz, 'name_az': genre.name_az}
+            for genre in genres
+        ],
+        country_ids=[country.pk for country in countries],
+        country_codes=[country.code for country in countries],
+        rating_avg=obj.rating_avg,
+        rating_count=obj.rating_count,
+        views=obj.views,
+        is_featured=obj.is_featured,
+        created_at=obj.created_at,
+        search_key=obj.search_key,
+    )
+
+
+def refresh_entries(content_type, ids):
+    """
+    Перестраивает строки витрины для указанных id одним upsert.
+    Неопубликованный или удалённый контент из витрины убирается.
+    """
+    ids = list(ids)
+    model = CONTENT_MODELS[content_type]
+    for start in range(0, len(ids), REFRESH_BATCH_SIZE):
+        batch = ids[start:start + REFRESH_BATCH_SIZE]
+        objects = list(
+            model.objects.filter(pk__in=batch, is_published=True).prefetch_related('genres', 'countries')
+        )
+        entries = [build_entry(content_type, obj) for obj in objects]
+        with transaction.atomic():
+            CatalogEntry.objects.filter(content_type=content_type, content_id__in=batch).exclude(
+                content_id__in=[obj.pk for obj in objects]
+            ).delete()
+            if entries:
+                CatalogEntry.objects.bulk_create(
+                    entries,
+                    update_conflicts=True,
+                    unique_fields=['content_type', 'content_id'],
+                    update_fields=ENTRY_FIELDS,
+                )
+    bump_catalog_version()
+
+
+def rebuild_catalog():
+    """Полная перестройка витрины. Возвращает число записей."""
+    for content_type, model in CONTENT_MODELS.items():
+        ids = list(model.objects.filter(is_published=True).values_list('pk', flat=True))
+        with transaction.atomic():
+            CatalogEntry.objects.filter(content_type=content_type).exclude(content_id__in=ids).delete()
+            refresh_entries(content_type, ids)
+    return CatalogEntry.objects.count()
+
+
+def schedule_refresh(content_type, ids):
+    ids = list(ids)
+    if ids:
+        transaction.on_commit(lambda: refresh_entries(content_type, ids))
+
+
+def _refresh_by_relation(relation, related_ids):
+    """Перестраивает строки контента, связанного с жанрами/странами."""
+    for content_type, model in CONTENT_MODELS.items():
+        ids = model.objects.filter(**{f'{relation}__in': related_ids}).values_list('pk', flat=True).distinct()
+        schedule_refresh(content_type, ids)
+
+
+def content_saved(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    content_type = MODEL_CONTENT_TYPES[sender]
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        # Просмотры и рейтинг меняются часто: обновляем только счётчики
+        values = {field: getattr(instance, field) for field in update_fields}
+        transaction.on_commit(
+            lambda: CatalogEntry.objects.filter(content_type=content_type, content_id=instance.pk).update(**values)
+        )
+        return
+    schedule_refresh(content_type, [instance.pk])
+
+
+def content_deleted(sender, instance, **kwargs):
+    CatalogEntry.objects.filter(content_type=MODEL_CONTENT_TYPES[sender], content_id=instance.pk).delete()
+    transaction.on_commit(bump_catalog_version)
+
+
+def content_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    content_type, relation = THROUGH_RELATIONS[sender]
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule_refresh(content_type, [instance.pk])
+        return
+
+    # Со стороны жанра/страны (genre.movie_set.add(...)): pk_set — id контента
+    if action == 'pre_clear':
+        schedule_refresh(
+            content_type,
+            CONTENT_MODELS[content_type].objects.filter(**{relation: instance}).values_list('pk', flat=True)
+        )
+    elif action in ('post_add', 'post_remove') and pk_set:
+        schedule_refresh(content_type, pk_set)
+
+
+def relation_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    _refresh_by_relation(RELATION_NAMES[sender], [instance.pk])
+
+
+def relation_deleted(sender, instance, **kwargs):
+    # Связи удаляются каскадом без m2m_changed: id контента берём до удаления
+    _refresh_by_relation(RELATION_NAMES[sender], [instance.pk])
+
+
+for _model in CONTENT_MODELS.values():
+    post_save.connect(content_saved, sender=_model, dispatch_uid=f'catalog_save_{_model.__name__}')
+    post_delete.connect(content_deleted, sender=_model, dispatch_uid=f'catalog_delete_{_model.__name__}')
+
+for _through in THROUGH_RELATIONS:
+    m2m_changed.connect(content_relations_changed, sender=_through, dispatch_uid=f'catalog_m2m_{_through.__name__}')
+
+for _model in RELATION_NAMES:
+    post_save.connect(relation_saved, sender=_model, dispatch_uid=f'catalog_relation_save_{_model.__name__}')
+    pre_delete.connect(relation_deleted, sender=_model, dispatch_uid=f'catalog_relation_delete_{_model.__name__}')
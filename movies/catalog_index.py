@@ -0,0 +1,290 @@
+"""
+Инвертированный индекс каталога в памяти процесса.
+
+Каталог (десятки тысяч тайтлов) целиком помещается в память, поэтому
+комбинации фильтров жанр + страна + годы + актёр считаются пересечением
+битовых множеств, а из БД читается только итоговая страница id.
+
+- Позиция бита — номер записи в порядке -created_at, поэтому первые
+  установленные биты результата и есть первая страница списка.
+- Жанры, страны, годы, тип и статус — плотные битмапы (int Python).
+- Персоны (актёры и режиссёры) — разреженные отсортированные списки
+  позиций, как контейнеры roaring: битмап собирается только для
+  найденных по имени персон.
+
+Индекс строится лениво и перестраивается, когда меняется версия витрины
+(catalog_version), т.е. после изменения состава каталога или его связей.
+Версия хранится в БД, поэтому изменения из других воркеров и команд
+попадают в индекс не позже чем через CATALOG_VERSION_TTL секунд.
+"""
+import bisect
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from .catalog import catalog_entries, catalog_version, bump_catalog_version, CONTENT_MODELS
+from .models import Person
+from .search_keys import fold
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+class ContentIndex:
+    """Битовые индексы одного типа контента (фильмы или сериалы)."""
+
+    def __init__(self, content_type, version):
+        self.content_type = content_type
+        self.version = version
+        self.ids = []
+        self.titles = []
+        self.all = 0
+        self.genres = {}
+        self.countries = {}
+        self.years = {}
+        self.sorted_years = []
+        self.kinds = {}
+        self.statuses = {}
+        self.persons = {}
+        self.person_names = {}
+
+    def build(self):
+        started = time.monotonic()
+        rows = catalog_entries(self.content_type).order_by('-created_at', '-content_id').values_list(
+            'content_id', 'search_key', 'year', 'genre_ids', 'country_ids', 'kind', 'status'
+        )
+        positions = {}
+        genres, countries, years, kinds, statuses = {}, {}, {}, {}, {}
+        for position, (content_id, key, year, genre_ids, country_ids, kind, status) in enumerate(rows.iterator()):
+            positions[content_id] = position
+            self.ids.append(content_id)
+            self.titles.append(key)
+            for genre_id in genre_ids:
+                genres.setdefault(genre_id, []).append(position)
+            for country_id in country_ids:
+                countries.setdefault(country_id, []).append(position)
+            if year is not None:
+                years.setdefault(year, []).append(position)
+            kinds.setdefault(kind, []).append(position)
+            statuses.setdefault(status, []).append(position)
+
+        # Битмапы собираются один раз из списков позиций
+        self.genres = {key: self._bitmap(found) for key, found in genres.items()}
+        self.countries = {key: self._bitmap(found) for key, found in countries.items()}
+        self.years = {key: self._bitmap(found) for key, found in years.items()}
+        self.kinds = {key: self._bitmap(found) for key, found in kinds.items()}
+        self.statuses = {key: self._bitmap(found) for key, found in statuses.items()}
+        self.all = (1 << len(self.ids)) - 1
+        self.sorted_years = sorted(self.years)
+
+        model = CONTENT_MODELS[self.content_type]
+        field = f'{self.content_type}_id'
+        postings = {}
+        for through in (model.actors.through, model.directors.through):
+            for content_id, person_id in through.objects.values_list(field, 'person_id').iterator():
+                position = positions.get(content_id)
+                if position is not None:
+                    postings.setdefault(person_id, set()).add(position)
+        self.persons = {person_id: sorted(found) for person_id, found in postings.items()}
+        self.person_names = dict(
+            Person.objects.filter(pk__in=list(self.persons)).values_list('pk', 'search_key').iterator()
+        )
+
+        logger.info(
+            f"Индекс каталога '{self.content_type}' построен: {len(self.ids)} записей "
+            f"за {(time.monotonic() - started) * 1000:.0f} мс."
+        )
+        return self
+
+    # --- Операции над битмапами ---
+
+    def _bitmap(self, positions):
+        """
+        Битмап из позиций за один проход по bytearray: побитовое ИЛИ с int
+        размером с каталог на каждую позицию было бы квадратичным.
+        """
+        buffer = bytearray((len(self.ids) + 7) // 8)
+        for position in positions:
+            buffer[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(buffer, 'little')
+
+    def _any_of(self, mapping, keys):
+        bits = 0
+        for key in keys:
+            bits |= mapping.get(key, 0)
+        return bits
+
+    def _year_range(self, year_from, year_to):
+        low = 0 if year_from is None else bisect.bisect_left(self.sorted_years, year_from)
+        high = len(self.sorted_years) if year_to is None else bisect.bisect_right(self.sorted_years, year_to)
+        bits = 0
+        for year in self.sorted_years[low:high]:
+            bits |= self.years[year]
+        return bits
+
+    def _persons_matching(self, query):
+        query = fold(query)
+        return self._bitmap(
+            position
+            for person_id, name in self.person_names.items() if query in name
+            for position in self.persons[person_id]
+        )
+
+    def _titles_matching(self, query):
+        query = fold(query)
+        return self._bitmap(position for position, title in enumerate(self.titles) if query in title)
+
+    def filter(self, genres=(), countries=(), year_from=None, year_to=None, actors='', kind='', status='', title=''):
+        """Битмап записей, удовлетворяющих всем фильтрам (внутри фасета — ИЛИ)."""
+        bits = self.all
+        if genres:
+            bits &= self._any_of(self.genres, genres)
+        if countries:
+            bits &= self._any_of(self.countries, countries)
+        if year_from is not None or year_to is not None:
+            bits &= self._year_range(year_from, year_to)
+        if kind:
+            bits &= self.kinds.get(kind, 0)
+        if status:
+            bits &= self.statuses.get(status, 0)
+        if bits and title:
+            bits &= self._titles_matching(title)
+        if bits and actors:
+            bits &= self._persons_matching(actors)
+        return bits
+
+    def page_ids(self, bits, offset, limit):
+        """id контента для позиций offset..offset+limit в порядке списка."""
+        ids = []
+        index = 0
+        while bits and len(ids) < limit:
+            lowest = bits & -bits
+            if index >= offset:
+                ids.append(self.ids[lowest.bit_length() - 1])
+            bits ^= lowest
+            index += 1
+        return ids
+
+
+class IndexedResult:
+    """
+    Результат фильтрации для Paginator: count() — число битов,
+    срез — один запрос к витрине за id страницы.
+    """
+
+    def __init__(self, index, bits):
+        self.index = index
+        self.bits = bits
+
+    def count(self):
+        return self.bits.bit_count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        stop = self.count() if item.stop is None else item.stop
+        ids = self.index.page_ids(self.bits, start, max(stop - start, 0))
+        entries = {
+            entry.content_id: entry
+            for entry in catalog_entries(self.index.content_type).filter(content_id__in=ids)
+        }
+        return [entries[content_id] for content_id in ids if content_id in entries]
+
+    async def aslice(self, start, stop):
+        """Срез через асинхронный ORM (для асинхронных представлений)."""
+        ids = self.index.page_ids(self.bits, start, max(stop - start, 0))
+        entries = {
+            entry.content_id: entry
+            async for entry in catalog_entries(self.index.content_type).filter(content_id__in=ids)
+        }
+        return [entries[content_id] for content_id in ids if content_id in entries]
+
+
+def index_enabled():
+    return getattr(settings, 'CATALOG_INDEX_ENABLED', True)
+
+
+def get_index(content_type):
+    """Актуальный индекс типа контента (перестраивается при смене версии витрины)."""
+    version = catalog_version()
+    index = _indexes.get(content_type)
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        index = _indexes.get(content_type)
+        if index is None or index.version != version:
+            index = ContentIndex(content_type, version).build()
+            _indexes[content_type] = index
+    return index
+
+
+def rebuild_indexes():
+    """Перестраивает индексы этого процесса; другие процессы перестроят свои, увидев новую версию в БД."""
+    bump_catalog_version()
+    return {content_type: get_index(content_type) for content_type in CONTENT_MODELS}
+
+
+def filter_params(filterset):
+    """Параметры ContentIndex.filter из провалидированной формы CatalogFilter или None."""
+    if not filterset.is_valid():
+        return None
+    data = filterset.form.cleaned_data
+    year_range = data.get('year')
+    year_from = [value for value in (data.get('year_from'), year_range and year_range.start) if value is not None]
+    year_to = [value for value in (data.get('year_to'), year_range and year_range.stop) if value is not None]
+    return {
+        'genres': [genre.pk for genre in data.get('genres') or ()],
+        'countries': [country.pk for country in data.get('countries') or ()],
+        'year_from': max(year_from) if year_from else None,
+        'year_to': min(year_to) if year_to else None,
+        'actors': data.get('actors') or '',
+        'kind': data.get('content_type') or '',
+        'status': data.get('status') or '',
+        'title': data.get('title') or '',
+    }
+
+
+def filtered_catalog(filterset, content_type):
+    """
+    Отфильтрованный список каталога в порядке -created_at: через индекс
+    в памяти, а при выключенном индексе или ошибке формы — через ORM.
+    """
+    params = filter_params(filterset) if index_enabled() else None
+    if params is None:
+        return filterset.qs.order_by('-created_at')
+    index = get_index(content_type)
+    return IndexedResult(index, index.filter(**params))
+
+
+def persons_changed(sender, action, **kwargs):
+    # Состав актёров/режиссёров хранится только в индексе, а не в витрине
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(bump_catalog_version)
+
+
+def person_saved(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    # Новая персона без связей на индекс не влияет, переименование — влияет
+    if raw or created or (update_fields and 'name' not in update_fields):
+        return
+    transaction.on_commit(bump_catalog_version)
+
+
+def person_deleted(sender, instance, **kwargs):
+    # Связи с контентом удаляются каскадом без m2m_changed
+    transaction.on_commit(bump_catalog_version)
+
+
+for _model in CONTENT_MODELS.values():
+    for _through in (_model.actors.through, _model.directors.through):
+        m2m_changed.connect(persons_changed, sender=_through, dispatch_uid=f'catalog_index_{_through.__name__}')
+
+post_save.connect(person_saved, sender=Person, dispatch_uid='catalog_index_person_save')
+post_delete.connect(person_deleted, sender=Person, dispatch_uid='catalog_index_person_delete')
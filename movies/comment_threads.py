@@ -0,0 +1,88 @@
+"""
+Загрузка веток комментариев одним запросом.
+
+Comment — MPTT-модель, поэтому все комментарии к фильму/сериалу можно
+прочитать одним запросом в порядке (tree_id, lft) и собрать дерево в памяти,
+вместо того чтобы обходить children для каждого узла.
+"""
+from django.core.paginator import Paginator
+from django.db.models import Q
+from .models import Comment
+
+COMMENT_THREADS_PER_PAGE = 20
+
+
+def build_tree(comments):
+    """
+    Собирает плоский список комментариев в дерево. Ответы кладутся
+    в атрибут thread_replies каждого узла, ветки и ответы — от новых к старым.
+    Ответы на неодобренный комментарий не показываются, как и раньше.
+    Возвращает список корневых комментариев.
+    """
+    by_id = {}
+    roots = []
+    for comment in comments:
+        comment.thread_replies = []
+        by_id[comment.pk] = comment
+
+    for comment in comments:
+        if comment.parent_id is None:
+            roots.append(comment)
+            continue
+        parent = by_id.get(comment.parent_id)
+        if parent is not None:
+            parent.thread_replies.append(comment)
+
+    # Новые комментарии первыми: дерево хранится в порядке добавления
+    roots.sort(key=lambda comment: comment.created_at, reverse=True)
+    for comment in comments:
+        comment.thread_replies.sort(key=lambda reply: reply.created_at, reverse=True)
+
+    return roots
+
+
+def approved_comments(content_type, content_id):
+    """Одобренные комментарии к контенту в порядке обхода дерева."""
+    return Comment.objects.filter(
+        is_approved=True,
+        **{f'{content_type}_id': content_id}
+    ).select_related('user').order_by('tree_id', 'lft')
+
+
+def load_threads(content_type, content_id):
+    """Все ветки комментариев к фильму/сериалу одним запросом."""
+    return build_tree(list(approved_comments(content_type, content_id)))
+
+
+def paginate_threads(roots, page_number, per_page=COMMENT_THREADS_PER_PAGE):
+    """Постраничный вывод по веткам верхнего уровня."""
+    return Paginator(roots, per_page).get_page(page_number)
+
+
+def count_comments(roots):
+    """Количество видимых комментариев во всех ветках."""
+    return sum(1 + count_comments(comment.thread_replies) for comment in roots)
+
+
+def attach_replies(comments):
+    """
+    Догружает одобренные ответы к уже загруженным комментариям
+    (например, странице из CommentViewSet) одним запросом по диапазонам lft/rght.
+    """
+    comments = list(comments)
+    ranges = Q()
+    for comment in comments:
+        if comment.rght - comment.lft > 1:
+            ranges |= Q(tree_id=comment.tree_id, lft__gt=comment.lft, rght__lt=comment.rght)
+
+    descendants = []
+    if ranges:
+        known = {comment.pk for comment in comments}
+        descendants = [
+            comment for comment in
+            Comment.objects.filter(ranges, is_approved=True).select_related('user')
+            if comment.pk not in known
+        ]
+
+    build_tree(sorted(comments + descendants, key=lambda comment: (comment.tree_id, comment.lft)))
+    return comments
@@ -0,0 +1,133 @@
+"""
+Счётчики фасетов для фильтров каталога (жанры, страны, десятилетия).
+
+Счётчики считаются в БД сгруппированными запросами к витрине каталога:
+к строкам, подходящим под нефасетные фильтры (название, актёр, тип,
+статус), для каждого фасета применяются выбранные значения остальных
+фасетов, и база возвращает только пары (значение, число) — жанры и страны
+через jsonb_array_elements_text с GROUP BY, десятилетия через Count. Так
+счётчик опции показывает, сколько тайтлов будет найдено, если её добавить,
+а промах кэша не перебирает строки каталога в Python. Результат
+кэшируется по комбинации фильтров и общей версии витрины.
+"""
+import hashlib
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, F, Q
+from django.db.models.functions import Mod
+from .catalog import catalog_entries, catalog_version
+from .catalog_index import filter_params
+
+FACETS_CACHE_TIMEOUT = 60 * 15
+
+# Параметры, которые задают сами фасеты (не участвуют в базовой выборке)
+FACET_PARAMS = ('genres', 'countries', 'year_min', 'year_max', 'year_from', 'year_to', 'page')
+
+DECADE = 10
+
+
+def _cache_key(content_type, params):
+    normalized = sorted((key, tuple(sorted(params.getlist(key)))) for key in params if key != 'page')
+    digest = hashlib.md5(repr(normalized).encode('utf-8')).hexdigest()
+    return f'facets:{content_type}:{catalog_version()}:{digest}'
+
+
+def _selected(filterset):
+    """Выбранные значения фасетов из провалидированной формы фильтра."""
+    params = filter_params(filterset) or {}
+    return {
+        'genres': set(params.get('genres', ())),
+        'countries': set(params.get('countries', ())),
+        'year_from': params.get('year_from'),
+        'year_to': params.get('year_to'),
+    }
+
+
+def _any_of(field, ids):
+    condition = Q()
+    for pk in ids:
+        condition |= Q(**{f'{field}__contains': [pk]})
+    return condition
+
+
+def _restrict(queryset, selected, facet):
+    """Выборка с выбранными значениями всех фасетов, кроме facet."""
+    if facet != 'genres' and selected['genres']:
+        queryset = queryset.filter(_any_of('genre_ids', selected['genres']))
+    if facet != 'countries' and selected['countries']:
+        queryset = queryset.filter(_any_of('country_ids', selected['countries']))
+    if facet != 'years':
+        if selected['year_from'] is not None:
+            queryset = queryset.filter(year__gte=selected['year_from'])
+        if selected['year_to'] is not None:
+            queryset = queryset.filter(year__lte=selected['year_to'])
+    return queryset
+
+
+def _element_counts(queryset, column):
+    """{id: число записей} по элементам JSON-массива column — один GROUP BY в БД."""
+    sql, params = queryset.values(column).query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f'SELECT element.value, COUNT(*) FROM ({sql}) AS base, '
+            f'jsonb_array_elements_text(base.{column}) AS element(value) GROUP BY element.value',
+            params,
+        )
+        return {int(value): count for value, count in cursor.fetchall()}
+
+
+def compute_facets(filterset_class, params, content_type):
+    """
+    Возвращает {'genres': {id: count}, 'countries': {id: count}, 'decades': {1990: count, ...}}
+    для текущей комбинации фильтров.
+    """
+    key = _cache_key(content_type, params)
+    facets = cache.get(key)
+    if facets is not None:
+        return facets
+
+    selected = _selected(filterset_class(params, queryset=catalog_entries(content_type)))
+
+    base_params = params.copy()
+    for param in FACET_PARAMS:
+        base_params.pop(param, None)
+    base = filterset_class(base_params, queryset=catalog_entries(content_type)).qs.order_by()
+
+    decades = (
+        _restrict(base, selected, 'years').filter(year__isnull=False)
+        .annotate(decade=F('year') - Mod('year', DECADE)).values_list('decade').annotate(count=Count('pk'))
+    )
+    facets = {
+        'genres': _element_counts(_restrict(base, selected, 'genres'), 'genre_ids'),
+        'countries': _element_counts(_restrict(base, selected, 'countries'), 'country_ids'),
+        # Mod в PostgreSQL возвращает numeric
+        'decades': dict(sorted(((int(decade), count) for decade, count in decades), reverse=True)),
+    }
+    cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
+
+
+def annotate_options(options, counts):
+    """Проставляет facet_count объектам жанров/стран для сайдбара."""
+    options = list(options)
+    for option in options:
+        option.facet_count = counts.get(option.pk, 0)
+    return options
+
+
+def decade_buckets(decades, params):
+    """Ссылки на десятилетия с сохранением остальных фильтров."""
+    buckets = []
+    for decade, count in decades.items():
+        query = params.copy()
+        for param in ('year_min', 'year_max', 'page'):
+            query.pop(param, None)
+        query['year_from'] = decade
+        query['year_to'] = decade + DECADE - 1
+        buckets.append({
+            'decade': decade,
+            'label': f'{decade}–{decade + DECADE - 1}',
+            'count': count,
+            'query': query.urlencode(),
+        })
+    return buckets
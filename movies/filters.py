@@ -1,24 +1,31 @@
 """
 Filters for movies and series.
+
+Фильтры работают по витрине каталога (CatalogEntry): жанры и страны
+хранятся в строке списками id, поэтому фильтр не делает JOIN и distinct().
 """
 import django_filters
-from .models import Movie, Series, Genre, Country
+from .models import Movie, Series, Genre, Country, CatalogEntry
+from .search_keys import fold, person_content_ids
 from django.db import models
 
 
-class MovieFilter(django_filters.FilterSet):
-    """Фильтр для фильмов."""
+class CatalogFilter(django_filters.FilterSet):
+    """Общие фильтры витрины каталога."""
+    content_model = None
+
     title = django_filters.CharFilter(
-        field_name='title_uz',
-        lookup_expr='icontains',
+        method='filter_title',
         label='Nom bo‘yicha qidirish'
     )
     genres = django_filters.ModelMultipleChoiceFilter(
         queryset=Genre.objects.all(),
+        method='filter_genres',
         label='Janrlar'
     )
     countries = django_filters.ModelMultipleChoiceFilter(
         queryset=Country.objects.all(),
+        method='filter_countries',
         label='Mamlakatlar'
     )
     year = django_filters.RangeFilter(label='Yil')
@@ -36,47 +43,59 @@ class MovieFilter(django_filters.FilterSet):
         method='filter_by_actors',
         label='Aktor/rejissyor bo‘yicha qidirish'
     )
-    content_type = django_filters.ChoiceFilter(
-        choices=[('movie', 'Film'), ('cartoon', 'Multfilm')],
-        label='Turi'
-    )
-    
+
+    def _filter_any(self, queryset, field, values):
+        """Хотя бы одно из значений в списке id (как ModelMultipleChoiceFilter)."""
+        if not values:
+            return queryset
+        condition = models.Q()
+        for value in values:
+            condition |= models.Q(**{f'{field}__contains': [value.pk]})
+        return queryset.filter(condition)
+
+    def filter_genres(self, queryset, name, value):
+        return self._filter_any(queryset, 'genre_ids', value)
+
+    def filter_countries(self, queryset, name, value):
+        return self._filter_any(queryset, 'country_ids', value)
+
+    def filter_title(self, queryset, name, value):
+        """Qidiruv: UZ/AZ/asl nom bo‘yicha, yozuv va diakritikadan qat’i nazar."""
+        key = fold(value)
+        if key:
+            return queryset.filter(search_key__contains=key)
+        return queryset
+
     def filter_by_actors(self, queryset, name, value):
         """Qidiruv: aktyorlar va rejissyorlar bo‘yicha (OR)."""
-        if value:
-            return queryset.filter(
-                (
-                    models.Q(actors__name__icontains=value) |
-                    models.Q(directors__name__icontains=value)
-                )
-            ).distinct()
+        key = fold(value)
+        if key:
+            return queryset.filter(content_id__in=person_content_ids(self.content_model, key))
         return queryset
-    
+
     class Meta:
-        model = Movie
+        model = CatalogEntry
+        fields = ['genres', 'countries', 'year']
+
+
+class MovieFilter(CatalogFilter):
+    """Фильтр для фильмов."""
+    content_model = Movie
+
+    content_type = django_filters.ChoiceFilter(
+        field_name='kind',
+        choices=[('movie', 'Film'), ('cartoon', 'Multfilm')],
+        label='Turi'
+    )
+
+    class Meta(CatalogFilter.Meta):
         fields = ['genres', 'countries', 'year', 'content_type']
 
 
-class SeriesFilter(django_filters.FilterSet):
+class SeriesFilter(CatalogFilter):
     """Фильтр для сериалов."""
-    title = django_filters.CharFilter(
-        field_name='title_uz',
-        lookup_expr='icontains',
-        label='Nom bo‘yicha qidirish'
-    )
-    genres = django_filters.ModelMultipleChoiceFilter(
-        queryset=Genre.objects.all(),
-        label='Janrlar'
-    )
-    countries = django_filters.ModelMultipleChoiceFilter(
-        queryset=Country.objects.all(),
-        label='Mamlakatlar'
-    )
-    year = django_filters.RangeFilter(label='Yil')
-    actors = django_filters.CharFilter(
-        method='filter_by_actors',
-        label='Aktor/rejissyor bo‘yicha qidirish'
-    )
+    content_model = Series
+
     status = django_filters.ChoiceFilter(
         choices=[
             ('ongoing', 'Davom etmoqda'),
@@ -85,19 +104,6 @@ class SeriesFilter(django_filters.FilterSet):
         ],
         label='Holat'
     )
-    
-    def filter_by_actors(self, queryset, name, value):
-        """Qidiruv: aktyorlar va rejissyorlar bo‘yicha (OR)."""
-        if value:
-            return queryset.filter(
-                (
-                    models.Q(actors__name__icontains=value) |
-                    models.Q(directors__name__icontains=value)
-                )
-            ).distinct()
-        return queryset
-    
-    class Meta:
-        model = Series
-        fields = ['genres', 'countries', 'year', 'status']
 
+    class Meta(CatalogFilter.Meta):
+        fields = ['genres', 'countries', 'year', 'status']
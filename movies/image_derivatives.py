@@ -0,0 +1,207 @@
+"""
+Адаптивные производные изображений (постеры, фоны, фото, кадры, новости).
+
+Для каждого загруженного изображения заранее генерируются несколько ширин
+в AVIF (если Pillow его поддерживает), WebP и JPEG. Генерация запускается
+после коммита транзакции в пуле потоков, чтобы не задерживать запрос.
+Пути производных вычисляются из имени оригинала, поэтому шаблону не нужны
+дополнительные запросы к БД: derivatives/posters/poster_1/342.webp.
+"""
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from PIL import Image, ImageOps
+
+try:
+    import pillow_avif  # noqa: F401  (плагин AVIF для старых версий Pillow)
+except ImportError:
+    pass
+
+from .models import Movie, Series, Person, Season, Episode, News
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_ROOT = 'derivatives'
+
+# Ширины для каждого вида изображения (в пикселях)
+DERIVATIVE_WIDTHS = {
+    'poster': [185, 342, 500],
+    'backdrop': [780, 1280],
+    'photo': [185, 300],
+    'still': [300, 780],
+    'news': [400, 800],
+}
+
+# Модель -> {поле: вид изображения}
+IMAGE_FIELDS = {
+    Movie: {'poster': 'poster', 'backdrop': 'backdrop'},
+    Series: {'poster': 'poster', 'backdrop': 'backdrop'},
+    Person: {'photo': 'photo'},
+    Season: {'poster': 'poster'},
+    Episode: {'still_image': 'still'},
+    News: {'image': 'news'},
+}
+
+FORMAT_OPTIONS = {
+    'avif': ('AVIF', {'quality': 55}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+READY_CACHE_TIMEOUT = 60 * 60 * 24
+MISSING_CACHE_TIMEOUT = 60
+
+_executor = None
+
+
+def available_formats():
+    """Форматы, которые умеет кодировать установленный Pillow (JPEG всегда последний)."""
+    extensions = Image.registered_extensions()
+    formats = [ext for ext in ('avif', 'webp') if f'.{ext}' in extensions and FORMAT_OPTIONS[ext][0] in Image.SAVE]
+    return formats + ['jpg']
+
+
+def derivative_dir(name):
+    """Каталог производных для оригинала: posters/poster_1.jpg -> derivatives/posters/poster_1."""
+    stem, _ = posixpath.splitext(name)
+    return posixpath.join(DERIVATIVES_ROOT, stem)
+
+
+def derivative_name(name, width, ext):
+    return posixpath.join(derivative_dir(name), f'{width}.{ext}')
+
+
+def _ready_cache_key(name):
+    return f'derivatives:ready:{name}'
+
+
+def derivatives_ready(name, kind):
+    """Проверяет (с кэшированием), что производные для оригинала уже сгенерированы."""
+    key = _ready_cache_key(name)
+    ready = cache.get(key)
+    if ready is None:
+        marker = derivative_name(name, DERIVATIVE_WIDTHS[kind][0], 'jpg')
+        ready = default_storage.exists(marker)
+        cache.set(key, ready, READY_CACHE_TIMEOUT if ready else MISSING_CACHE_TIMEOUT)
+    return ready
+
+
+def srcsets(name, kind):
+    """Возвращает {ext: 'url 185w, url 342w, ...'} для всех доступных форматов."""
+    widths = DERIVATIVE_WIDTHS[kind]
+    return {
+        ext: ', '.join(f'{default_storage.url(derivative_name(name, width, ext))} {width}w' for width in widths)
+        for ext in available_formats()
+    }
+
+
+def fallback_url(name, kind):
+    """JPEG средней ширины для атрибута src."""
+    widths = DERIVATIVE_WIDTHS[kind]
+    return default_storage.url(derivative_name(name, widths[len(widths) // 2], 'jpg'))
+
+
+def generate_derivatives(name, kind):
+    """
+    Генерирует все ширины и форматы для одного оригинала.
+    Ширины больше оригинала не увеличиваются, а сохраняются в исходном размере,
+    чтобы srcset всегда ссылался на существующие файлы.
+    """
+    with default_storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    for width in DERIVATIVE_WIDTHS[kind]:
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.LANCZOS)
+        else:
+            resized = image
+
+        for ext in available_formats():
+            pil_format, options = FORMAT_OPTIONS[ext]
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            target = derivative_name(name, width, ext)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(target, ContentFile(buffer.getvalue()))
+
+    cache.set(_ready_cache_key(name), True, READY_CACHE_TIMEOUT)
+    logger.info(f"Производные изображения для '{name}' сгенерированы.")
+
+
+def delete_derivatives(name, kind):
+    """Удаляет все производные оригинала."""
+    for width in DERIVATIVE_WIDTHS[kind]:
+        for ext in FORMAT_OPTIONS:
+            target = derivative_name(name, width, ext)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+    cache.delete(_ready_cache_key(name))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2),
+            thread_name_prefix='image-derivatives'
+        )
+    return _executor
+
+
+def _safe_generate(name, kind):
+    try:
+        generate_derivatives(name, kind)
+    except Exception as e:
+        logger.error(f"Ошибка генерации производных для '{name}': {e}", exc_info=True)
+
+
+def schedule_derivatives(name, kind):
+    """Ставит генерацию в пул потоков после коммита текущей транзакции."""
+    transaction.on_commit(lambda: _get_executor().submit(_safe_generate, name, kind))
+
+
+def generate_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    for field_name, kind in IMAGE_FIELDS[sender].items():
+        if update_fields and field_name not in update_fields:
+            continue
+        file = getattr(instance, field_name)
+        if file and not derivatives_ready(file.name, kind):
+            schedule_derivatives(file.name, kind)
+
+
+def _delete_if_unreferenced(file, name, kind):
+    # Оригинал может разделяться несколькими строками (content-addressed storage)
+    is_referenced = getattr(file.storage, 'is_referenced', None)
+    if is_referenced and is_referenced(name):
+        return
+    delete_derivatives(name, kind)
+
+
+def delete_on_delete(sender, instance, **kwargs):
+    for field_name, kind in IMAGE_FIELDS[sender].items():
+        file = getattr(instance, field_name)
+        if file:
+            transaction.on_commit(
+                lambda file=file, name=file.name, kind=kind: _delete_if_unreferenced(file, name, kind)
+            )
+
+
+for _model in IMAGE_FIELDS:
+    post_save.connect(generate_on_save, sender=_model, dispatch_uid=f'derivatives_save_{_model.__name__}')
+    post_delete.connect(delete_on_delete, sender=_model, dispatch_uid=f'derivatives_delete_{_model.__name__}')
@@ -0,0 +1,92 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from movies.catalog_index import get_index
+from movies.models import Movie, Genre, Country, Person
+
+PAGE_SIZE = 24
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks movie list filtering: ORM joins with distinct() against the '
+        'in-memory catalog index, on random genre/country/year/actor combinations.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=50, help='Number of random filter combinations')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible runs')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        genre_ids = list(Genre.objects.values_list('pk', flat=True))
+        country_ids = list(Country.objects.values_list('pk', flat=True))
+        names = list(Person.objects.values_list('name', flat=True)[:500])
+
+        started = time.monotonic()
+        index = get_index('movie')
+        self.stdout.write(f'Index build: {(time.monotonic() - started) * 1000:.1f} ms, {len(index.ids)} movies')
+
+        orm_times, index_times = [], []
+        mismatches = 0
+        for _ in range(options['runs']):
+            params = self._random_params(rng, genre_ids, country_ids, names)
+
+            started = time.monotonic()
+            orm_count, orm_page = self._orm(params)
+            orm_times.append(time.monotonic() - started)
+
+            started = time.monotonic()
+            bits = index.filter(**params)
+            index_count = bits.bit_count()
+            index_page = index.page_ids(bits, 0, PAGE_SIZE)
+            index_times.append(time.monotonic() - started)
+
+            if orm_count != index_count:
+                mismatches += 1
+
+        self._report('ORM', orm_times)
+        self._report('Index', index_times)
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f'{mismatches} combinations returned different counts'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Counts match for all combinations'))
+
+    def _random_params(self, rng, genre_ids, country_ids, names):
+        params = {}
+        if genre_ids and rng.random() < 0.8:
+            params['genres'] = rng.sample(genre_ids, min(len(genre_ids), rng.randint(1, 2)))
+        if country_ids and rng.random() < 0.5:
+            params['countries'] = rng.sample(country_ids, 1)
+        if rng.random() < 0.5:
+            params['year_from'] = rng.randint(1970, 2015)
+            params['year_to'] = params['year_from'] + rng.randint(0, 15)
+        if names and rng.random() < 0.3:
+            name = rng.choice(names)
+            params['actors'] = name.split()[-1] if name.split() else name
+        return params
+
+    def _orm(self, params):
+        """Прежний путь MovieFilter: JOIN по M2M и distinct()."""
+        queryset = Movie.objects.filter(is_published=True)
+        if params.get('genres'):
+            queryset = queryset.filter(genres__in=params['genres'])
+        if params.get('countries'):
+            queryset = queryset.filter(countries__in=params['countries'])
+        if params.get('year_from') is not None:
+            queryset = queryset.filter(year__gte=params['year_from'], year__lte=params['year_to'])
+        if params.get('actors'):
+            queryset = queryset.filter(
+                Q(actors__name__icontains=params['actors']) | Q(directors__name__icontains=params['actors'])
+            )
+        queryset = queryset.distinct().order_by('-created_at')
+        return queryset.count(), list(queryset.values_list('pk', flat=True)[:PAGE_SIZE])
+
+    def _report(self, label, timings):
+        timings = sorted(timing * 1000 for timing in timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'{label:>5}: median {statistics.median(timings):.3f} ms, p95 {p95:.3f} ms, max {timings[-1]:.3f} ms'
+        )
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core.sitemap_shards import build_all, sitemap_root
+
+
+class Command(BaseCommand):
+    help = 'Pre-generates the sitemap index and gzip shards (by content type and id range) into SITEMAP_ROOT.'
+
+    def handle(self, *args, **options):
+        shards = build_all()
+        self.stdout.write(self.style.SUCCESS(f'Built {shards} sitemap shards in {sitemap_root()}'))
@@ -1,20 +1,51 @@
 from django.core.management.base import BaseCommand
-from movies.models import Movie, Series, Season, Episode, Rating, Comment, News
+from movies.models import Movie, Series, Season, Episode, Rating, Comment, News, PendingFileDeletion
+from movies.bulk_delete import ChunkedDeleter, estimated_rows, delete_queued_files, BATCH_SIZE
+
+# Delete child objects first: each batch then cascades into as few dependents as possible
+CONTENT_MODELS = [Rating, Comment, Episode, Season, News, Movie, Series]
+
 
 class Command(BaseCommand):
-    help = 'Safely clears content data (movies, series, seasons, episodes, ratings, comments, news) without touching users, genres, or countries.'
+    help = (
+        'Safely clears content data (movies, series, seasons, episodes, ratings, comments, news) '
+        'without touching users, genres, or countries. Rows are deleted in primary-key batches '
+        'without loading them into memory; their files are queued and removed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only show estimated row counts from table statistics')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per delete batch')
+        parser.add_argument(
+            '--keep-files', action='store_true',
+            help='Leave queued files for a later sweep instead of deleting them now'
+        )
 
     def handle(self, *args, **options):
-        self.stdout.write(self.style.WARNING('Starting content cleanup...'))
+        if options['dry_run']:
+            for model in CONTENT_MODELS:
+                self.stdout.write(f'{model.__name__}: ~{estimated_rows(model)} rows')
+            self.stdout.write(self.style.SUCCESS('Dry run: nothing deleted.'))
+            return
 
-        # Delete child objects first to respect FK constraints
+        self.stdout.write(self.style.WARNING('Starting content cleanup...'))
+        deleter = ChunkedDeleter(
+            batch_size=options['batch_size'],
+            progress=lambda model, deleted: self.stdout.write(f'  {model.__name__}: {deleted} deleted'),
+        )
         deleted_counts = {}
-        for model in [Rating, Comment, Episode, Season, News, Movie, Series]:
-            count = model.objects.all().count()
-            model.objects.all().delete()
-            deleted_counts[model.__name__] = count
+        for model in CONTENT_MODELS:
+            deleted_counts[model.__name__] = deleter.delete_all(model)
+        deleter.finish()
 
         for model_name, count in deleted_counts.items():
             self.stdout.write(self.style.SUCCESS(f'Deleted {count} {model_name} objects'))
+        self.stdout.write(f'{deleter.files_queued} files queued for deletion')
+
+        if not options['keep_files']:
+            files, reclaimed = delete_queued_files(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Deleted {files} files, {reclaimed / 1024 ** 2:.1f} MB reclaimed'))
+        elif PendingFileDeletion.objects.exists():
+            self.stdout.write('Queued files are kept until the next sweep.')
 
         self.stdout.write(self.style.SUCCESS('Content cleanup finished successfully.'))
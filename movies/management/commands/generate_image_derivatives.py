@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand
+from movies.image_derivatives import IMAGE_FIELDS, derivatives_ready, generate_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Pre-generates responsive AVIF/WebP/JPEG derivatives for existing posters, backdrops, photos, stills and news images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Number of worker threads')
+        parser.add_argument('--force', action='store_true', help='Regenerate even if derivatives already exist')
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model, fields in IMAGE_FIELDS.items():
+            for field_name, kind in fields.items():
+                names = (
+                    model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                    .values_list(field_name, flat=True).iterator()
+                )
+                for name in names:
+                    if options['force'] or not derivatives_ready(name, kind):
+                        jobs.append((name, kind))
+
+        self.stdout.write(self.style.WARNING(f'Generating derivatives for {len(jobs)} images...'))
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(generate_derivatives, name, kind): name for name, kind in jobs}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f'Error for {futures[future]}: {e}'))
+
+        self.stdout.write(self.style.SUCCESS(f'Generated derivatives for {done} images, {failed} failed.'))
@@ -0,0 +1,50 @@
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from movies.video_processing import VIDEO_MODELS, process_video
+
+
+class Command(BaseCommand):
+    help = (
+        'Probes uploaded movie and episode video files with ffprobe (duration, resolution, bitrate, codecs), '
+        'moves the MP4 moov atom to the front (faststart, no re-encoding) and extracts missing episode stills.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of files processed in parallel')
+        parser.add_argument('--force', action='store_true', help='Process files even if they were already processed')
+
+    def handle(self, *args, **options):
+        for binary in (settings.FFPROBE_BINARY, settings.FFMPEG_BINARY):
+            if not shutil.which(binary):
+                raise CommandError(f'{binary} not found: install ffmpeg or set FFMPEG_BINARY/FFPROBE_BINARY')
+
+        jobs = []
+        for model in VIDEO_MODELS:
+            rows = model.objects.exclude(video_file='').exclude(video_file__isnull=True)
+            for pk, name, processed in rows.values_list('pk', 'video_file', 'video_processed').iterator():
+                if options['force'] or name != processed:
+                    jobs.append((model, pk))
+
+        self.stdout.write(self.style.WARNING(f'Processing {len(jobs)} video files...'))
+        done = relocated = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(process_video, model, pk, options['force']): (model, pk) for model, pk in jobs}
+            for future in as_completed(futures):
+                model, pk = futures[future]
+                try:
+                    relocated += bool(future.result())
+                    done += 1
+                except subprocess.CalledProcessError as e:
+                    failed += 1
+                    stderr = e.stderr.decode(errors='replace').strip() if e.stderr else e
+                    self.stdout.write(self.style.ERROR(f'ffmpeg error for {model.__name__} {pk}: {stderr}'))
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f'Error for {model.__name__} {pk}: {e}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {done} videos ({relocated} moved to faststart), {failed} failed.'
+        ))
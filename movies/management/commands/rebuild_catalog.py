@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from movies.catalog import rebuild_catalog
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized catalog read model (CatalogEntry) from published movies and series.'
+
+    def handle(self, *args, **options):
+        count = rebuild_catalog()
+        self.stdout.write(self.style.SUCCESS(f'Catalog rebuilt: {count} entries'))
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from movies.catalog_index import rebuild_indexes
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the in-memory catalog filter index and bumps the catalog version stored in the '
+        'database; running web workers see the new version within CATALOG_VERSION_TTL seconds '
+        'and rebuild their copies on their next catalog request.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        indexes = rebuild_indexes()
+        elapsed = (time.monotonic() - started) * 1000
+        for content_type, index in indexes.items():
+            self.stdout.write(
+                f'{content_type}: {len(index.ids)} entries, {len(index.genres)} genres, '
+                f'{len(index.countries)} countries, {len(index.persons)} persons'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Catalog index rebuilt in {elapsed:.0f} ms'))
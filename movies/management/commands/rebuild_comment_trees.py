@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from movies.moderation import rebuild_trees
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds MPTT fields of comment threads one tree at a time (e.g. after bulk imports).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tree-id', type=int, action='append', dest='tree_ids', help='Rebuild only the given tree_id (repeatable)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Rebuilding comment trees...'))
+        count = rebuild_trees(options['tree_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} comment trees.'))
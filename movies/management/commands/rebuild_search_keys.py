@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from movies.models import Genre, Person, Movie, Series
+from movies.catalog import rebuild_catalog
+from movies.search_keys import search_key
+
+# (модель, поле ключа, исходные поля)
+KEY_SOURCES = (
+    (Genre, 'search_key', ('name_uz', 'name_az', 'name')),
+    (Person, 'search_key', ('name',)),
+    (Movie, 'search_key', ('title_uz', 'title_az', 'original_title')),
+    (Movie, 'description_key', ('description_uz', 'description_az')),
+    (Series, 'search_key', ('title_uz', 'title_az', 'original_title')),
+    (Series, 'description_key', ('description_uz', 'description_az')),
+)
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes folded search keys (titles, names, descriptions) for genres, persons, movies and series '
+        '(after changing the normalization rules or bulk imports) and rebuilds the catalog.'
+    )
+
+    def handle(self, *args, **options):
+        for model, key_field, fields in KEY_SOURCES:
+            changed = []
+            total = 0
+            for obj in model.objects.only('pk', key_field, *fields).iterator(chunk_size=BATCH_SIZE):
+                key = search_key(*(getattr(obj, field) for field in fields))
+                if key != getattr(obj, key_field):
+                    setattr(obj, key_field, key)
+                    changed.append(obj)
+                if len(changed) >= BATCH_SIZE:
+                    model.objects.bulk_update(changed, [key_field])
+                    total += len(changed)
+                    changed = []
+            if changed:
+                model.objects.bulk_update(changed, [key_field])
+                total += len(changed)
+            self.stdout.write(f'{model._meta.verbose_name_plural} ({key_field}): {total} keys updated')
+
+        count = rebuild_catalog()
+        self.stdout.write(self.style.SUCCESS(f'Search keys rebuilt, catalog refreshed: {count} entries'))
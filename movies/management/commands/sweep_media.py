@@ -0,0 +1,74 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from movies.bulk_delete import delete_queued_files
+from movies.media_sweep import find_orphans, remove_orphans, media_roots
+
+
+def _size(num_bytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024:
+            return f'{num_bytes:.1f} {unit}'
+        num_bytes /= 1024
+    return f'{num_bytes:.1f} TB'
+
+
+class Command(BaseCommand):
+    help = (
+        'Finds media files no FileField/ImageField refers to (removed titles, replaced posters, '
+        'failed imports) and orphaned image derivatives. Reports only, unless --delete or '
+        '--quarantine is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help='Delete orphaned files')
+        parser.add_argument('--quarantine', help='Move orphaned files into this directory instead of deleting them')
+        parser.add_argument(
+            '--dir', action='append', dest='dirs',
+            help=f'Media directory to sweep (default: {", ".join(media_roots())})'
+        )
+        parser.add_argument(
+            '--min-age', type=float, default=24,
+            help='Hours: newer files are never treated as orphans (uploads and imports in progress)'
+        )
+        parser.add_argument('--workers', type=int, default=None, help='Parallel scan/delete threads (MEDIA_DELETE_WORKERS)')
+        parser.add_argument('--verbose-list', action='store_true', help='Print every orphaned file')
+
+    def handle(self, *args, **options):
+        if options['delete'] and options['quarantine']:
+            raise CommandError('Use either --delete or --quarantine')
+        quarantine = options['quarantine'] and os.path.abspath(options['quarantine'])
+        swept = [os.path.join(os.path.abspath(settings.MEDIA_ROOT), root) for root in media_roots()]
+        if quarantine and any(quarantine == path or quarantine.startswith(path + os.sep) for path in swept):
+            raise CommandError('Quarantine directory must be outside the swept media directories')
+        workers = options['workers'] or getattr(settings, 'MEDIA_DELETE_WORKERS', 8)
+        apply = options['delete'] or quarantine
+
+        if apply:
+            # Файлы, поставленные в очередь массовым удалением (clear_content)
+            files, reclaimed = delete_queued_files(workers=workers)
+            if files:
+                self.stdout.write(f'Deleted {files} queued files, {_size(reclaimed)} reclaimed')
+
+        report = find_orphans(roots=options['dirs'], min_age=options['min_age'] * 3600, workers=workers)
+        self.stdout.write(f'Scanned {report.scanned} files, {_size(report.scanned_bytes)}')
+        if options['verbose_list']:
+            for name, _, size in report.orphans:
+                self.stdout.write(f'  {name} ({_size(size)})')
+        for directory, size in sorted(report.orphan_bytes.items()):
+            self.stdout.write(f'  {directory}/: {_size(size)} orphaned')
+        if report.skipped_recent:
+            self.stdout.write(f'{report.skipped_recent} unreferenced files are newer than --min-age and were kept')
+
+        total = sum(size for _, _, size in report.orphans)
+        if not apply:
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(report.orphans)} orphaned files, {_size(total)} (dry run: use --delete or --quarantine)'
+            ))
+            return
+
+        remove_orphans(report, quarantine=quarantine, workers=workers)
+        action = f'Moved to {quarantine}' if quarantine else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{action}: {report.removed} files, {_size(report.reclaimed)} reclaimed'))
+        if report.errors:
+            self.stdout.write(self.style.ERROR(f'{report.errors} files could not be removed, see the log'))
@@ -0,0 +1,58 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from movies.tmdb_service import TMDBService, TMDBRequestError
+from movies.tmdb_sync import sync_changes, SYNC_TYPES
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Invalid date: {value} (expected YYYY-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Applies TMDB changes to catalog titles: reads the /movie/changes and /tv/changes '
+        'feeds, fetches only the changed sections of titles we hold and writes field-level '
+        'diffs. By default continues from the end date of the last successful run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='First day of the period (YYYY-MM-DD)')
+        parser.add_argument('--end-date', help='Last day of the period (YYYY-MM-DD), today by default')
+        parser.add_argument('--type', choices=['movie', 'series', 'all'], default='all', help='Content type to sync')
+        parser.add_argument('--workers', type=int, default=None, help='Concurrent TMDB requests (TMDB_SYNC_WORKERS)')
+        parser.add_argument('--api-url', default=None, help='TMDB API base URL, e.g. a local fixture server')
+        parser.add_argument('--dry-run', action='store_true', help='Report changed fields without writing them')
+
+    def handle(self, *args, **options):
+        start_date = _date(options['start_date']) if options['start_date'] else None
+        end_date = _date(options['end_date']) if options['end_date'] else None
+        if start_date and end_date and start_date > end_date:
+            raise CommandError('--start-date is after --end-date')
+        content_types = tuple(SYNC_TYPES) if options['type'] == 'all' else (options['type'],)
+
+        try:
+            run = sync_changes(
+                start_date=start_date,
+                end_date=end_date,
+                content_types=content_types,
+                dry_run=options['dry_run'],
+                workers=options['workers'],
+                service=TMDBService(base_url=options['api_url']),
+                log=self.stdout.write,
+            )
+        except TMDBRequestError as e:
+            raise CommandError(f'TMDB changes feed failed, the period will be retried on the next run: {e}')
+
+        for content_type in content_types:
+            for tmdb_id, fields in run.report.get(content_type, {}).items():
+                self.stdout.write(f'  {content_type} {tmdb_id}: {", ".join(fields)}')
+        for title, error in run.report['errors'].items():
+            self.stdout.write(self.style.ERROR(f'  {title}: {error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{run.start_date} — {run.end_date}: changed in TMDB {run.changed}, checked {run.checked}, '
+            f'updated {run.updated}, failed {run.failed}, API calls {run.api_calls}'
+            + (' (dry run, nothing written)' if options['dry_run'] else '')
+        ))
@@ -1,54 +1,42 @@
 from django.core.management.base import BaseCommand
-from movies.models import Genre, Country, Person, Movie, Series, Season, Episode, StaticPage, News
-from deep_translator import GoogleTranslator
-import time
+from movies.translation import TranslationEngine, TRANSLATED_FIELDS, BATCH_SIZE
+
+MODELS = {model.__name__.lower(): model for model in TRANSLATED_FIELDS}
+
 
 class Command(BaseCommand):
-    help = 'Translate existing database fields from Uzbek to Azerbaijani'
+    help = (
+        'Translate existing database fields from Uzbek to Azerbaijani. Only fields whose '
+        'Uzbek source text changed since the last run are translated, so an interrupted '
+        'run resumes where it stopped.'
+    )
 
-    def _translate_text(self, text: str) -> str:
-        """Translates text to Azerbaijani, returns original on error."""
-        if not text:
-            return ""
-        try:
-            # Adding a small delay to avoid hitting API rate limits
-            time.sleep(0.1)
-            return GoogleTranslator(source='uz', target='az').translate(text)
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error translating '{text[:30]}...': {e}"))
-            return text
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', choices=sorted(MODELS), help='Translate only these models')
+        parser.add_argument('--force', action='store_true', help='Translate all fields, ignoring stored source hashes')
+        parser.add_argument('--workers', type=int, default=None, help='Concurrent translator requests (TRANSLATION_WORKERS)')
+        parser.add_argument('--rate-limit', type=float, default=None, help='Translator requests per second (TRANSLATION_RATE_LIMIT)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per batch')
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting translation of database content to Azerbaijani...'))
+        engine = TranslationEngine(
+            workers=options['workers'],
+            rate_limit=options['rate_limit'],
+            force=options['force'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
 
-        models_and_fields = {
-            Genre: {'name_uz': 'name_az'},
-            Country: {'name_uz': 'name_az'},
-            Person: {'bio_uz': 'bio_az'},
-            Movie: {'title_uz': 'title_az', 'description_uz': 'description_az'},
-            Series: {'title_uz': 'title_az', 'description_uz': 'description_az'},
-            Season: {'title_uz': 'title_az', 'description_uz': 'description_az'},
-            Episode: {'title_uz': 'title_az', 'description_uz': 'description_az'},
-            StaticPage: {'title_uz': 'title_az', 'content_uz': 'content_az'},
-            News: {'title_uz': 'title_az', 'content_uz': 'content_az'},
-        }
-
-        for model, fields in models_and_fields.items():
+        models = [MODELS[name] for name in options['model']] if options['model'] else list(TRANSLATED_FIELDS)
+        for model in models:
             self.stdout.write(f'Translating {model.__name__} objects...')
-            updated_count = 0
-            for item in model.objects.all():
-                item_updated = False
-                for source_field, target_field in fields.items():
-                    source_text = getattr(item, source_field)
-                    if source_text:
-                        translated_text = self._translate_text(source_text)
-                        setattr(item, target_field, translated_text)
-                        item_updated = True
-                
-                if item_updated:
-                    item.save()
-                    updated_count += 1
-            
-            self.stdout.write(self.style.SUCCESS(f'Translated and updated {updated_count} {model.__name__} objects.'))
+            translated, unchanged, failed = engine.translate_model(model, TRANSLATED_FIELDS[model], options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{model.__name__}: translated {translated} fields, {unchanged} unchanged since last run.'
+            ))
+            if failed:
+                self.stdout.write(self.style.WARNING(f'{model.__name__}: {failed} fields failed, will be retried on the next run.'))
 
-        self.stdout.write(self.style.SUCCESS('Database translation process finished.'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Database translation process finished ({engine.requests_made} translator requests).'
+        ))
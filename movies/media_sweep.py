@@ -0,0 +1,173 @@
+"""
+Поиск и удаление осиротевших медиафайлов (команда sweep_media).
+
+Файлы удалённых тайтлов, заменённые постеры и остатки неудачных импортов
+остаются в MEDIA_ROOT: django_cleanup удаляет только то, что видит при
+удалении строки. Сборщик:
+
+- собирает множество путей, на которые ссылаются все FileField/ImageField
+  (потоковыми запросами только по этим колонкам), и каталоги производных
+  изображений этих файлов;
+- обходит каталоги upload_to этих полей и derivatives/ через os.scandir в
+  пуле потоков (каждый подкаталог — отдельная задача), не читая файлы и не
+  переходя по символическим ссылкам;
+- сиротой считается файл старше min_age, на который нет ссылки (для
+  производных — у которых нет оригинала); перед удалением ссылки
+  перепроверяются, так как одинаковое изображение могло снова сослаться
+  на тот же файл (хранилище с адресацией по содержимому).
+
+Удаление или перенос в карантин (os.replace внутри той же файловой
+системы, без копирования) выполняется тоже в пуле потоков.
+"""
+import logging
+import os
+import posixpath
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from .image_derivatives import IMAGE_FIELDS, DERIVATIVES_ROOT, derivative_dir
+from .bulk_delete import referenced_names
+from .uploads import active_part_names
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 1000
+
+
+def file_fields():
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field
+
+
+def media_roots():
+    """Каталоги верхнего уровня, в которые пишут файловые поля, и каталог производных."""
+    roots = {DERIVATIVES_ROOT}
+    for _, field in file_fields():
+        if isinstance(field.upload_to, str) and field.upload_to.strip('/'):
+            roots.add(field.upload_to.strip('/'))
+    # episodes/videos входит в episodes
+    return sorted(root for root in roots if not any(root.startswith(f'{other}/') for other in roots))
+
+
+def referenced_files():
+    """(имена файлов из БД, каталоги производных, на которые есть оригинал)."""
+    names, derivative_dirs = set(), set()
+    for model, field in file_fields():
+        kind = IMAGE_FIELDS.get(model, {}).get(field.name)
+        rows = model._base_manager.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+        for name in rows.values_list(field.name, flat=True).iterator(chunk_size=5000):
+            names.add(name)
+            if kind:
+                derivative_dirs.add(derivative_dir(name))
+    # Незавершённые загрузки по частям, которые ещё могут докачать
+    names |= active_part_names()
+    return names, derivative_dirs
+
+
+def _scan_dir(path):
+    files, subdirs = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files.append((entry.path, stat.st_size, stat.st_mtime))
+    except FileNotFoundError:
+        pass
+    return files, subdirs
+
+
+def scan(paths, workers):
+    """Все файлы под paths: (путь, размер, mtime); подкаталоги читаются параллельно."""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media-scan') as pool:
+        pending = {pool.submit(_scan_dir, path) for path in paths if os.path.isdir(path)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                pending.update(pool.submit(_scan_dir, subdir) for subdir in subdirs)
+                yield from files
+
+
+class SweepReport:
+    def __init__(self):
+        self.scanned = 0
+        self.scanned_bytes = 0
+        self.orphans = []  # (имя относительно MEDIA_ROOT, путь, размер)
+        self.orphan_bytes = Counter()
+        self.skipped_recent = 0
+        self.removed = 0
+        self.reclaimed = 0
+        self.errors = 0
+
+
+def find_orphans(roots=None, min_age=24 * 60 * 60, workers=8):
+    media_root = os.path.abspath(settings.MEDIA_ROOT)
+    names, derivative_dirs = referenced_files()
+    report = SweepReport()
+    cutoff = time.time() - min_age
+    paths = [os.path.join(media_root, *root.split('/')) for root in (roots or media_roots())]
+    derivatives_prefix = f'{DERIVATIVES_ROOT}/'
+
+    for path, size, mtime in scan(paths, workers):
+        report.scanned += 1
+        report.scanned_bytes += size
+        name = os.path.relpath(path, media_root).replace(os.sep, '/')
+        if name.startswith(derivatives_prefix):
+            referenced = posixpath.dirname(name) in derivative_dirs
+        else:
+            referenced = name in names
+        if referenced:
+            continue
+        if mtime > cutoff:
+            report.skipped_recent += 1
+            continue
+        report.orphans.append((name, path, size))
+        report.orphan_bytes[name.split('/', 1)[0]] += size
+    return report
+
+
+def _remove(path, name, quarantine):
+    if quarantine:
+        target = os.path.join(quarantine, *name.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Переименование в пределах файловой системы: видеофайлы не копируются
+        os.replace(path, target)
+    else:
+        os.remove(path)
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+
+
+def remove_orphans(report, quarantine=None, workers=8):
+    """Удаляет (или переносит в quarantine) найденных сирот, перепроверив ссылки пачками."""
+    derivatives_prefix = f'{DERIVATIVES_ROOT}/'
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media-sweep') as pool:
+        for start in range(0, len(report.orphans), DELETE_BATCH_SIZE):
+            batch = report.orphans[start:start + DELETE_BATCH_SIZE]
+            still_referenced = referenced_names(
+                {name for name, _, _ in batch if not name.startswith(derivatives_prefix)}
+            )
+            batch = [orphan for orphan in batch if orphan[0] not in still_referenced]
+            futures = {pool.submit(_remove, path, name, quarantine): (name, size) for name, path, size in batch}
+            for future in futures:
+                name, size = futures[future]
+                try:
+                    future.result()
+                    report.removed += 1
+                    report.reclaimed += size
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    report.errors += 1
+                    logger.error(f"Не удалось убрать '{name}': {e}")
+    return report
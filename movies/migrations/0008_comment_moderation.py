@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_alter_movie_countries_alter_movie_genres_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='moderated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата модерации'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', False), ('moderated_at__isnull', True)), fields=['created_at'], name='comment_moderation_queue_idx'),
+        ),
+    ]
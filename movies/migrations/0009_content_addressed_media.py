@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:45
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0008_comment_moderation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='episode',
+            name='still_image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.media_storage, upload_to='episodes/', verbose_name='Кадр'),
+        ),
+        migrations.AlterField(
+            model_name='movie',
+            name='backdrop',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.media_storage, upload_to='backdrops/', verbose_name='Фон'),
+        ),
+        migrations.AlterField(
+            model_name='movie',
+            name='poster',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.media_storage, upload_to='posters/', verbose_name='Постер'),
+        ),
+        migrations.AlterField(
+            model_name='news',
+            name='image',
+            field=models.ImageField(storage=core.storage.media_storage, upload_to='news/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='person',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.media_storage, upload_to='persons/', verbose_name='Фото'),
+        ),
+        migrations.AlterField(
+            model_name='season',
+            name='poster',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.media_storage, upload_to='seasons/', verbose_name='Постер'),
+        ),
+        migrations.AlterField(
+            model_name='series',
+            name='backdrop',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.media_storage, upload_to='backdrops/', verbose_name='Фон'),
+        ),
+        migrations.AlterField(
+            model_name='series',
+            name='poster',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.media_storage, upload_to='posters/', verbose_name='Постер'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:54
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def fill_catalog(apps, schema_editor):
+    """Первичное заполнение витрины (дальше её обновляют сигналы movies.catalog)."""
+    CatalogEntry = apps.get_model('movies', 'CatalogEntry')
+    for content_type, model_name in (('movie', 'Movie'), ('series', 'Series')):
+        model = apps.get_model('movies', model_name)
+        entries = []
+        for obj in model.objects.filter(is_published=True).prefetch_related('genres', 'countries').iterator(chunk_size=500):
+            genres = sorted(obj.genres.all(), key=lambda genre: genre.pk)
+            countries = sorted(obj.countries.all(), key=lambda country: country.pk)
+            entries.append(CatalogEntry(
+                content_type=content_type,
+                content_id=obj.pk,
+                slug=obj.slug,
+                title_uz=obj.title_uz,
+                title_az=obj.title_az,
+                original_title=obj.original_title,
+                poster=obj.poster.name if obj.poster else '',
+                year=obj.year,
+                kind=obj.content_type if content_type == 'movie' else '',
+                status=getattr(obj, 'status', ''),
+                genre_ids=[genre.pk for genre in genres],
+                genres=[
+                    {'id': genre.pk, 'slug': genre.slug, 'name_uz': genre.name_uz, 'name_az': genre.name_az}
+                    for genre in genres
+                ],
+                country_ids=[country.pk for country in countries],
+                country_codes=[country.code for country in countries],
+                rating_avg=obj.rating_avg,
+                rating_count=obj.rating_count,
+                views=obj.views,
+                is_featured=obj.is_featured,
+                created_at=obj.created_at,
+            ))
+        CatalogEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0009_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('movie', 'Фильм'), ('series', 'Сериал')], max_length=10)),
+                ('content_id', models.IntegerField()),
+                ('slug', models.SlugField(db_index=False, max_length=300)),
+                ('title_uz', models.CharField(max_length=300)),
+                ('title_az', models.CharField(blank=True, max_length=300)),
+                ('original_title', models.CharField(blank=True, max_length=300)),
+                ('poster', models.CharField(blank=True, help_text='Имя файла постера в хранилище медиа', max_length=255)),
+                ('year', models.IntegerField(blank=True, null=True)),
+                ('kind', models.CharField(blank=True, help_text='Тип фильма (movie/cartoon)', max_length=20)),
+                ('status', models.CharField(blank=True, help_text='Статус сериала', max_length=20)),
+                ('genre_ids', models.JSONField(default=list)),
+                ('genres', models.JSONField(default=list)),
+                ('country_ids', models.JSONField(default=list)),
+                ('country_codes', models.JSONField(default=list)),
+                ('rating_avg', models.DecimalField(decimal_places=2, default=0, max_digits=3)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('views', models.IntegerField(default=0)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Запись каталога',
+                'verbose_name_plural': 'Каталог',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['content_type', '-created_at'], name='catalog_type_created_idx'), models.Index(fields=['content_type', '-views'], name='catalog_type_views_idx'), models.Index(fields=['content_type', '-year'], name='catalog_type_year_idx'), django.contrib.postgres.indexes.GinIndex(fields=['genre_ids'], name='catalog_genre_ids_gin'), django.contrib.postgres.indexes.GinIndex(fields=['country_ids'], name='catalog_country_ids_gin')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='catalogentry',
+            constraint=models.UniqueConstraint(fields=('content_type', 'content_id'), name='catalog_entry_content_unique'),
+        ),
+        migrations.RunPython(fill_catalog, migrations.RunPython.noop),
+    ]
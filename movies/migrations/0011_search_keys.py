@@ -0,0 +1,86 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:02
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+from movies.search_keys import search_key
+
+KEY_SOURCES = {
+    'Genre': ('name_uz', 'name_az', 'name'),
+    'Person': ('name',),
+    'Movie': ('title_uz', 'title_az', 'original_title'),
+    'Series': ('title_uz', 'title_az', 'original_title'),
+    'CatalogEntry': ('title_uz', 'title_az', 'original_title'),
+}
+
+
+def fill_search_keys(apps, schema_editor):
+    """Ключи поиска для существующих записей (новые считаются в save())."""
+    for model_name, fields in KEY_SOURCES.items():
+        model = apps.get_model('movies', model_name)
+        batch = []
+        for obj in model.objects.only('pk', *fields).iterator(chunk_size=1000):
+            obj.search_key = search_key(*(getattr(obj, field) for field in fields))
+            batch.append(obj)
+            if len(batch) >= 1000:
+                model.objects.bulk_update(batch, ['search_key'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['search_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0010_catalog_entry'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='catalogentry',
+            name='search_key',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='search_key',
+            field=models.CharField(blank=True, editable=False, max_length=400, verbose_name='Ключ поиска'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='search_key',
+            field=models.TextField(blank=True, editable=False, verbose_name='Ключ поиска'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='search_key',
+            field=models.CharField(blank=True, editable=False, max_length=400, verbose_name='Ключ поиска'),
+        ),
+        migrations.AddField(
+            model_name='series',
+            name='search_key',
+            field=models.TextField(blank=True, editable=False, verbose_name='Ключ поиска'),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_key'], name='catalog_search_key_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='genre',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_key'], name='genre_search_key_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_key'], name='movie_search_key_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_key'], name='person_search_key_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='series',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_key'], name='series_search_key_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('movies', '0011_search_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TMDBImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('movie', 'Фильм'), ('series', 'Сериал')], max_length=20, verbose_name='Тип контента')),
+                ('object_ids', models.JSONField(default=list, verbose_name='ID тайтлов')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершён'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Всего')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано')),
+                ('succeeded', models.PositiveIntegerField(default=0, verbose_name='Успешно')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='С ошибкой')),
+                ('results', models.JSONField(default=list, verbose_name='Результаты')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка задания')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлён')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершён')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tmdb_import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Запустил')),
+            ],
+            options={
+                'verbose_name': 'Импорт из TMDB',
+                'verbose_name_plural': 'Импорты из TMDB',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0012_tmdb_import_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TMDBSyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(verbose_name='С даты')),
+                ('end_date', models.DateField(verbose_name='По дату')),
+                ('status', models.CharField(choices=[('running', 'Выполняется'), ('done', 'Завершён'), ('failed', 'Ошибка')], default='running', max_length=20, verbose_name='Статус')),
+                ('changed', models.PositiveIntegerField(default=0, verbose_name='Изменено в TMDB')),
+                ('checked', models.PositiveIntegerField(default=0, verbose_name='Проверено наших')),
+                ('updated', models.PositiveIntegerField(default=0, verbose_name='Обновлено')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='С ошибкой')),
+                ('api_calls', models.PositiveIntegerField(default=0, verbose_name='Запросов к TMDB')),
+                ('report', models.JSONField(default=dict, verbose_name='Отчёт')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Начат')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершён')),
+            ],
+            options={
+                'verbose_name': 'Синхронизация TMDB',
+                'verbose_name_plural': 'Синхронизации TMDB',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0013_tmdb_sync_runs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50, verbose_name='Модель')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID объекта')),
+                ('field', models.CharField(max_length=50, verbose_name='Поле')),
+                ('source_hash', models.CharField(max_length=32, verbose_name='Хеш исходного текста')),
+                ('translated_at', models.DateTimeField(auto_now=True, verbose_name='Переведено')),
+            ],
+            options={
+                'verbose_name': 'Состояние перевода',
+                'verbose_name_plural': 'Состояния перевода',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='translationstate',
+            constraint=models.UniqueConstraint(fields=('model', 'object_id', 'field'), name='translation_state_unique'),
+        ),
+    ]
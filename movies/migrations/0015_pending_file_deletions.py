@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0014_translation_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingFileDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50, verbose_name='Модель')),
+                ('field', models.CharField(max_length=50, verbose_name='Поле')),
+                ('name', models.CharField(max_length=500, verbose_name='Файл')),
+                ('queued_at', models.DateTimeField(auto_now_add=True, verbose_name='Поставлен в очередь')),
+            ],
+            options={
+                'verbose_name': 'Файл на удаление',
+                'verbose_name_plural': 'Файлы на удаление',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('movies', '0015_pending_file_deletions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('movie', 'Фильм'), ('episode', 'Эпизод')], max_length=20, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True, verbose_name='ID объекта')),
+                ('filename', models.CharField(max_length=255, verbose_name='Исходное имя файла')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Размер')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Принято байт')),
+                ('name', models.CharField(max_length=500, verbose_name='Файл')),
+                ('status', models.CharField(choices=[('uploading', 'Загружается'), ('done', 'Загружен'), ('cancelled', 'Отменён')], default='uploading', max_length=20, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлена')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='video_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Загрузил')),
+            ],
+            options={
+                'verbose_name': 'Загрузка видео',
+                'verbose_name_plural': 'Загрузки видео',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0016_video_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='episode',
+            name='audio_codec',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Аудиокодек'),
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='video_bitrate',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Битрейт (бит/с)'),
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='video_codec',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Видеокодек'),
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='video_duration',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Длительность видео (сек)'),
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='video_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота кадра'),
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='video_processed',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Обработанный файл'),
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='video_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина кадра'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='audio_codec',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Аудиокодек'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='video_bitrate',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Битрейт (бит/с)'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='video_codec',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Видеокодек'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='video_duration',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Длительность видео (сек)'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='video_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота кадра'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='video_processed',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Обработанный файл'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='video_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина кадра'),
+        ),
+    ]
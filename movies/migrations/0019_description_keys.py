@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:50
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+from movies.search_keys import search_key
+
+
+def fill_description_keys(apps, schema_editor):
+    """Ключи описаний для существующих записей (новые считаются в save())."""
+    for model_name in ('Movie', 'Series'):
+        model = apps.get_model('movies', model_name)
+        batch = []
+        for obj in model.objects.only('pk', 'description_uz', 'description_az').iterator(chunk_size=1000):
+            obj.description_key = search_key(obj.description_uz, obj.description_az)
+            batch.append(obj)
+            if len(batch) >= 1000:
+                model.objects.bulk_update(batch, ['description_key'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['description_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0018_catalog_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='description_key',
+            field=models.TextField(blank=True, editable=False, verbose_name='Ключ поиска по описанию'),
+        ),
+        migrations.AddField(
+            model_name='series',
+            name='description_key',
+            field=models.TextField(blank=True, editable=False, verbose_name='Ключ поиска по описанию'),
+        ),
+        migrations.RunPython(fill_description_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['description_key'], name='movie_description_key_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='series',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['description_key'], name='series_description_key_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
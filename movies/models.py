@@ -2,6 +2,7 @@
 Models for movies and series.
 """
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -11,6 +12,16 @@ from imagekit.processors import ResizeToFill
 from mptt.models import MPTTModel, TreeForeignKey
 # from ckeditor.fields import RichTextField
 from unidecode import unidecode
+from core.storage import media_storage
+from .slugs import save_with_unique_slug
+from .search_keys import search_key
+
+
+def _add_update_field(kwargs, sources, field):
+    """Добавляет вычисляемое поле в update_fields, если сохраняется хотя бы одно исходное."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and set(update_fields) & set(sources):
+        kwargs['update_fields'] = {*update_fields, field}
 
 
 class Genre(models.Model):
@@ -19,11 +30,15 @@ class Genre(models.Model):
     name_uz = models.CharField(max_length=100, verbose_name='Название (UZ)', blank=True)
     name_az = models.CharField(max_length=100, verbose_name='Название (AZ)', blank=True)
     slug = models.SlugField(max_length=100, unique=True, db_index=True)
+    search_key = models.CharField('Ключ поиска', max_length=400, blank=True, editable=False)
 
     class Meta:
         verbose_name = 'Жанр'
         verbose_name_plural = 'Жанры'
         ordering = ['name_az']
+        indexes = [
+            GinIndex(fields=['search_key'], opclasses=['gin_trgm_ops'], name='genre_search_key_trgm'),
+        ]
 
     def __str__(self):
         return self.name_az or self.name_uz or self.name
@@ -31,6 +46,8 @@ class Genre(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(unidecode(self.name))
+        self.search_key = search_key(self.name_uz, self.name_az, self.name)
+        _add_update_field(kwargs, ('name', 'name_uz', 'name_az'), 'search_key')
         super().save(*args, **kwargs)
 
 
@@ -59,7 +76,7 @@ class Person(models.Model):
     ]
 
     name = models.CharField('Имя', max_length=200)
-    photo = models.ImageField('Фото', upload_to='persons/', blank=True, null=True)
+    photo = models.ImageField('Фото', upload_to='persons/', storage=media_storage, blank=True, null=True, db_index=True)
     photo_thumbnail = ImageSpecField(
         source='photo',
         processors=[ResizeToFill(200, 300)],
@@ -71,15 +88,45 @@ class Person(models.Model):
     bio_az = models.TextField('Биография (AZ)', blank=True)
     birth_date = models.DateField('Дата рождения', blank=True, null=True)
     tmdb_id = models.IntegerField('TMDB ID', blank=True, null=True, unique=True)
+    search_key = models.CharField('Ключ поиска', max_length=400, blank=True, editable=False)
 
     class Meta:
         verbose_name = 'Персона'
         verbose_name_plural = 'Персоны'
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['search_key'], opclasses=['gin_trgm_ops'], name='person_search_key_trgm'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.search_key = search_key(self.name)
+        _add_update_field(kwargs, ('name',), 'search_key')
+        super().save(*args, **kwargs)
+
+
+class VideoMetadata(models.Model):
+    """Сведения о загруженном видеофайле, заполняются после загрузки (movies.video_processing)."""
+    video_duration = models.PositiveIntegerField('Длительность видео (сек)', blank=True, null=True, editable=False)
+    video_width = models.PositiveIntegerField('Ширина кадра', blank=True, null=True, editable=False)
+    video_height = models.PositiveIntegerField('Высота кадра', blank=True, null=True, editable=False)
+    video_bitrate = models.PositiveIntegerField('Битрейт (бит/с)', blank=True, null=True, editable=False)
+    video_codec = models.CharField('Видеокодек', max_length=32, blank=True, editable=False)
+    audio_codec = models.CharField('Аудиокодек', max_length=32, blank=True, editable=False)
+    # Имя файла, для которого уже выполнена обработка: повторное сохранение её не запускает
+    video_processed = models.CharField('Обработанный файл', max_length=255, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def video_resolution(self):
+        if self.video_width and self.video_height:
+            return f'{self.video_width}×{self.video_height}'
+        return ''
+
 
 class BaseContent(models.Model):
     """Базовая модель для фильмов и сериалов."""
@@ -97,7 +144,7 @@ class BaseContent(models.Model):
     description_uz = models.TextField('Описание (UZ)', blank=True)
     description_az = models.TextField('Описание (AZ)', blank=True)
 
-    poster = models.ImageField('Постер', upload_to='posters/', blank=True, null=True)
+    poster = models.ImageField('Постер', upload_to='posters/', storage=media_storage, blank=True, null=True, db_index=True)
     poster_thumbnail = ImageSpecField(
         source='poster',
         processors=[ResizeToFill(300, 450)],
@@ -105,7 +152,7 @@ class BaseContent(models.Model):
         options={'quality': 90}
     )
 
-    backdrop = models.ImageField('Фон', upload_to='backdrops/', blank=True, null=True)
+    backdrop = models.ImageField('Фон', upload_to='backdrops/', storage=media_storage, blank=True, null=True, db_index=True)
 
     video_file = models.FileField('Файл фильма', upload_to='movies/', blank=True, null=True, help_text='Загрузите основной файл фильма')
 
@@ -144,6 +191,11 @@ class BaseContent(models.Model):
 
     tmdb_id = models.IntegerField('TMDB ID', blank=True, null=True)
 
+    # Свёрнутые названия UZ/AZ/оригинальное (movies.search_keys)
+    search_key = models.TextField('Ключ поиска', blank=True, editable=False)
+    # Свёрнутые описания UZ/AZ: поиск по тексту описания
+    description_key = models.TextField('Ключ поиска по описанию', blank=True, editable=False)
+
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
     updated_at = models.DateTimeField('Дата обновления', auto_now=True)
 
@@ -152,15 +204,15 @@ class BaseContent(models.Model):
         ordering = ['-created_at']
 
     def save(self, *args, **kwargs):
+        self.search_key = search_key(self.title_uz, self.title_az, self.original_title)
+        _add_update_field(kwargs, ('title_uz', 'title_az', 'original_title'), 'search_key')
+        self.description_key = search_key(self.description_uz, self.description_az)
+        _add_update_field(kwargs, ('description_uz', 'description_az'), 'description_key')
         if not self.slug:
-            base_slug = slugify(unidecode(self.title_az or self.title_uz or self.original_title or 'untitled'))
-            self.slug = base_slug
-            
-            # Проверяем уникальность и добавляем суффикс при необходимости
-            counter = 1
-            while self.__class__.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{base_slug}-{counter}"
-                counter += 1
+            # Свободный суффикс подбирается одним запросом по префиксу
+            return save_with_unique_slug(
+                self, self.title_az or self.title_uz or self.original_title, super().save, *args, **kwargs
+            )
         super().save(*args, **kwargs)
 
     def update_rating(self):
@@ -175,13 +227,17 @@ class BaseContent(models.Model):
         self.save(update_fields=['rating_avg', 'rating_count'])
 
 
-class Movie(BaseContent):
+class Movie(BaseContent, VideoMetadata):
     """Модель фильма."""
 
     class Meta:
         verbose_name = 'Фильм'
         verbose_name_plural = 'Фильмы'
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_key'], opclasses=['gin_trgm_ops'], name='movie_search_key_trgm'),
+            GinIndex(fields=['description_key'], opclasses=['gin_trgm_ops'], name='movie_description_key_trgm'),
+        ]
 
     def __str__(self):
         return self.title_az or self.title_uz
@@ -208,6 +264,10 @@ class Series(BaseContent):
         verbose_name = 'Сериал'
         verbose_name_plural = 'Сериалы'
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_key'], opclasses=['gin_trgm_ops'], name='series_search_key_trgm'),
+            GinIndex(fields=['description_key'], opclasses=['gin_trgm_ops'], name='series_description_key_trgm'),
+        ]
 
     def __str__(self):
         return self.title_az or self.title_uz
@@ -216,6 +276,86 @@ class Series(BaseContent):
         return reverse('series_detail', kwargs={'slug': self.slug})
 
 
+class CatalogEntry(models.Model):
+    """
+    Денормализованная витрина каталога для списков и API.
+
+    Одна строка на опубликованный фильм/сериал: жанры, страны, постер
+    и ключи сортировки хранятся прямо в строке, поэтому списки читают
+    одну узкую таблицу без JOIN и prefetch. Обновляется сигналами
+    (movies.catalog), полностью перестраивается rebuild_catalog.
+    """
+    content_type = models.CharField(max_length=10, choices=[('movie', 'Фильм'), ('series', 'Сериал')])
+    content_id = models.IntegerField()
+
+    slug = models.SlugField(max_length=300, db_index=False)
+    title_uz = models.CharField(max_length=300)
+    title_az = models.CharField(max_length=300, blank=True)
+    original_title = models.CharField(max_length=300, blank=True)
+    poster = models.CharField(max_length=255, blank=True, help_text='Имя файла постера в хранилище медиа')
+
+    year = models.IntegerField(blank=True, null=True)
+    kind = models.CharField(max_length=20, blank=True, help_text='Тип фильма (movie/cartoon)')
+    status = models.CharField(max_length=20, blank=True, help_text='Статус сериала')
+
+    # [id, ...] для фильтрации и [{'id', 'slug', 'name_uz', 'name_az'}, ...] для вывода
+    genre_ids = models.JSONField(default=list)
+    genres = models.JSONField(default=list)
+    country_ids = models.JSONField(default=list)
+    country_codes = models.JSONField(default=list)
+
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    rating_count = models.IntegerField(default=0)
+    views = models.IntegerField(default=0)
+    is_featured = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    search_key = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = 'Запись каталога'
+        verbose_name_plural = 'Каталог'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'content_id'], name='catalog_entry_content_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['content_type', '-created_at'], name='catalog_type_created_idx'),
+            models.Index(fields=['content_type', '-views'], name='catalog_type_views_idx'),
+            models.Index(fields=['content_type', '-year'], name='catalog_type_year_idx'),
+            GinIndex(fields=['genre_ids'], name='catalog_genre_ids_gin'),
+            GinIndex(fields=['country_ids'], name='catalog_country_ids_gin'),
+            GinIndex(fields=['search_key'], opclasses=['gin_trgm_ops'], name='catalog_search_key_trgm'),
+        ]
+
+    def __str__(self):
+        return self.title_az or self.title_uz
+
+    @property
+    def library_key(self):
+        """(тип, id) контента для фильтров библиотеки в шаблонах."""
+        return self.content_type, self.content_id
+
+    def get_absolute_url(self):
+        return reverse(f'{self.content_type}_detail', kwargs={'slug': self.slug})
+
+
+class CatalogVersion(models.Model):
+    """
+    Версия витрины каталога (одна строка). Хранится в БД, а не в кэше:
+    индексы в памяти каждого воркера и команд сверяются с ней и
+    перестраиваются после изменений, сделанных в другом процессе.
+    """
+    version = models.BigIntegerField('Версия', default=0)
+    updated_at = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Версия каталога'
+        verbose_name_plural = 'Версия каталога'
+
+    def __str__(self):
+        return str(self.version)
+
+
 class Season(models.Model):
     """Сезон сериала."""
     series = models.ForeignKey(Series, on_delete=models.CASCADE, related_name='seasons', verbose_name='Сериал')
@@ -224,7 +364,7 @@ class Season(models.Model):
     title_az = models.CharField('Название (AZ)', max_length=200, blank=True)
     description_uz = models.TextField('Описание (UZ)', blank=True)
     description_az = models.TextField('Описание (AZ)', blank=True)
-    poster = models.ImageField('Постер', upload_to='seasons/', blank=True, null=True)
+    poster = models.ImageField('Постер', upload_to='seasons/', storage=media_storage, blank=True, null=True, db_index=True)
     release_date = models.DateField('Дата выхода', blank=True, null=True)
 
     class Meta:
@@ -241,7 +381,7 @@ class Season(models.Model):
         return f"{(self.series.title_az or self.series.title_uz)} - Сезон {self.display_number}"
 
 
-class Episode(models.Model):
+class Episode(VideoMetadata):
     """Эпизод сериала."""
     season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='episodes', verbose_name='Сезон')
     episode_number = models.PositiveIntegerField('Номер эпизода')
@@ -253,7 +393,7 @@ class Episode(models.Model):
     video_file = models.FileField('Видеофайл', upload_to='episodes/videos/', blank=True, null=True)
     duration = models.IntegerField('Длительность (мин)', blank=True, null=True)
     release_date = models.DateField('Дата выхода', blank=True, null=True)
-    still_image = models.ImageField('Кадр', upload_to='episodes/', blank=True, null=True)
+    still_image = models.ImageField('Кадр', upload_to='episodes/', storage=media_storage, blank=True, null=True, db_index=True)
 
     class Meta:
         verbose_name = 'Эпизод'
@@ -318,16 +458,26 @@ class Comment(MPTTModel):
 
     text = models.TextField('Текст комментария')
     is_approved = models.BooleanField('Одобрен', default=False)
+    moderated_at = models.DateTimeField('Дата модерации', blank=True, null=True)
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
     updated_at = models.DateTimeField('Дата обновления', auto_now=True)
 
-    class MPTTMeta:
-        order_insertion_by = ['-created_at']
+    # order_insertion_by не задаётся: с ним каждый новый корневой комментарий
+    # сдвигал tree_id всех веток, а ответ — lft/rght всей ветки. Новые узлы
+    # добавляются в конец, порядок по дате наводится при чтении (comment_threads).
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['-created_at']
+        indexes = [
+            # Очередь модерации: только ещё не рассмотренные комментарии
+            models.Index(
+                fields=['created_at'],
+                name='comment_moderation_queue_idx',
+                condition=models.Q(is_approved=False, moderated_at__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         content = self.movie if self.movie else self.series
@@ -374,7 +524,7 @@ class News(models.Model):
     content_uz = models.TextField('Содержание (UZ)')
     content_az = models.TextField('Содержание (AZ)', blank=True)
 
-    image = models.ImageField('Изображение', upload_to='news/')
+    image = models.ImageField('Изображение', upload_to='news/', storage=media_storage, db_index=True)
     image_thumbnail = ImageSpecField(
         source='image',
         processors=[ResizeToFill(600, 400)],
@@ -401,9 +551,161 @@ class News(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(unidecode(self.title_az or self.title_uz))
+            return save_with_unique_slug(self, self.title_az or self.title_uz, super().save, *args, **kwargs)
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('news_detail', kwargs={'slug': self.slug})
 
+
+
+class TMDBImportJob(models.Model):
+    """Фоновый импорт выбранных тайтлов из TMDB (movies.tmdb_import) и его прогресс."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершён'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    content_type = models.CharField('Тип контента', max_length=20, choices=[('movie', 'Фильм'), ('series', 'Сериал')])
+    object_ids = models.JSONField('ID тайтлов', default=list)
+    status = models.CharField('Статус', max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    total = models.PositiveIntegerField('Всего', default=0)
+    processed = models.PositiveIntegerField('Обработано', default=0)
+    succeeded = models.PositiveIntegerField('Успешно', default=0)
+    failed = models.PositiveIntegerField('С ошибкой', default=0)
+    # [{'id': ..., 'title': ..., 'status': 'ok' | 'error', 'message': ...}] в порядке завершения
+    results = models.JSONField('Результаты', default=list)
+    error = models.TextField('Ошибка задания', blank=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='tmdb_import_jobs', verbose_name='Запустил'
+    )
+    created_at = models.DateTimeField('Создан', auto_now_add=True)
+    updated_at = models.DateTimeField('Обновлён', auto_now=True)
+    finished_at = models.DateTimeField('Завершён', blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Импорт из TMDB'
+        verbose_name_plural = 'Импорты из TMDB'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_content_type_display()}: {self.processed}/{self.total} ({self.get_status_display()})"
+
+    @property
+    def is_active(self):
+        return self.status in (self.PENDING, self.RUNNING)
+
+
+class TMDBSyncRun(models.Model):
+    """Прогон синхронизации изменений TMDB (sync_tmdb_changes); следующий начинается с end_date успешного."""
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершён'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    start_date = models.DateField('С даты')
+    end_date = models.DateField('По дату')
+    status = models.CharField('Статус', max_length=20, choices=STATUS_CHOICES, default=RUNNING)
+    changed = models.PositiveIntegerField('Изменено в TMDB', default=0)
+    checked = models.PositiveIntegerField('Проверено наших', default=0)
+    updated = models.PositiveIntegerField('Обновлено', default=0)
+    failed = models.PositiveIntegerField('С ошибкой', default=0)
+    api_calls = models.PositiveIntegerField('Запросов к TMDB', default=0)
+    # {'movie': {tmdb_id: [изменённые поля]}, 'series': {...}} и ошибки по тайтлам
+    report = models.JSONField('Отчёт', default=dict)
+    started_at = models.DateTimeField('Начат', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершён', blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Синхронизация TMDB'
+        verbose_name_plural = 'Синхронизации TMDB'
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.start_date} — {self.end_date}: {self.updated}/{self.checked} ({self.get_status_display()})"
+
+
+class TranslationState(models.Model):
+    """
+    Хеш исходного текста, с которого переведено поле (translate_db_to_az):
+    поле не переводится повторно, пока исходный текст не изменился.
+    """
+    model = models.CharField('Модель', max_length=50)
+    object_id = models.PositiveIntegerField('ID объекта')
+    field = models.CharField('Поле', max_length=50)
+    source_hash = models.CharField('Хеш исходного текста', max_length=32)
+    translated_at = models.DateTimeField('Переведено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Состояние перевода'
+        verbose_name_plural = 'Состояния перевода'
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id', 'field'], name='translation_state_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id}.{self.field}"
+
+
+class PendingFileDeletion(models.Model):
+    """Файл удалённой массово строки (clear_content), который ещё предстоит удалить с диска."""
+    model = models.CharField('Модель', max_length=50)
+    field = models.CharField('Поле', max_length=50)
+    name = models.CharField('Файл', max_length=500)
+    queued_at = models.DateTimeField('Поставлен в очередь', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Файл на удаление'
+        verbose_name_plural = 'Файлы на удаление'
+
+    def __str__(self):
+        return self.name
+
+
+class VideoUpload(models.Model):
+    """Загрузка видеофайла по частям (movies.uploads): сколько байт уже принято и куда пишется файл."""
+    UPLOADING = 'uploading'
+    DONE = 'done'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (UPLOADING, 'Загружается'),
+        (DONE, 'Загружен'),
+        (CANCELLED, 'Отменён'),
+    ]
+
+    content_type = models.CharField('Тип', max_length=20, choices=[('movie', 'Фильм'), ('episode', 'Эпизод')])
+    # Если указан, файл сразу прикрепляется к объекту после загрузки
+    object_id = models.PositiveIntegerField('ID объекта', blank=True, null=True)
+    filename = models.CharField('Исходное имя файла', max_length=255)
+    size = models.PositiveBigIntegerField('Размер')
+    offset = models.PositiveBigIntegerField('Принято байт', default=0)
+    # Итоговое имя в хранилище; пока идёт загрузка, данные пишутся в part_name
+    name = models.CharField('Файл', max_length=500)
+    status = models.CharField('Статус', max_length=20, choices=STATUS_CHOICES, default=UPLOADING)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='video_uploads', verbose_name='Загрузил'
+    )
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    updated_at = models.DateTimeField('Обновлена', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Загрузка видео'
+        verbose_name_plural = 'Загрузки видео'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename}: {self.offset}/{self.size} ({self.get_status_display()})"
+
+    @property
+    def part_name(self):
+        return f'{self.name}.{self.pk}.part'
@@ -0,0 +1,56 @@
+"""
+Модерация комментариев.
+
+Одобрение и отклонение меняют только флаги одним UPDATE и не трогают
+поля дерева (tree_id/lft/rght), поэтому массовая модерация не блокирует
+ветки комментариев. Перестроение деревьев, если оно нужно, выполняется
+отдельно и пакетно (rebuild_comment_trees).
+"""
+from django.db import transaction
+from django.utils import timezone
+from .models import Comment
+
+
+def pending_comments():
+    """Очередь модерации: ещё не рассмотренные комментарии, старые первыми."""
+    return Comment.objects.filter(
+        is_approved=False,
+        moderated_at__isnull=True
+    ).select_related('user', 'movie', 'series').order_by('created_at')
+
+
+def _moderate(comments, approved):
+    """Проставляет результат модерации одним UPDATE."""
+    if not hasattr(comments, 'update'):
+        comments = Comment.objects.filter(pk__in=list(comments))
+    return comments.update(is_approved=approved, moderated_at=timezone.now())
+
+
+def approve_comments(comments):
+    """Одобряет комментарии (queryset или список id). Возвращает количество."""
+    return _moderate(comments, True)
+
+
+def reject_comments(comments):
+    """Отклоняет комментарии (queryset или список id). Возвращает количество."""
+    return _moderate(comments, False)
+
+
+def rebuild_trees(tree_ids=None):
+    """
+    Пакетно перестраивает деревья комментариев: по одной ветке (tree_id)
+    за транзакцию, чтобы не блокировать всю таблицу. Без tree_ids
+    перестраивает все ветки. Возвращает количество обработанных веток.
+    """
+    if tree_ids is None:
+        tree_ids = (
+            Comment.objects.filter(parent__isnull=True)
+            .order_by('tree_id').values_list('tree_id', flat=True).distinct()
+        )
+
+    rebuilt = 0
+    for tree_id in tree_ids:
+        with transaction.atomic():
+            Comment.objects.partial_rebuild(tree_id)
+        rebuilt += 1
+    return rebuilt
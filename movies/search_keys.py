@@ -0,0 +1,68 @@
+"""
+Нормализованные ключи поиска.
+
+Одно и то же название пишут латиницей и кириллицей, с диакритикой и без
+(şəhər / seher / шаҳар, o‘g‘il / o'g'il / ўғил), поэтому поиск сравнивает
+не исходные строки, а свёрнутые ключи:
+
+- узбекская и азербайджанская кириллица переводится в латиницу по
+  правилам алфавитов (қ → q, ў → o, ҳ → h, ә → e, ҹ → c), остальное —
+  через unidecode, как и при генерации slug;
+- апострофы (o‘, g‘, ʻ) удаляются, диакритика снимается;
+- диграфы и близкие буквы сводятся к одной: sh/ş → s, ch/ç → c,
+  kh/х → x, q → k;
+- всё, кроме букв и цифр, — одиночный пробел.
+
+Ключи считаются при сохранении (search_key у фильмов, сериалов, персон,
+жанров и записей витрины) и хранятся в колонках с триграммным индексом,
+поэтому «содержит» по ключу — один индексный поиск вместо OR по полям.
+"""
+import re
+from unidecode import unidecode
+
+# Части ключа из разных полей; в свёрнутом запросе этого символа не бывает
+KEY_SEPARATOR = '|'
+
+_CYRILLIC = str.maketrans({
+    'ә': 'e', 'ə': 'e', 'э': 'e', 'е': 'e',
+    'қ': 'q', 'ў': 'o', 'ғ': 'g', 'ҳ': 'h', 'һ': 'h', 'х': 'x',
+    'ҹ': 'c', 'ч': 'ch', 'ҝ': 'g', 'ү': 'u', 'ө': 'o', 'ј': 'y', 'й': 'y',
+    'ё': 'yo', 'ю': 'yu', 'я': 'ya', 'ж': 'j', 'ш': 'sh', 'щ': 'sh',
+    'ц': 'ts', 'ы': 'i', 'ъ': '', 'ь': '',
+    'ı': 'i',
+})
+
+_APOSTROPHES = re.compile(r"['`]")
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+_DIGRAPHS = (('sh', 's'), ('ch', 'c'), ('kh', 'x'), ('q', 'k'))
+
+
+def fold(text):
+    """Свёрнутая форма строки для сравнения при поиске."""
+    text = unidecode((text or '').lower().translate(_CYRILLIC)).lower()
+    text = _NON_ALNUM.sub(' ', _APOSTROPHES.sub('', text)).strip()
+    for digraph, letter in _DIGRAPHS:
+        text = text.replace(digraph, letter)
+    return text
+
+
+def search_key(*texts):
+    """Ключ записи из нескольких полей (без повторов), например UZ/AZ/оригинальное название."""
+    parts = []
+    for text in texts:
+        part = fold(text)
+        if part and part not in parts:
+            parts.append(part)
+    return KEY_SEPARATOR.join(parts)
+
+
+def key_parts(key):
+    return [part for part in (key or '').split(KEY_SEPARATOR) if part]
+
+
+def person_content_ids(model, query_key):
+    """Подзапрос id контента model, у которого актёр или режиссёр подходит под ключ."""
+    field = f'{model._meta.model_name}_id'
+    acted = model.actors.through.objects.filter(person__search_key__contains=query_key).values(field)
+    directed = model.directors.through.objects.filter(person__search_key__contains=query_key).values(field)
+    return acted.union(directed)
@@ -1,9 +1,14 @@
 """
 Serializers for REST API.
 """
+from urllib.parse import urlencode
 from rest_framework import serializers
-from .models import Movie, Series, Rating, Comment, Genre
+from django.urls import reverse
+from .models import Movie, Series, Rating, Comment, Genre, CatalogEntry
+from .comment_threads import attach_replies
 from django.contrib.auth.models import User
+from core.storage import media_storage
+from users.models import UserActivity
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -66,9 +71,10 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'is_approved', 'created_at']
     
     def get_replies(self, obj):
-        if obj.children.exists():
-            return CommentSerializer(obj.children.filter(is_approved=True), many=True).data
-        return []
+        # Ответы собираются заранее загрузчиком веток (movies.comment_threads)
+        if not hasattr(obj, 'thread_replies'):
+            attach_replies([obj])
+        return CommentSerializer(obj.thread_replies, many=True, context=self.context).data
     
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
@@ -89,6 +95,62 @@ class MovieListSerializer(serializers.ModelSerializer):
         ]
 
 
+class CatalogMovieSerializer(serializers.ModelSerializer):
+    """Сериализатор списка фильмов из витрины каталога (те же поля, что MovieListSerializer)."""
+    id = serializers.IntegerField(source='content_id', read_only=True)
+    poster = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CatalogEntry
+        fields = [
+            'id', 'title_uz', 'title_az', 'slug', 'poster',
+            'year', 'genres', 'rating_avg', 'rating_count', 'views'
+        ]
+
+    def get_poster(self, obj):
+        if not obj.poster:
+            return None
+        url = media_storage().url(obj.poster)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class CatalogSeriesSerializer(CatalogMovieSerializer):
+    """Сериализатор списка сериалов из витрины каталога (те же поля, что SeriesListSerializer)."""
+
+    class Meta(CatalogMovieSerializer.Meta):
+        fields = CatalogMovieSerializer.Meta.fields + ['status']
+
+
+class SuggestionSerializer(serializers.Serializer):
+    """Подсказка поиска из индекса movies.suggest (тайтл, персона или жанр)."""
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    title = serializers.SerializerMethodField()
+    original_title = serializers.CharField(required=False, allow_blank=True)
+    year = serializers.IntegerField(required=False, allow_null=True)
+    role = serializers.CharField(required=False)
+    poster = serializers.SerializerMethodField()
+    url = serializers.SerializerMethodField()
+
+    def get_title(self, obj):
+        return obj.get('title') or obj.get('name')
+
+    def get_poster(self, obj):
+        if not obj.get('poster'):
+            return None
+        url = media_storage().url(obj['poster'])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_url(self, obj):
+        if obj['type'] == 'person':
+            return f"{reverse('search')}?{urlencode({'q': obj['name']})}"
+        if obj['type'] == 'genre':
+            return reverse('genre', kwargs={'slug': obj['slug']})
+        return reverse(f"{obj['type']}_detail", kwargs={'slug': obj['slug']})
+
+
 class SeriesListSerializer(serializers.ModelSerializer):
     """Сериализатор для списка сериалов."""
     genres = GenreSerializer(many=True, read_only=True)
@@ -100,3 +162,16 @@ class SeriesListSerializer(serializers.ModelSerializer):
             'year', 'genres', 'rating_avg', 'rating_count', 'views', 'status'
         ]
 
+
+
+class UserActivitySerializer(serializers.ModelSerializer):
+    """Сериализатор записи ленты активности."""
+    content_slug = serializers.CharField(read_only=True, allow_null=True)
+    content_poster = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = UserActivity
+        fields = [
+            'id', 'activity_type', 'content_type', 'content_id',
+            'content_title', 'content_slug', 'content_poster', 'created_at'
+        ]
@@ -5,7 +5,6 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import Movie, Genre, Country, Person
 from .tmdb_service import TMDBService
-from django.core.files.base import ContentFile
 from django.utils.text import slugify
 from unidecode import unidecode
 import logging
@@ -39,18 +38,12 @@ def auto_fill_movie_from_tmdb(sender, instance, created, **kwargs):
         # В модели у нас rating_avg, а TMDB возвращает vote_average, который по 10-балльной шкале. Приведем к 5-балльной
         instance.rating_avg = round(formatted.get('imdb_rating', 0) / 2, 1)
         instance.trailer_url = formatted.get('trailer_url', '')
-        if not instance.slug:
-            instance.slug = slugify(unidecode(instance.title_uz or instance.original_title))
         
         if formatted.get('poster_path'):
-            poster_content = service.download_image(formatted['poster_path'])
-            if poster_content:
-                instance.poster.save(f"poster_{instance.tmdb_id}.jpg", ContentFile(poster_content), save=False)
+            service.save_image(instance.poster, formatted['poster_path'], 'poster', f"poster_{instance.tmdb_id}.jpg")
         
         if formatted.get('backdrop_path'):
-            backdrop_content = service.download_image(formatted['backdrop_path'])
-            if backdrop_content:
-                instance.backdrop.save(f"backdrop_{instance.tmdb_id}.jpg", ContentFile(backdrop_content), save=False)
+            service.save_image(instance.backdrop, formatted['backdrop_path'], 'backdrop', f"backdrop_{instance.tmdb_id}.jpg")
         
         # Отключаем сигнал, чтобы избежать рекурсии при сохранении
         post_save.disconnect(auto_fill_movie_from_tmdb, sender=Movie)
@@ -0,0 +1,100 @@
+"""
+Выделение уникальных slug.
+
+Вместо перебора base, base-1, base-2... с exists() на каждый шаг все
+занятые варианты читаются одним запросом по префиксу, а свободный суффикс
+подбирается в памяти. Гонку параллельных импортов закрывает уникальный
+индекс: при IntegrityError slug выделяется заново. Для пакетного импорта
+allocate_slugs обрабатывает весь список одним запросом на пачку префиксов.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+from unidecode import unidecode
+
+DEFAULT_SLUG = 'untitled'
+# Запас под суффикс "-123456"
+SUFFIX_RESERVE = 10
+SLUG_SAVE_RETRIES = 5
+PREFIX_BATCH_SIZE = 200
+
+
+def base_slug(model, text):
+    """slug из текста (с транслитерацией), обрезанный с запасом под суффикс."""
+    max_length = model._meta.get_field('slug').max_length
+    slug = slugify(unidecode(text or '')) or DEFAULT_SLUG
+    return slug[:max_length - SUFFIX_RESERVE].strip('-') or DEFAULT_SLUG
+
+
+def _taken_suffixes(model, bases, exclude_pk=None):
+    """
+    Одним запросом на пачку префиксов возвращает {base: {занятые суффиксы}},
+    где 0 означает, что занят сам base.
+    """
+    taken = {base: set() for base in bases}
+    bases = list(taken)
+    for start in range(0, len(bases), PREFIX_BATCH_SIZE):
+        batch = bases[start:start + PREFIX_BATCH_SIZE]
+        condition = Q()
+        for base in batch:
+            condition |= Q(slug=base) | Q(slug__startswith=f'{base}-')
+        queryset = model._default_manager.filter(condition)
+        if exclude_pk is not None:
+            queryset = queryset.exclude(pk=exclude_pk)
+
+        for slug in queryset.values_list('slug', flat=True):
+            if slug in taken:
+                taken[slug].add(0)
+            base, _, suffix = slug.rpartition('-')
+            if suffix.isdigit() and base in taken:
+                taken[base].add(int(suffix))
+    return taken
+
+
+def _next_slug(base, used):
+    """Первый свободный вариант: base, base-1, base-2... (как и раньше)."""
+    if 0 not in used:
+        used.add(0)
+        return base
+    suffix = 1
+    while suffix in used:
+        suffix += 1
+    used.add(suffix)
+    return f'{base}-{suffix}'
+
+
+def allocate_slug(model, text, exclude_pk=None):
+    """Свободный slug для одной записи одним запросом."""
+    base = base_slug(model, text)
+    return _next_slug(base, _taken_suffixes(model, [base], exclude_pk)[base])
+
+
+def allocate_slugs(model, instances, source):
+    """
+    Проставляет slug записям без него перед bulk_create.
+    source(instance) возвращает текст для slug. Совпадающие названия
+    внутри пачки получают разные суффиксы.
+    """
+    pending = [(instance, base_slug(model, source(instance))) for instance in instances if not instance.slug]
+    taken = _taken_suffixes(model, {base for _, base in pending})
+    for instance, base in pending:
+        instance.slug = _next_slug(base, taken[base])
+    return instances
+
+
+def save_with_unique_slug(instance, text, save, *args, **kwargs):
+    """
+    Сохраняет запись с выделенным slug. Если параллельный импорт занял
+    тот же slug между выборкой и вставкой, выделяет его заново.
+    """
+    model = type(instance)
+    for attempt in range(SLUG_SAVE_RETRIES):
+        instance.slug = allocate_slug(model, text, exclude_pk=instance.pk)
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            conflict = model._default_manager.filter(slug=instance.slug).exclude(pk=instance.pk).exists()
+            if not conflict or attempt == SLUG_SAVE_RETRIES - 1:
+                instance.slug = ''
+                raise
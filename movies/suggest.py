@@ -0,0 +1,182 @@
+"""
+Подсказки поиска (автодополнение) по названиям и персонам.
+
+Запрос на каждое нажатие клавиши не должен ходить в БД, поэтому подсказки
+отдаются из префиксного индекса в памяти процесса:
+
+- ключи — свёрнутые ключи поиска (movies.search_keys) названий UZ/AZ/
+  оригинальных, имён персон и жанров, плюс хвосты с начала каждого слова,
+  чтобы «knight» находил «The Dark Knight»;
+- ключи лежат в отсортированном массиве, префикс ищется бинарным поиском;
+- для коротких префиксов (1–2 символа) лучшие подсказки посчитаны заранее;
+- вес подсказки — просмотры тайтла, для персоны — сумма просмотров её тайтлов,
+  для жанра — число тайтлов.
+
+Индекс строится из витрины каталога и перестраивается, когда меняется
+версия витрины (catalog_version). Версия общая для всех процессов (строка
+в БД), поэтому тайтлы, опубликованные или снятые в другом воркере или
+командой, появляются в подсказках и исчезают из них не позже чем через
+CATALOG_VERSION_TTL секунд, а не по истечении SUGGEST_MAX_AGE.
+"""
+import bisect
+import heapq
+import logging
+import threading
+import time
+from .catalog import catalog_entries, catalog_version, CONTENT_MODELS
+from .models import Person, Genre
+from .search_keys import fold, key_parts
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 20
+
+# Префиксы такой длины и короче отдаются из заранее посчитанных списков
+SHORT_PREFIX = 2
+
+# Просмотры не меняют версию витрины, поэтому веса обновляются перестройкой по возрасту
+SUGGEST_MAX_AGE = 60 * 60
+
+_lock = threading.Lock()
+_index = None
+
+
+def _word_keys(key):
+    """Свёрнутая строка и её хвосты с начала каждого слова."""
+    keys = [key]
+    position = key.find(' ')
+    while position != -1:
+        keys.append(key[position + 1:])
+        position = key.find(' ', position + 1)
+    return keys
+
+
+class SuggestIndex:
+    """Отсортированный массив (ключ, номер подсказки) и сами подсказки с весами."""
+
+    def __init__(self, version):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.items = []
+        self.weights = []
+        self.keys = []
+        self.refs = []
+        self.top = {}
+
+    def _add(self, item, weight, search_key):
+        number = len(self.items)
+        self.items.append(item)
+        self.weights.append(weight)
+        keys = set()
+        for part in key_parts(search_key):
+            keys.update(_word_keys(part))
+        return [(key, number) for key in keys]
+
+    def build(self):
+        started = time.monotonic()
+        pairs = []
+        content_views = {}
+        genre_counts = {}
+        for content_type in CONTENT_MODELS:
+            rows = catalog_entries(content_type).values_list(
+                'content_id', 'slug', 'title_uz', 'original_title', 'year', 'poster', 'views', 'search_key', 'genre_ids'
+            )
+            for content_id, slug, title_uz, original_title, year, poster, views, key, genre_ids in rows.iterator():
+                content_views[content_type, content_id] = views
+                for genre_id in genre_ids:
+                    genre_counts[genre_id] = genre_counts.get(genre_id, 0) + 1
+                item = {
+                    'type': content_type,
+                    'id': content_id,
+                    'slug': slug,
+                    'title': title_uz,
+                    'original_title': original_title,
+                    'year': year,
+                    'poster': poster,
+                }
+                pairs.extend(self._add(item, views, key))
+
+        # Персоны: только участники опубликованных тайтлов, вес — сумма их просмотров
+        person_views = {}
+        for content_type, model in CONTENT_MODELS.items():
+            field = f'{content_type}_id'
+            for through in (model.actors.through, model.directors.through):
+                for content_id, person_id in through.objects.values_list(field, 'person_id').iterator():
+                    views = content_views.get((content_type, content_id))
+                    if views is not None:
+                        person_views[person_id] = person_views.get(person_id, 0) + views
+        persons = Person.objects.filter(pk__in=list(person_views)).values_list('pk', 'name', 'role', 'search_key')
+        for person_id, name, role, key in persons.iterator():
+            item = {'type': 'person', 'id': person_id, 'name': name, 'role': role}
+            pairs.extend(self._add(item, person_views[person_id], key))
+
+        # Жанры: только непустые, вес — число тайтлов
+        for genre_id, slug, name_uz, name, key in Genre.objects.values_list(
+            'pk', 'slug', 'name_uz', 'name', 'search_key'
+        ).iterator():
+            if genre_counts.get(genre_id):
+                item = {'type': 'genre', 'id': genre_id, 'slug': slug, 'name': name_uz or name}
+                pairs.extend(self._add(item, genre_counts[genre_id], key))
+
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.refs = [number for _, number in pairs]
+        self._build_top(pairs)
+
+        logger.info(
+            f'Индекс подсказок построен: {len(self.items)} подсказок, {len(self.keys)} ключей '
+            f'за {(time.monotonic() - started) * 1000:.0f} мс.'
+        )
+        return self
+
+    def _build_top(self, pairs):
+        groups = {}
+        for key, number in pairs:
+            for length in range(1, min(SHORT_PREFIX, len(key)) + 1):
+                groups.setdefault(key[:length], set()).add(number)
+        self.top = {
+            prefix: heapq.nlargest(SUGGEST_MAX_LIMIT, numbers, key=self.weights.__getitem__)
+            for prefix, numbers in groups.items()
+        }
+
+    def lookup(self, prefix, limit=SUGGEST_LIMIT, kinds=None):
+        """Лучшие по весу подсказки, у которых ключ начинается с prefix."""
+        if len(prefix) <= SHORT_PREFIX and not kinds:
+            numbers = self.top.get(prefix, [])[:limit]
+        else:
+            start = bisect.bisect_left(self.keys, prefix)
+            stop = bisect.bisect_left(self.keys, prefix + '\uffff', start)
+            found = set(self.refs[start:stop])
+            if kinds:
+                found = {number for number in found if self.items[number]['type'] in kinds}
+            numbers = heapq.nlargest(limit, found, key=self.weights.__getitem__)
+        return [self.items[number] for number in numbers]
+
+
+def _is_fresh(index, version):
+    return (
+        index is not None and index.version == version
+        and time.monotonic() - index.built_at < SUGGEST_MAX_AGE
+    )
+
+
+def get_suggest_index():
+    """Актуальный индекс подсказок (перестраивается при смене общей версии витрины)."""
+    global _index
+    version = catalog_version()
+    index = _index
+    if _is_fresh(index, version):
+        return index
+    with _lock:
+        if not _is_fresh(_index, version):
+            _index = SuggestIndex(version).build()
+        return _index
+
+
+def suggest(query, limit=SUGGEST_LIMIT, kinds=None):
+    """Подсказки для строки поиска. Пустой запрос — пустой список."""
+    prefix = fold(query)
+    if not prefix:
+        return []
+    return get_suggest_index().lookup(prefix, limit, kinds)
@@ -0,0 +1,111 @@
+import json
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+from django.test import TestCase
+from .models import Movie, Series, TMDBSyncRun
+from .tmdb_service import TMDBService, TMDBRequestError
+from .tmdb_sync import sync_changes, last_synced_date
+
+# Ответы локального сервера вместо api.themoviedb.org/3
+TMDB_FIXTURES = {
+    '/movie/changes': {'results': [{'id': 1001}, {'id': 1002}, {'id': 9999}, {'id': 5, 'adult': True}], 'page': 1, 'total_pages': 1},
+    '/tv/changes': {'results': [{'id': 2001}], 'page': 1, 'total_pages': 1},
+    '/movie/1001/changes': {'changes': [{'key': 'runtime', 'items': []}, {'key': 'genres', 'items': []}, {'key': 'popularity', 'items': []}]},
+    '/movie/1002/changes': {'changes': [{'key': 'popularity', 'items': []}]},
+    '/movie/1001': {'id': 1001, 'runtime': 123, 'genres': [{'name': 'Drama'}]},
+    '/tv/2001/changes': {'changes': [{'key': 'status', 'items': []}, {'key': 'season', 'items': [{'value': {'season_number': 2}}]}]},
+    '/tv/2001': {'id': 2001, 'status': 'Ended'},
+    '/tv/2001/season/2': {
+        'name': 'Season 2', 'overview': '', 'air_date': '2020-01-01',
+        'episodes': [{'episode_number': 1, 'name': 'Pilot', 'overview': '', 'runtime': 40, 'air_date': '2020-01-01'}],
+    },
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?', 1)[0][len('/3'):]
+        self.server.requested.append(path)
+        body = None if path in self.server.failing else TMDB_FIXTURES.get(path)
+        self.send_response(200 if body else 500 if path in self.server.failing else 404)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(body or {}).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@mock.patch.object(TMDBService, '_translate_text', lambda self, text, language: text)
+class SyncTMDBChangesTests(TestCase):
+    """sync_tmdb_changes против локального сервера с лентой изменений TMDB."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), FixtureHandler)
+        cls.server.requested = []
+        cls.server.failing = set()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.api_url = f'http://127.0.0.1:{cls.server.server_port}/3'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requested.clear()
+        self.server.failing.clear()
+        self.movie = Movie.objects.create(title_uz='Kino', slug='kino', tmdb_id=1001, duration=90)
+        self.unchanged = Movie.objects.create(title_uz='Boshqa', slug='boshqa', tmdb_id=1002, duration=100)
+        self.series = Series.objects.create(title_uz='Serial', slug='serial', tmdb_id=2001, status='ongoing')
+
+    def sync(self, **kwargs):
+        return sync_changes(
+            start_date=date(2024, 1, 1), end_date=date(2024, 1, 2),
+            service=TMDBService(base_url=self.api_url), workers=2, **kwargs
+        )
+
+    def test_applies_only_changed_fields(self):
+        run = self.sync()
+
+        self.assertEqual(run.status, TMDBSyncRun.DONE)
+        self.assertEqual((run.changed, run.checked, run.updated, run.failed), (4, 3, 2, 0))
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.duration, 123)
+        self.assertEqual(list(self.movie.genres.values_list('name', flat=True)), ['Drama'])
+        self.unchanged.refresh_from_db()
+        self.assertEqual(self.unchanged.duration, 100)
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.status, 'completed')
+        season = self.series.seasons.get(season_number=1)
+        self.assertEqual(season.episodes.get(episode_number=0).duration, 40)
+        # Детали тайтла, у которого изменились только не хранимые ключи, не запрашиваются
+        self.assertNotIn('/movie/1002', self.server.requested)
+        self.assertEqual(last_synced_date(), date(2024, 1, 2))
+
+    def test_second_run_writes_nothing(self):
+        self.sync()
+        run = self.sync()
+        self.assertEqual((run.updated, run.failed), (0, 0))
+
+    def test_feed_failure_fails_run_and_keeps_checkpoint(self):
+        self.server.failing.add('/tv/changes')
+        with self.assertRaises(TMDBRequestError):
+            self.sync()
+        run = TMDBSyncRun.objects.get()
+        self.assertEqual(run.status, TMDBSyncRun.FAILED)
+        self.assertIsNone(last_synced_date())
+
+    def test_title_failure_is_counted(self):
+        self.server.failing.add('/movie/1001/changes')
+        run = self.sync()
+        self.assertEqual(run.status, TMDBSyncRun.DONE)
+        self.assertEqual(run.failed, 1)
+        self.assertIn('movie/1001', run.report['errors'])
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.duration, 90)
@@ -0,0 +1,350 @@
+"""
+Импорт тайтлов из TMDB: заполнение полей, изображений, связей и сезонов.
+
+Импорт одного тайтла делится на две части:
+
+- fetch — сетевая: поиск TMDB ID по названию, данные на двух языках,
+  перевод (TMDBService.format_*); БД не трогает, поэтому тайтлы
+  задания запрашиваются параллельно в пуле потоков;
+- apply — запись полей, изображений, M2M и сезонов в БД; выполняется
+  последовательно в потоке задания по мере готовности данных.
+
+Задание (TMDBImportJob) запускается из админки в фоновом потоке процесса
+и не ограничено таймаутом HTTP-запроса; прогресс и результат по каждому
+тайтлу пишутся в строку задания, которую опрашивает страница списка.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from unidecode import unidecode
+from .models import Movie, Series, Season, Episode, Genre, Country, Person, TMDBImportJob
+from .tmdb_service import TMDBService
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+# Задания этого процесса в очереди пула или в работе: их updated_at
+# периодически обновляется, чтобы fail_stale_jobs не счёл их потерянными
+_active_jobs = set()
+_active_lock = threading.Lock()
+
+HEARTBEAT_SECONDS = 60
+
+
+class TMDBImportError(Exception):
+    """Тайтл не удалось импортировать; текст — для отчёта в админке."""
+
+
+def _title(obj):
+    return obj.title_uz or obj.title_az or obj.original_title or f'#{obj.pk}'
+
+
+def _resolve_tmdb_id(obj, search):
+    """TMDB ID тайтла; если не указан — первый результат поиска по оригинальному названию."""
+    if obj.tmdb_id:
+        return obj.tmdb_id, None
+    if not obj.original_title:
+        raise TMDBImportError('не указан ни TMDB ID, ни оригинальное название для поиска')
+    search_results = search(obj.original_title, language='en-US')
+    if not search_results or not search_results.get('results'):
+        raise TMDBImportError(f"не найден в TMDB по названию '{obj.original_title}'")
+    tmdb_id = search_results['results'][0]['id']
+    return tmdb_id, f'TMDB ID {tmdb_id} найден по названию'
+
+
+def fetch_movie(service, movie):
+    tmdb_id, note = _resolve_tmdb_id(movie, service.search_movie)
+    formatted = service.format_movie_data(service.get_movie_data_multilang(tmdb_id))
+    if not formatted:
+        raise TMDBImportError(f'не удалось получить данные из TMDB (TMDB ID: {tmdb_id})')
+    return tmdb_id, formatted, note
+
+
+def fetch_series(service, series):
+    tmdb_id, note = _resolve_tmdb_id(series, service.search_series)
+    formatted = service.format_series_data(service.get_series_data_multilang(tmdb_id))
+    if not formatted:
+        raise TMDBImportError(f'не удалось получить данные из TMDB (TMDB ID: {tmdb_id})')
+    return tmdb_id, formatted, note
+
+
+def relation_objects(service, field, values):
+    """
+    Объекты M2M-поля по данным TMDB, создаются при отсутствии: genres —
+    английские названия жанров, countries — названия стран, actors —
+    [{'name': ...}], directors — имена.
+    """
+    objects = []
+    for value in values:
+        if field == 'genres':
+            genre, created = Genre.objects.get_or_create(
+                name=value,
+                defaults={'name_az': service._translate_text(value, 'az')}
+            )
+            if created:
+                logger.info(f"Created new genre: '{value}' with Azerbaijani translation '{genre.name_az}'")
+            objects.append(genre)
+        elif field == 'countries':
+            code = ''.join(filter(str.isalpha, unidecode(value)))[:3].upper()
+            country, _ = Country.objects.get_or_create(code=code, defaults={'name_az': value})
+            objects.append(country)
+        elif field == 'actors':
+            if name := value.get('name'):
+                objects.append(Person.objects.get_or_create(name=name, defaults={'role': 'actor'})[0])
+        elif field == 'directors':
+            objects.append(Person.objects.get_or_create(name=value, defaults={'role': 'director'})[0])
+    return objects
+
+
+RELATION_FIELDS = ('genres', 'countries', 'actors', 'directors')
+
+
+def _set_relations(content, formatted, service):
+    for field in RELATION_FIELDS:
+        objects = relation_objects(service, field, formatted.get(field, []))
+        if objects:
+            getattr(content, field).set(objects)
+
+
+def apply_movie(service, movie, tmdb_id, formatted):
+    movie.tmdb_id = tmdb_id
+    movie.title_az = formatted.get('title_az', movie.title_az)
+    movie.original_title = formatted.get('original_title', '')
+    movie.description_az = formatted.get('description_az', '')
+    movie.year = formatted.get('year')
+    movie.duration = formatted.get('duration', 0)
+    movie.rating_avg = round(formatted.get('imdb_rating', 0) / 2, 1)
+    movie.trailer_url = formatted.get('trailer_url', '')
+
+    if formatted.get('poster_path'):
+        service.save_image(movie.poster, formatted['poster_path'], 'poster', f"poster_{tmdb_id}.jpg")
+    if formatted.get('backdrop_path'):
+        service.save_image(movie.backdrop, formatted['backdrop_path'], 'backdrop', f"backdrop_{tmdb_id}.jpg")
+
+    with transaction.atomic():
+        movie.save()
+        _set_relations(movie, formatted, service)
+    return 'обновлён'
+
+
+def apply_series(service, series, tmdb_id, formatted):
+    series.tmdb_id = tmdb_id
+    series.title_az = formatted.get('title_az', series.title_az)
+    series.original_title = formatted.get('original_title', series.original_title)
+    series.description_az = formatted.get('description_az', series.description_az)
+    series.year = formatted.get('year', series.year)
+    series.seasons_count = formatted.get('seasons_count', series.seasons_count)
+    series.status = formatted.get('status', series.status)
+    series.rating_avg = round(formatted.get('imdb_rating', 0) / 2, 1)
+    series.trailer_url = formatted.get('trailer_url', series.trailer_url)
+
+    if formatted.get('poster_path'):
+        service.save_image(series.poster, formatted['poster_path'], 'poster', f"poster_{tmdb_id}.jpg")
+    if formatted.get('backdrop_path'):
+        service.save_image(series.backdrop, formatted['backdrop_path'], 'backdrop', f"backdrop_{tmdb_id}.jpg")
+
+    created_seasons = 0
+    season_posters = []
+    with transaction.atomic():
+        series.save()
+        _set_relations(series, formatted, service)
+
+        for season_data in formatted.get('seasons', []):
+            # Пропускаем "спецвыпуски" с нулевым номером, если они есть
+            if season_data['season_number'] < 1:
+                continue
+            season, created = Season.objects.update_or_create(
+                series=series,
+                season_number=season_data['season_number'] - 1,  # Сохраняем как 0-based
+                defaults={
+                    'title_az': season_data.get('title_az', ''),
+                    'description_az': season_data.get('description_az', ''),
+                    'release_date': season_data.get('release_date') or None,
+                }
+            )
+            created_seasons += created
+            if season_data.get('poster_path'):
+                season_posters.append((season, season_data['poster_path']))
+
+            for episode_data in season_data.get('episodes', []):
+                Episode.objects.update_or_create(
+                    season=season,
+                    episode_number=episode_data['episode_number'] - 1,  # Сохраняем как 0-based
+                    defaults={
+                        'title_az': episode_data.get('title_az', ''),
+                        'description_az': episode_data.get('description_az', ''),
+                        'duration': episode_data.get('duration'),
+                        'release_date': episode_data.get('release_date') or None,
+                    }
+                )
+
+    # Постеры сезонов скачиваются вне транзакции
+    for season, poster_path in season_posters:
+        service.save_image(season.poster, poster_path, 'poster', f"s{season.season_number}_poster_{tmdb_id}.jpg", save=True)
+    return f'обновлён, новых сезонов: {created_seasons}' if created_seasons else 'обновлён'
+
+
+IMPORTERS = {
+    'movie': (Movie, fetch_movie, apply_movie),
+    'series': (Series, fetch_series, apply_series),
+}
+
+
+# --- Фоновые задания ---
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Задания прежнего процесса этого воркера пропали вместе с его пулом
+        fail_stale_jobs()
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'TMDB_IMPORT_JOBS', 2),
+            thread_name_prefix='tmdb-import'
+        )
+        threading.Thread(target=_heartbeat, name='tmdb-import-heartbeat', daemon=True).start()
+    return _executor
+
+
+def _heartbeat():
+    """Обновляет updated_at заданий этого процесса, пока они ждут очереди или выполняются."""
+    while True:
+        time.sleep(HEARTBEAT_SECONDS)
+        with _active_lock:
+            job_ids = list(_active_jobs)
+        if not job_ids:
+            continue
+        try:
+            TMDBImportJob.objects.filter(
+                pk__in=job_ids, status__in=[TMDBImportJob.PENDING, TMDBImportJob.RUNNING]
+            ).update(updated_at=timezone.now())
+        except Exception as e:
+            logger.warning(f'Импорт из TMDB: не удалось обновить активные задания: {e}')
+        finally:
+            connections.close_all()
+
+
+def fail_stale_jobs():
+    """
+    Помечает ошибкой задания в очереди или в работе, которые не обновлялись
+    дольше TMDB_IMPORT_STALE_MINUTES: пул живёт в процессе веб-воркера, и
+    при его перезапуске задания теряются, а строки остаются активными.
+    Живой процесс обновляет updated_at своих заданий раз в HEARTBEAT_SECONDS
+    (_heartbeat), в том числе пока задание ждёт очереди или первого ответа TMDB.
+    """
+    stale_before = timezone.now() - timedelta(minutes=getattr(settings, 'TMDB_IMPORT_STALE_MINUTES', 15))
+    count = TMDBImportJob.objects.filter(
+        status__in=[TMDBImportJob.PENDING, TMDBImportJob.RUNNING], updated_at__lt=stale_before
+    ).update(
+        status=TMDBImportJob.FAILED,
+        error='Задание прервано: процесс воркера был перезапущен',
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    if count:
+        logger.warning(f'Импорт из TMDB: {count} зависших заданий помечены ошибкой.')
+    return count
+
+
+def start_import_job(content_type, object_ids, user=None):
+    """Создаёт задание импорта и запускает его в фоне после коммита транзакции."""
+    object_ids = list(dict.fromkeys(object_ids))
+    job = TMDBImportJob.objects.create(
+        content_type=content_type,
+        object_ids=object_ids,
+        total=len(object_ids),
+        created_by=user if user and user.is_authenticated else None,
+    )
+    transaction.on_commit(lambda: _submit(job.pk))
+    return job
+
+
+def _submit(job_id):
+    executor = _get_executor()
+    with _active_lock:
+        _active_jobs.add(job_id)
+    executor.submit(run_import_job, job_id)
+
+
+def _record(job, obj, status, message):
+    job.processed += 1
+    if status == 'ok':
+        job.succeeded += 1
+    else:
+        job.failed += 1
+    job.results.append({'id': obj.pk, 'title': _title(obj), 'status': status, 'message': message})
+    job.save(update_fields=['processed', 'succeeded', 'failed', 'results', 'updated_at'])
+
+
+def run_import_job(job_id):
+    """
+    Выполняет задание: данные всех тайтлов запрашиваются параллельно
+    (TMDB_IMPORT_WORKERS потоков), запись в БД — по мере готовности.
+    """
+    try:
+        # Задание, которое успели признать зависшим, не запускается
+        if not TMDBImportJob.objects.filter(pk=job_id, status=TMDBImportJob.PENDING).update(
+            status=TMDBImportJob.RUNNING, updated_at=timezone.now()
+        ):
+            return
+        job = TMDBImportJob.objects.get(pk=job_id)
+        model, fetch, apply = IMPORTERS[job.content_type]
+
+        objects = model.objects.in_bulk(job.object_ids)
+        for missing in set(job.object_ids) - set(objects):
+            job.processed += 1
+            job.failed += 1
+            job.results.append({'id': missing, 'title': f'#{missing}', 'status': 'error', 'message': 'тайтл удалён'})
+        service = TMDBService()
+
+        with ThreadPoolExecutor(max_workers=getattr(settings, 'TMDB_IMPORT_WORKERS', 4)) as pool:
+            futures = {pool.submit(fetch, service, obj): obj for obj in objects.values()}
+            for future in as_completed(futures):
+                obj = futures[future]
+                try:
+                    tmdb_id, formatted, note = future.result()
+                    message = apply(service, obj, tmdb_id, formatted)
+                    _record(job, obj, 'ok', f'{note}; {message}' if note else message)
+                except TMDBImportError as e:
+                    _record(job, obj, 'error', str(e))
+                except Exception as e:
+                    logger.error(f"Ошибка импорта из TMDB '{_title(obj)}': {e}", exc_info=True)
+                    _record(job, obj, 'error', f'ошибка при обновлении: {e}')
+
+        job.status = TMDBImportJob.DONE
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at', 'processed', 'succeeded', 'failed', 'results', 'updated_at'])
+        logger.info(f'Импорт из TMDB #{job.pk} завершён: {job.succeeded} успешно, {job.failed} с ошибкой.')
+    except Exception as e:
+        logger.error(f'Задание импорта из TMDB #{job_id} прервано: {e}', exc_info=True)
+        TMDBImportJob.objects.filter(pk=job_id).update(
+            status=TMDBImportJob.FAILED, error=str(e), finished_at=timezone.now()
+        )
+    finally:
+        with _active_lock:
+            _active_jobs.discard(job_id)
+        # Поток пула живёт дольше запроса: его соединения не закроет request_finished
+        connections.close_all()
+
+
+def job_payload(job):
+    """Состояние задания для опроса со страницы админки."""
+    return {
+        'id': job.pk,
+        'content_type': job.content_type,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'total': job.total,
+        'processed': job.processed,
+        'succeeded': job.succeeded,
+        'failed': job.failed,
+        'results': job.results,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -1,24 +1,70 @@
 """
 Service for working with TMDB API
 """
+import hashlib
+import tempfile
+import threading
 import requests
 from django.conf import settings
+from django.core.files import File
 import logging
 from deep_translator import GoogleTranslator
+from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+TMDB_IMAGE_BASE_URL = 'https://image.tmdb.org/t/p'
+
+# Размер TMDB под назначение изображения
+TMDB_IMAGE_SIZES = {
+    'poster': 'w500',
+    'backdrop': 'w1280',
+    'still': 'w780',
+    'profile': 'w185',
+}
+
+TMDB_IMAGE_CHUNK_SIZE = 64 * 1024
+TMDB_IMAGE_MAX_BYTES = 15 * 1024 * 1024
+TMDB_IMAGE_MIN_SIDE = 32
+TMDB_IMAGE_MAX_SIDE = 8000
+TMDB_IMAGE_TIMEOUT = 30
+
+# Ограничение одновременных скачиваний на процесс (память и соединения)
+_download_slots = threading.BoundedSemaphore(getattr(settings, 'TMDB_IMAGE_DOWNLOADS', 4))
+
+
+def file_sha256(field_file):
+    """SHA-256 содержимого сохранённого файла (читается кусками)."""
+    digest = hashlib.sha256()
+    try:
+        with field_file.storage.open(field_file.name, 'rb') as stored:
+            for chunk in iter(lambda: stored.read(TMDB_IMAGE_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except (OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+
+class TMDBRequestError(Exception):
+    """Запрос к TMDB не удался (сеть или HTTP-ошибка): ответ нельзя считать пустым."""
+
+
 class TMDBService:
     """Сервис для работы с The Movie Database API."""
-    def __init__(self):
+    def __init__(self, base_url=None):
         self.api_key = settings.TMDB_API_KEY
-        self.BASE_URL = 'https://api.themoviedb.org/3'
+        self.BASE_URL = base_url or getattr(settings, 'TMDB_API_URL', 'https://api.themoviedb.org/3')
+        # Число запросов к API (сервис разделяется потоками синхронизации)
+        self.requests_made = 0
+        self._counter_lock = threading.Lock()
 
     def _make_request(self, endpoint, params=None):
         """Отправка запроса к API."""
         if params is None:
             params = {}
         params['api_key'] = self.api_key
+        with self._counter_lock:
+            self.requests_made += 1
         try:
             response = requests.get(f"{self.BASE_URL}/{endpoint}", params=params)
             response.raise_for_status()
@@ -51,6 +97,35 @@ class TMDBService:
         }
         return self._make_request(f'tv/{tmdb_id}', params)
     
+    def get_changed_ids(self, kind, start_date, end_date):
+        """
+        TMDB ID из ленты изменений /movie/changes или /tv/changes за период
+        (не больше 14 дней); kind — 'movie' или 'tv'.
+        """
+        ids = set()
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            data = self._make_request(f'{kind}/changes', {
+                'start_date': start_date.isoformat(), 'end_date': end_date.isoformat(), 'page': page,
+            })
+            if data is None:
+                # Неполная лента потеряла бы изменения окна: синхронизация должна упасть
+                raise TMDBRequestError(f'лента {kind}/changes недоступна (страница {page})')
+            ids.update(item['id'] for item in data.get('results', []) if not item.get('adult'))
+            total_pages = data.get('total_pages') or 1
+            page += 1
+        return ids
+
+    def get_changes(self, kind, tmdb_id, start_date, end_date):
+        """
+        Изменения одного тайтла за период: [{'key': 'overview', 'items': [...]}, ...];
+        None — запрос не удался.
+        """
+        data = self._make_request(f'{kind}/{tmdb_id}/changes', {
+            'start_date': start_date.isoformat(), 'end_date': end_date.isoformat(),
+        })
+        return data.get('changes', []) if data else None
+
     def get_season_details(self, tv_id, season_number, language='en-US'):
         """Получить детальную информацию о сезоне сериала."""
         params = {'language': language}
@@ -96,19 +171,65 @@ class TMDBService:
             logger.error(f'Критическая ошибка в get_series_data_multilang для TMDB ID {tmdb_id}: {e}')
             return None
 
-    def download_image(self, file_path):
-        """Скачивает изображение с TMDB."""
+    def download_image(self, file_path, kind='poster'):
+        """
+        Потоково скачивает изображение с TMDB во временный файл.
+        Запрашивается размер под назначение (w500 для постера, w1280 для фона),
+        файл пишется кусками и проверяется по размеру и разрешению.
+        Возвращает (временный файл, sha256) или None. Файл нужно закрыть.
+        """
         if not file_path:
             return None
-        url = f'https://image.tmdb.org/t/p/original{file_path}'
+        size = TMDB_IMAGE_SIZES.get(kind, 'original')
+        url = f'{TMDB_IMAGE_BASE_URL}/{size}{file_path}'
+
+        tmp = tempfile.TemporaryFile()
+        digest = hashlib.sha256()
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            return response.content
-        except requests.RequestException as e:
+            with _download_slots:
+                with requests.get(url, stream=True, timeout=TMDB_IMAGE_TIMEOUT) as response:
+                    response.raise_for_status()
+                    received = 0
+                    for chunk in response.iter_content(chunk_size=TMDB_IMAGE_CHUNK_SIZE):
+                        received += len(chunk)
+                        if received > TMDB_IMAGE_MAX_BYTES:
+                            raise ValueError(f'изображение больше {TMDB_IMAGE_MAX_BYTES} байт')
+                        digest.update(chunk)
+                        tmp.write(chunk)
+
+            tmp.seek(0)
+            with Image.open(tmp) as image:
+                width, height = image.size
+                if image.format not in ('JPEG', 'PNG', 'WEBP'):
+                    raise ValueError(f'неподдерживаемый формат {image.format}')
+            if not (TMDB_IMAGE_MIN_SIDE <= min(width, height) and max(width, height) <= TMDB_IMAGE_MAX_SIDE):
+                raise ValueError(f'недопустимое разрешение {width}x{height}')
+            tmp.seek(0)
+            return tmp, digest.hexdigest()
+        except (requests.RequestException, OSError, ValueError, Image.DecompressionBombError) as e:
+            tmp.close()
             logger.error(f"Ошибка скачивания изображения {url}: {e}")
             return None
 
+    def save_image(self, field_file, file_path, kind, name, save=False):
+        """
+        Скачивает изображение и сохраняет его в поле модели.
+        Если в поле уже лежит файл с тем же содержимым, он не перезаписывается.
+        Возвращает True, если файл был сохранён.
+        """
+        downloaded = self.download_image(file_path, kind)
+        if not downloaded:
+            return False
+        tmp, digest = downloaded
+        try:
+            if field_file and file_sha256(field_file) == digest:
+                logger.info(f"Изображение {file_path} не изменилось, пропускаем сохранение.")
+                return False
+            field_file.save(name, File(tmp), save=save)
+            return True
+        finally:
+            tmp.close()
+
     def _translate_text(self, text: str, target_language: str) -> str:
         """Переводит текст на указанный язык, используя Google Translate."""
         if not text or not target_language:
@@ -168,35 +289,9 @@ class TMDBService:
                 # Пропускаем "спецвыпуски" с нулевым номером
                 if season_number is None or season_number == 0:
                     continue
-
-                # Получаем детали сезона, включая эпизоды
-                season_details_en = self.get_season_details(base_data['id'], season_number, language='en-US')
-                if not season_details_en:
-                    continue
-                
-                episodes = []
-                for ep_data in season_details_en.get('episodes', []):
-                    ep_name_en = ep_data.get('name', f'Episode {ep_data.get("episode_number")}')
-                    ep_overview_en = ep_data.get('overview', '')
-                    episodes.append({
-                        'episode_number': ep_data.get('episode_number'),
-                        'title_az': self._translate_text(ep_name_en, 'az'),
-                        'description_az': self._translate_text(ep_overview_en, 'az'),
-                        'duration': ep_data.get('runtime'),
-                        'release_date': ep_data.get('air_date'),
-                    })
-                
-                season_name_en = season_details_en.get('name', f'Season {season_number}')
-                season_overview_en = season_details_en.get('overview', '')
-
-                seasons_data.append({
-                    'season_number': season_number,
-                    'title_az': self._translate_text(season_name_en, 'az'),
-                    'description_az': self._translate_text(season_overview_en, 'az'),
-                    'poster_path': season_details_en.get('poster_path'),
-                    'release_date': season_details_en.get('air_date'),
-                    'episodes': episodes,
-                })
+                season = self.format_season(base_data['id'], season_number)
+                if season:
+                    seasons_data.append(season)
 
 
         return {
@@ -217,6 +312,37 @@ class TMDBService:
             'seasons': seasons_data,
         }
 
+    def format_season(self, tv_id, season_number) -> dict | None:
+        """Сезон с эпизодами (названия и описания переведены), как в format_series_data."""
+        # Получаем детали сезона, включая эпизоды
+        season_details_en = self.get_season_details(tv_id, season_number, language='en-US')
+        if not season_details_en:
+            return None
+
+        episodes = []
+        for ep_data in season_details_en.get('episodes', []):
+            ep_name_en = ep_data.get('name', f'Episode {ep_data.get("episode_number")}')
+            ep_overview_en = ep_data.get('overview', '')
+            episodes.append({
+                'episode_number': ep_data.get('episode_number'),
+                'title_az': self._translate_text(ep_name_en, 'az'),
+                'description_az': self._translate_text(ep_overview_en, 'az'),
+                'duration': ep_data.get('runtime'),
+                'release_date': ep_data.get('air_date'),
+            })
+
+        season_name_en = season_details_en.get('name', f'Season {season_number}')
+        season_overview_en = season_details_en.get('overview', '')
+
+        return {
+            'season_number': season_number,
+            'title_az': self._translate_text(season_name_en, 'az'),
+            'description_az': self._translate_text(season_overview_en, 'az'),
+            'poster_path': season_details_en.get('poster_path'),
+            'release_date': season_details_en.get('air_date'),
+            'episodes': episodes,
+        }
+
     def format_movie_data(self, data: dict) -> dict | None:
         """
         Форматирует мульти-языковые данные о фильме, полученные из TMDB.
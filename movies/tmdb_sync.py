@@ -0,0 +1,371 @@
+"""
+Синхронизация изменений TMDB (команда sync_tmdb_changes).
+
+Вместо повторного полного импорта каждого тайтла:
+
+1. лента /movie/changes и /tv/changes за период (окнами по 14 дней —
+   ограничение TMDB) даёт TMDB ID всех изменённых тайтлов, из них
+   берутся только те, что есть в каталоге;
+2. для каждого такого тайтла /{movie|tv}/{id}/changes говорит, какие
+   ключи изменились (overview, cast, images, season...); ключи, которые
+   сайт не хранит, пропускаются без запроса деталей;
+3. детали запрашиваются одним запросом с append_to_response только для
+   нужных секций (translations, credits, videos), сезоны — только
+   изменённые;
+4. в БД пишутся только поля, значение которых действительно отличается
+   (save(update_fields=...)), M2M — только при другом наборе, картинки —
+   только при другом содержимом (TMDBService.save_image).
+
+Запросы к TMDB (шаги 2–3) выполняются параллельно в пуле потоков,
+запись в БД — последовательно. Переводятся только изменившиеся тексты.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models import Movie, Series, Season, Episode, TMDBSyncRun
+from .tmdb_service import TMDBService, TMDBRequestError
+from .tmdb_import import relation_objects, RELATION_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Максимальный период ленты изменений TMDB
+CHANGES_MAX_DAYS = 14
+
+# Ключ ленты изменений TMDB → поля каталога, которые от него зависят
+COMMON_KEYS = {
+    'overview': {'description_az'},
+    'translations': {'title_az', 'description_az'},
+    'genres': {'genres'},
+    'production_countries': {'countries'},
+    'cast': {'actors'},
+    'crew': {'directors'},
+    'videos': {'trailer_url'},
+    'images': {'poster', 'backdrop'},
+}
+MOVIE_KEYS = {
+    **COMMON_KEYS,
+    'title': {'title_az'},
+    'original_title': {'original_title'},
+    'runtime': {'duration'},
+    'release_date': {'year'},
+    'release_dates': {'year'},
+}
+SERIES_KEYS = {
+    **COMMON_KEYS,
+    'name': {'title_az'},
+    'original_name': {'original_title'},
+    'first_air_date': {'year'},
+    'status': {'status'},
+    'number_of_seasons': {'seasons_count'},
+    'season': {'seasons'},
+}
+
+# Поле → секция append_to_response, без которой его не посчитать
+FIELD_APPENDS = {
+    'title_az': 'translations',
+    'description_az': 'translations',
+    'actors': 'credits',
+    'directors': 'credits',
+    'trailer_url': 'videos',
+}
+
+# Статус сериала TMDB → выбор Series.status
+SERIES_STATUSES = {
+    'Returning Series': 'ongoing',
+    'In Production': 'ongoing',
+    'Planned': 'ongoing',
+    'Pilot': 'ongoing',
+    'Ended': 'completed',
+    'Canceled': 'cancelled',
+}
+
+SCALAR_FIELDS = ('title_az', 'original_title', 'description_az', 'duration', 'year', 'status', 'seasons_count', 'trailer_url')
+IMAGE_FIELDS = ('poster', 'backdrop')
+
+
+class SyncType:
+    def __init__(self, content_type, model, api, keys, title_key, original_key, date_key):
+        self.content_type = content_type
+        self.model = model
+        self.api = api
+        self.keys = keys
+        self.title_key = title_key
+        self.original_key = original_key
+        self.date_key = date_key
+
+
+SYNC_TYPES = {
+    'movie': SyncType('movie', Movie, 'movie', MOVIE_KEYS, 'title', 'original_title', 'release_date'),
+    'series': SyncType('series', Series, 'tv', SERIES_KEYS, 'name', 'original_name', 'first_air_date'),
+}
+
+
+def windows(start_date, end_date):
+    """Период, разбитый на окна не длиннее CHANGES_MAX_DAYS."""
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=CHANGES_MAX_DAYS - 1), end_date)
+        yield window_start, window_end
+        window_start = window_end + timedelta(days=1)
+
+
+def _az_translation(details, key):
+    for translation in details.get('translations', {}).get('translations', []):
+        if translation.get('iso_639_1') == 'az':
+            return translation.get('data', {}).get(key, '')
+    return ''
+
+
+def _az_text(service, details, key, translate):
+    """Текст на азербайджанском: перевод TMDB, иначе машинный (только если изменился оригинал)."""
+    text = _az_translation(details, key)
+    if not text and translate and details.get(key):
+        text = service._translate_text(details[key], 'az')
+    return text
+
+
+def _trailer_url(details):
+    for video in details.get('videos', {}).get('results', []):
+        if video.get('type') == 'Trailer' and video.get('site') == 'YouTube':
+            return f"https://www.youtube.com/watch?v={video['key']}"
+    return ''
+
+
+def fetch_title_changes(service, sync_type, tmdb_id, start_date, end_date):
+    """
+    Новые значения изменившихся полей тайтла: {поле: значение}. Пустой
+    словарь — изменений в хранимых полях нет (детали не запрашивались).
+    """
+    keys, season_numbers = set(), set()
+    for window_start, window_end in windows(start_date, end_date):
+        changes = service.get_changes(sync_type.api, tmdb_id, window_start, window_end)
+        if changes is None:
+            raise TMDBRequestError(f'изменения {sync_type.api}/{tmdb_id} недоступны')
+        for change in changes:
+            keys.add(change.get('key'))
+            if change.get('key') == 'season':
+                for item in change.get('items', []):
+                    number = (item.get('value') or {}).get('season_number')
+                    if number:
+                        season_numbers.add(number)
+
+    fields = set().union(*(sync_type.keys[key] for key in keys if key in sync_type.keys))
+    if not fields:
+        return {}
+    appends = sorted({FIELD_APPENDS[field] for field in fields if field in FIELD_APPENDS})
+    params = {'language': 'en-US'}
+    if appends:
+        params['append_to_response'] = ','.join(appends)
+    details = service._make_request(f'{sync_type.api}/{tmdb_id}', params)
+    if not details:
+        raise TMDBRequestError(f'нет данных TMDB для {sync_type.api}/{tmdb_id}')
+
+    values = {}
+    if 'title_az' in fields:
+        title = _az_text(service, details, sync_type.title_key, translate=sync_type.title_key in keys)
+        if title:
+            values['title_az'] = title
+    if 'description_az' in fields:
+        overview = _az_text(service, details, 'overview', translate='overview' in keys)
+        if overview:
+            values['description_az'] = overview
+    if 'original_title' in fields:
+        values['original_title'] = details.get(sync_type.original_key, '')
+    if 'duration' in fields:
+        values['duration'] = details.get('runtime') or 0
+    if 'year' in fields:
+        release_date = details.get(sync_type.date_key) or ''
+        values['year'] = int(release_date[:4]) if release_date[:4].isdigit() else None
+    if 'status' in fields and details.get('status') in SERIES_STATUSES:
+        values['status'] = SERIES_STATUSES[details['status']]
+    if 'seasons_count' in fields:
+        values['seasons_count'] = details.get('number_of_seasons', 0)
+    if 'trailer_url' in fields:
+        values['trailer_url'] = _trailer_url(details)
+    if 'genres' in fields:
+        values['genres'] = [genre['name'] for genre in details.get('genres', [])]
+    if 'countries' in fields:
+        values['countries'] = [
+            service._translate_text(country['name'], 'az') for country in details.get('production_countries', [])
+        ]
+    if 'actors' in fields:
+        values['actors'] = [
+            {'name': service._translate_text(person['name'], 'az')}
+            for person in details.get('credits', {}).get('cast', [])[:15]
+        ]
+    if 'directors' in fields:
+        values['directors'] = [
+            service._translate_text(person['name'], 'az')
+            for person in details.get('credits', {}).get('crew', []) if person.get('job') == 'Director'
+        ]
+    for field in IMAGE_FIELDS:
+        if field in fields and details.get(f'{field}_path'):
+            values[field] = details[f'{field}_path']
+    if 'seasons' in fields and season_numbers:
+        values['seasons'] = []
+        for number in sorted(season_numbers):
+            season = service.format_season(tmdb_id, number)
+            if season is None:
+                raise TMDBRequestError(f'нет данных TMDB для {sync_type.api}/{tmdb_id}/season/{number}')
+            values['seasons'].append(season)
+    return values
+
+
+def _diff_save(instance, values, fields):
+    """Присваивает отличающиеся значения и сохраняет только их; возвращает список полей."""
+    changed = [field for field in fields if field in values and getattr(instance, field) != values[field]]
+    for field in changed:
+        setattr(instance, field, values[field])
+    if changed:
+        instance.save(update_fields=changed)
+    return changed
+
+
+def _apply_seasons(series, seasons):
+    changed = []
+    for season_data in seasons:
+        number = season_data['season_number'] - 1  # Сохраняем как 0-based
+        season_values = {
+            'title_az': season_data.get('title_az', ''),
+            'description_az': season_data.get('description_az', ''),
+            'release_date': parse_date(season_data.get('release_date') or ''),
+        }
+        season = Season.objects.filter(series=series, season_number=number).first()
+        if season is None:
+            season = Season.objects.create(series=series, season_number=number, **season_values)
+            changed.append(f'season {number + 1} (new)')
+        elif _diff_save(season, season_values, season_values):
+            changed.append(f'season {number + 1}')
+
+        episodes = {episode.episode_number: episode for episode in season.episodes.all()}
+        for episode_data in season_data.get('episodes', []):
+            episode_number = episode_data['episode_number'] - 1
+            episode_values = {
+                'title_az': episode_data.get('title_az', ''),
+                'description_az': episode_data.get('description_az', ''),
+                'duration': episode_data.get('duration'),
+                'release_date': parse_date(episode_data.get('release_date') or ''),
+            }
+            episode = episodes.get(episode_number)
+            if episode is None:
+                Episode.objects.create(season=season, episode_number=episode_number, **episode_values)
+                changed.append(f'S{number + 1}E{episode_number + 1} (new)')
+            elif _diff_save(episode, episode_values, episode_values):
+                changed.append(f'S{number + 1}E{episode_number + 1}')
+    return changed
+
+
+def apply_title_changes(service, content, values):
+    """Записывает в тайтл только отличающиеся значения; возвращает список изменённых полей."""
+    image_fields = []
+    for field in IMAGE_FIELDS:
+        # save_image не перезаписывает файл с тем же содержимым
+        if values.get(field) and service.save_image(
+            getattr(content, field), values[field], field, f'{field}_{content.tmdb_id}.jpg'
+        ):
+            image_fields.append(field)
+
+    with transaction.atomic():
+        changed = [field for field in SCALAR_FIELDS if field in values and getattr(content, field) != values[field]]
+        for field in changed:
+            setattr(content, field, values[field])
+        if changed or image_fields:
+            content.save(update_fields=changed + image_fields)
+
+        for field in RELATION_FIELDS:
+            if field not in values:
+                continue
+            objects = relation_objects(service, field, values[field])
+            manager = getattr(content, field)
+            if {obj.pk for obj in objects} != set(manager.values_list('pk', flat=True)):
+                manager.set(objects)
+                changed.append(field)
+
+        if values.get('seasons'):
+            changed += _apply_seasons(content, values['seasons'])
+    return changed + image_fields
+
+
+def last_synced_date():
+    return TMDBSyncRun.objects.filter(status=TMDBSyncRun.DONE).order_by('-end_date').values_list(
+        'end_date', flat=True
+    ).first()
+
+
+def sync_changes(start_date=None, end_date=None, content_types=tuple(SYNC_TYPES), dry_run=False,
+                 workers=None, service=None, log=None):
+    """
+    Синхронизирует изменения за период (по умолчанию — с конца последнего
+    успешного прогона по сегодня). При dry_run только сообщает, какие
+    поля тайтлов TMDB отметил изменёнными, и ничего не пишет.
+
+    Ошибка ленты изменений (TMDBRequestError) завершает прогон со статусом
+    FAILED: следующий прогон начнётся с конца последнего успешного и
+    повторит это окно. Ошибки отдельных тайтлов считаются в run.failed и
+    report['errors'].
+    """
+    log = log or (lambda message: None)
+    service = service or TMDBService()
+    end_date = end_date or timezone.localdate()
+    start_date = start_date or last_synced_date() or end_date - timedelta(days=1)
+    workers = workers or getattr(settings, 'TMDB_SYNC_WORKERS', 8)
+    run = TMDBSyncRun(start_date=start_date, end_date=end_date, report={'errors': {}})
+    if not dry_run:
+        run.save()
+
+    try:
+        for content_type in content_types:
+            sync_type = SYNC_TYPES[content_type]
+            changed_ids = set()
+            for window_start, window_end in windows(start_date, end_date):
+                changed_ids |= service.get_changed_ids(sync_type.api, window_start, window_end)
+
+            held = {}
+            for pk, tmdb_id in sync_type.model.objects.exclude(tmdb_id=None).values_list('pk', 'tmdb_id').iterator():
+                if tmdb_id in changed_ids:
+                    held.setdefault(tmdb_id, []).append(pk)
+            run.changed += len(changed_ids)
+            run.checked += len(held)
+            log(f'{content_type}: {len(changed_ids)} изменено в TMDB, из них в каталоге {len(held)}')
+
+            report = run.report.setdefault(content_type, {})
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(fetch_title_changes, service, sync_type, tmdb_id, start_date, end_date): tmdb_id
+                    for tmdb_id in held
+                }
+                for future in as_completed(futures):
+                    tmdb_id = futures[future]
+                    try:
+                        values = future.result()
+                        if not values:
+                            continue
+                        if dry_run:
+                            report[str(tmdb_id)] = sorted(values)
+                            continue
+                        changed = []
+                        for content in sync_type.model.objects.filter(pk__in=held[tmdb_id]):
+                            changed += apply_title_changes(service, content, values)
+                        if changed:
+                            run.updated += 1
+                            report[str(tmdb_id)] = sorted(set(changed))
+                    except Exception as e:
+                        logger.error(f'Синхронизация TMDB {sync_type.api}/{tmdb_id}: {e}', exc_info=True)
+                        run.failed += 1
+                        run.report['errors'][f'{sync_type.api}/{tmdb_id}'] = str(e)
+
+        run.status = TMDBSyncRun.DONE
+    except Exception as e:
+        run.status = TMDBSyncRun.FAILED
+        run.report['errors']['feed'] = str(e)
+        raise
+    finally:
+        run.api_calls = service.requests_made
+        run.finished_at = timezone.now()
+        if not dry_run:
+            run.save()
+    return run
@@ -0,0 +1,259 @@
+"""
+Массовый перевод полей UZ → AZ (команда translate_db_to_az).
+
+- Строки читаются потоком (iterator) пачками по pk, из БД берутся только
+  исходные, целевые поля и поля ключа поиска.
+- Для каждого переведённого поля хранится хеш исходного текста
+  (TranslationState); поле с тем же хешем пропускается. Хеши пишутся в
+  одной транзакции с переводом пачки, поэтому прерванный прогон при
+  повторном запуске продолжается с непереведённых строк.
+- Уникальные тексты пачки упаковываются по несколько в один запрос к
+  переводчику (через разделитель, до MAX_REQUEST_CHARS символов) и
+  переводятся параллельно в пуле потоков с общим ограничением частоты
+  запросов; повторяющиеся тексты (названия эпизодов, жанры) берутся из
+  кэша. Длинные тексты делятся по абзацам.
+- Результат записывается bulk_update только в целевые поля (и ключи поиска),
+  затем обновляются строки витрины.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import transaction
+from deep_translator import GoogleTranslator
+from .models import Genre, Country, Person, Movie, Series, Season, Episode, StaticPage, News, TranslationState
+from .search_keys import search_key
+from .catalog import MODEL_CONTENT_TYPES, refresh_entries, _refresh_by_relation
+
+logger = logging.getLogger(__name__)
+
+# Модель → {исходное поле: целевое поле}
+TRANSLATED_FIELDS = {
+    Genre: {'name_uz': 'name_az'},
+    Country: {'name_uz': 'name_az'},
+    Person: {'bio_uz': 'bio_az'},
+    Movie: {'title_uz': 'title_az', 'description_uz': 'description_az'},
+    Series: {'title_uz': 'title_az', 'description_uz': 'description_az'},
+    Season: {'title_uz': 'title_az', 'description_uz': 'description_az'},
+    Episode: {'title_uz': 'title_az', 'description_uz': 'description_az'},
+    StaticPage: {'title_uz': 'title_az', 'content_uz': 'content_az'},
+    News: {'title_uz': 'title_az', 'content_uz': 'content_az'},
+}
+
+# Ключи поиска и их исходные поля (как в save() моделей): bulk_update их не пересчитывает
+SEARCH_KEY_SOURCES = {
+    Genre: {'search_key': ('name_uz', 'name_az', 'name')},
+    Movie: {
+        'search_key': ('title_uz', 'title_az', 'original_title'),
+        'description_key': ('description_uz', 'description_az'),
+    },
+    Series: {
+        'search_key': ('title_uz', 'title_az', 'original_title'),
+        'description_key': ('description_uz', 'description_az'),
+    },
+}
+
+# Ограничение Google Translate — 5000 символов на запрос
+MAX_REQUEST_CHARS = 4500
+MAX_REQUEST_TEXTS = 50
+SEPARATOR = '\n|||\n'
+_SEPARATOR_RE = re.compile(r'\s*\|\|\|\s*')
+
+BATCH_SIZE = 500
+CACHE_SIZE = 20000
+
+
+def source_hash(text):
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def split_text(text):
+    """Части текста не длиннее MAX_REQUEST_CHARS (по абзацам, иначе по длине)."""
+    if len(text) <= MAX_REQUEST_CHARS:
+        return [text]
+    pieces, current = [], ''
+    for line in text.split('\n'):
+        while len(line) > MAX_REQUEST_CHARS:
+            pieces.extend(filter(None, [current]))
+            pieces.append(line[:MAX_REQUEST_CHARS])
+            current, line = '', line[MAX_REQUEST_CHARS:]
+        if current and len(current) + len(line) + 1 > MAX_REQUEST_CHARS:
+            pieces.append(current)
+            current = line
+        else:
+            current = f'{current}\n{line}' if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def pack(texts):
+    """Группы текстов для одного запроса: суммарно до MAX_REQUEST_CHARS символов."""
+    groups, group, size = [], [], 0
+    for text in texts:
+        if '|||' in text:
+            groups.append([text])
+            continue
+        if group and (size + len(text) + len(SEPARATOR) > MAX_REQUEST_CHARS or len(group) >= MAX_REQUEST_TEXTS):
+            groups.append(group)
+            group, size = [], 0
+        group.append(text)
+        size += len(text) + len(SEPARATOR)
+    if group:
+        groups.append(group)
+    return groups
+
+
+class RateLimiter:
+    """Не больше rate вызовов wait() в секунду на все потоки."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+            self.calls += 1
+        if at > now:
+            time.sleep(at - now)
+
+
+class TranslationEngine:
+    def __init__(self, source='uz', target='az', workers=None, rate_limit=None, force=False, log=None):
+        self.source = source
+        self.target = target
+        self.workers = workers or getattr(settings, 'TRANSLATION_WORKERS', 4)
+        self.limiter = RateLimiter(rate_limit if rate_limit is not None else getattr(settings, 'TRANSLATION_RATE_LIMIT', 5))
+        self.force = force
+        self.log = log or (lambda message: None)
+        self.cache = {}
+
+    @property
+    def requests_made(self):
+        return self.limiter.calls
+
+    def _request(self, text):
+        self.limiter.wait()
+        return GoogleTranslator(source=self.source, target=self.target).translate(text)
+
+    def _translate_group(self, group):
+        """{текст: перевод} для группы; при несовпадении числа частей — по одному тексту."""
+        if len(group) > 1:
+            try:
+                parts = _SEPARATOR_RE.split(self._request(SEPARATOR.join(group)).strip())
+                if len(parts) == len(group):
+                    return dict(zip(group, parts))
+            except Exception as e:
+                logger.warning(f'Пакетный перевод не удался, переводим по одному: {e}')
+        result = {}
+        for text in group:
+            try:
+                result[text] = self._request(text)
+            except Exception as e:
+                logger.error(f"Ошибка перевода '{text[:30]}...': {e}")
+        return result
+
+    def translate_texts(self, texts):
+        """{текст: перевод} для уникальных текстов; непереведённых в ответе нет."""
+        pieces = {text: split_text(text) for text in texts}
+        missing = list(dict.fromkeys(
+            piece for text_pieces in pieces.values() for piece in text_pieces if piece not in self.cache
+        ))
+        if missing:
+            if len(self.cache) > CACHE_SIZE:
+                self.cache.clear()
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for translated in pool.map(self._translate_group, pack(missing)):
+                    self.cache.update(translated)
+        return {
+            text: '\n'.join(self.cache[piece] for piece in text_pieces)
+            for text, text_pieces in pieces.items()
+            if all(piece in self.cache for piece in text_pieces)
+        }
+
+    def translate_model(self, model, fields, batch_size=BATCH_SIZE):
+        """Переводит поля модели; возвращает (переведено полей, без изменений, с ошибкой)."""
+        key_sources = SEARCH_KEY_SOURCES.get(model, {})
+        key_fields = {field for sources in key_sources.values() for field in sources}
+        queryset = model.objects.only('pk', *fields, *fields.values(), *key_fields).order_by('pk')
+        totals = [0, 0, 0]
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                self._add(totals, self._translate_batch(model, fields, key_sources, batch))
+                batch = []
+        if batch:
+            self._add(totals, self._translate_batch(model, fields, key_sources, batch))
+        return tuple(totals)
+
+    @staticmethod
+    def _add(totals, counts):
+        for position, count in enumerate(counts):
+            totals[position] += count
+
+    def _translate_batch(self, model, fields, key_sources, objects):
+        label = model._meta.label_lower
+        states = {}
+        if not self.force:
+            states = {
+                (object_id, field): digest for object_id, field, digest in TranslationState.objects.filter(
+                    model=label, object_id__in=[obj.pk for obj in objects]
+                ).values_list('object_id', 'field', 'source_hash')
+            }
+
+        pending, unchanged = [], 0
+        for obj in objects:
+            for source_field, target_field in fields.items():
+                text = getattr(obj, source_field)
+                if not text:
+                    continue
+                digest = source_hash(text)
+                if states.get((obj.pk, target_field)) == digest:
+                    unchanged += 1
+                    continue
+                pending.append((obj, target_field, text, digest))
+        if not pending:
+            return 0, unchanged, 0
+
+        translations = self.translate_texts({text for _, _, text, _ in pending})
+        changed, new_states, failed = {}, [], 0
+        for obj, target_field, text, digest in pending:
+            translated = translations.get(text)
+            if translated is None:
+                failed += 1
+                continue
+            max_length = model._meta.get_field(target_field).max_length
+            setattr(obj, target_field, translated[:max_length] if max_length else translated)
+            changed[obj.pk] = obj
+            new_states.append(TranslationState(model=label, object_id=obj.pk, field=target_field, source_hash=digest))
+
+        update_fields = list(fields.values())
+        for key_field, sources in key_sources.items():
+            update_fields.append(key_field)
+            for obj in changed.values():
+                setattr(obj, key_field, search_key(*(getattr(obj, field) for field in sources)))
+        with transaction.atomic():
+            model.objects.bulk_update(changed.values(), update_fields)
+            TranslationState.objects.bulk_create(
+                new_states,
+                update_conflicts=True,
+                unique_fields=['model', 'object_id', 'field'],
+                update_fields=['source_hash', 'translated_at'],
+            )
+
+        # bulk_update не отправляет post_save: строки витрины обновляются здесь
+        if model in MODEL_CONTENT_TYPES:
+            refresh_entries(MODEL_CONTENT_TYPES[model], list(changed))
+        elif model is Genre:
+            _refresh_by_relation('genres', list(changed))
+        self.log(f'  {model.__name__} до #{objects[-1].pk}: переведено {len(new_states)}, ошибок {failed}')
+        return len(new_states), unchanged, failed
@@ -0,0 +1,219 @@
+"""
+Загрузка больших видеофайлов по частям с докачкой (протокол в духе tus).
+
+- POST /api/v1/uploads/ {"type": "movie"|"episode", "filename", "size",
+  "object_id"?} — создаёт загрузку; итоговое имя файла выбирается сразу
+  (movies/..., episodes/videos/...), данные пишутся рядом в .part-файл.
+- HEAD/GET /api/v1/uploads/<id>/ — сколько байт уже принято (заголовок
+  Upload-Offset): после обрыва клиент продолжает с этого места.
+- PATCH /api/v1/uploads/<id>/ — очередная часть: Upload-Offset должен
+  совпадать с принятым (иначе 409), Upload-Checksum: sha256 <base64> —
+  контрольная сумма части (при несовпадении 460, часть не засчитывается).
+  Тело пишется потоком прямо в .part по смещению, без временных файлов.
+- DELETE — отмена, .part удаляется.
+
+Когда принят последний байт, .part переименовывается в итоговое имя
+(os.replace, без копирования) и, если указан object_id, файл
+прикрепляется к фильму или эпизоду. Без object_id файл прикрепляет форма
+админки (ResumableFileInput) при сохранении. Части разных файлов
+принимаются независимо, поэтому эпизоды сезона грузятся параллельно.
+"""
+import base64
+import hashlib
+import logging
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from .models import Movie, Episode, VideoUpload
+
+logger = logging.getLogger(__name__)
+
+# Тип загрузки → (модель, поле)
+UPLOAD_TARGETS = {
+    'movie': (Movie, 'video_file'),
+    'episode': (Episode, 'video_file'),
+}
+
+READ_SIZE = 1024 * 1024
+
+
+# Код tus для испорченной части; в http.HTTPStatus его нет
+CHECKSUM_MISMATCH = 460
+
+
+class UploadError(Exception):
+    """Ошибка протокола; status — HTTP-код ответа."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def reason(self):
+        return 'Checksum Mismatch' if self.status == CHECKSUM_MISMATCH else None
+
+
+def target_field(content_type):
+    model, field_name = UPLOAD_TARGETS[content_type]
+    return model._meta.get_field(field_name)
+
+
+def _path(name):
+    return default_storage.path(name)
+
+
+def create_upload(content_type, filename, size, object_id=None, user=None):
+    if content_type not in UPLOAD_TARGETS:
+        raise UploadError('type must be movie or episode')
+    if size <= 0:
+        raise UploadError('size must be positive')
+    model, _ = UPLOAD_TARGETS[content_type]
+    if object_id is not None and not model.objects.filter(pk=object_id).exists():
+        raise UploadError(f'{content_type} {object_id} not found', status=404)
+
+    field = target_field(content_type)
+    name = default_storage.get_available_name(
+        field.generate_filename(None, os.path.basename(filename)), max_length=field.max_length
+    )
+    upload = VideoUpload.objects.create(
+        content_type=content_type,
+        object_id=object_id,
+        filename=filename[:255],
+        size=size,
+        name=name,
+        created_by=user if user and user.is_authenticated else None,
+    )
+    part = _path(upload.part_name)
+    os.makedirs(os.path.dirname(part), exist_ok=True)
+    open(part, 'wb').close()
+    return upload
+
+
+def _parse_checksum(header):
+    """'sha256 <base64>' → bytes дайджеста или None, если заголовка нет."""
+    if not header:
+        return None
+    algorithm, _, value = header.partition(' ')
+    if algorithm.lower() != 'sha256':
+        raise UploadError('only sha256 checksums are supported')
+    try:
+        return base64.b64decode(value.strip(), validate=True)
+    except ValueError:
+        raise UploadError('checksum is not valid base64')
+
+
+def write_chunk(upload, offset, length, stream, checksum_header=None):
+    """
+    Пишет часть из stream (length байт) по смещению offset. Возвращает
+    загрузку с новым смещением (и завершённую, если это была последняя часть).
+    """
+    if upload.status != VideoUpload.UPLOADING:
+        raise UploadError('upload is not in progress', status=409)
+    if offset != upload.offset:
+        raise UploadError(f'offset mismatch: expected {upload.offset}', status=409)
+    if length > settings.VIDEO_UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError('chunk is too large', status=413)
+    if offset + length > upload.size:
+        raise UploadError('chunk exceeds declared size', status=413)
+    expected = _parse_checksum(checksum_header)
+
+    digest = hashlib.sha256()
+    received = 0
+    with open(_path(upload.part_name), 'r+b') as part:
+        part.seek(offset)
+        while received < length:
+            data = stream.read(min(READ_SIZE, length - received))
+            if not data:
+                break
+            digest.update(data)
+            part.write(data)
+            received += len(data)
+    if received != length:
+        # Соединение оборвалось: смещение не двигаем, часть придёт заново
+        raise UploadError('incomplete chunk', status=400)
+    if expected is not None and digest.digest() != expected:
+        raise UploadError('checksum mismatch', status=CHECKSUM_MISMATCH)
+
+    # Параллельный запрос с тем же смещением мог успеть раньше
+    updated = VideoUpload.objects.filter(pk=upload.pk, offset=offset, status=VideoUpload.UPLOADING).update(
+        offset=offset + length, updated_at=timezone.now()
+    )
+    if not updated:
+        raise UploadError('offset changed by a concurrent request', status=409)
+    upload.offset = offset + length
+    if upload.offset == upload.size:
+        finish_upload(upload)
+    return upload
+
+
+def finish_upload(upload):
+    """Переименовывает .part в итоговый файл и прикрепляет его к объекту, если он указан."""
+    part = _path(upload.part_name)
+    with open(part, 'r+b') as file:
+        # Лишние байты от оборванных параллельных запросов
+        file.truncate(upload.size)
+    if default_storage.exists(upload.name):
+        field = target_field(upload.content_type)
+        upload.name = default_storage.get_available_name(upload.name, max_length=field.max_length)
+    os.replace(part, _path(upload.name))
+    upload.status = VideoUpload.DONE
+    upload.save(update_fields=['name', 'status', 'updated_at'])
+
+    if upload.object_id is not None:
+        model, field_name = UPLOAD_TARGETS[upload.content_type]
+        with transaction.atomic():
+            obj = model.objects.select_for_update().filter(pk=upload.object_id).first()
+            if obj is None:
+                logger.warning(f"Загрузка #{upload.pk}: {upload.content_type} {upload.object_id} удалён, файл не прикреплён")
+                return
+            setattr(obj, field_name, upload.name)
+            obj.save(update_fields=[field_name])
+        logger.info(f"Загрузка #{upload.pk}: '{upload.name}' прикреплён к {upload.content_type} {upload.object_id}")
+
+
+def cancel_upload(upload):
+    if upload.status == VideoUpload.UPLOADING:
+        try:
+            os.remove(_path(upload.part_name))
+        except FileNotFoundError:
+            pass
+    upload.status = VideoUpload.CANCELLED
+    upload.save(update_fields=['status', 'updated_at'])
+
+
+def completed_file(content_type, upload_id):
+    """
+    Загруженный файл для формы админки: FieldFile, уже лежащий в хранилище
+    (модель при сохранении его не копирует), или None.
+    """
+    upload = VideoUpload.objects.filter(pk=upload_id, content_type=content_type, status=VideoUpload.DONE).first()
+    if upload is None:
+        return None
+    return FieldFile(None, target_field(content_type), upload.name)
+
+
+def active_part_names():
+    """.part незавершённых загрузок, которые ещё могут докачать (для sweep_media)."""
+    expires = timezone.now() - timedelta(hours=getattr(settings, 'VIDEO_UPLOAD_EXPIRY_HOURS', 7 * 24))
+    return {
+        upload.part_name for upload in VideoUpload.objects.filter(
+            status=VideoUpload.UPLOADING, updated_at__gte=expires
+        ).only('pk', 'name')
+    }
+
+
+def upload_payload(upload):
+    return {
+        'id': upload.pk,
+        'type': upload.content_type,
+        'object_id': upload.object_id,
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'status': upload.status,
+        'name': upload.name if upload.status == VideoUpload.DONE else None,
+    }
@@ -0,0 +1,209 @@
+"""
+Обработка видеофайла после загрузки (ffprobe/ffmpeg в фоновом пуле потоков).
+
+- ffprobe: длительность, разрешение, битрейт и кодеки записываются в поля
+  VideoMetadata фильма или эпизода; duration (минуты) больше не вводится
+  вручную.
+- faststart: если в MP4/MOV атом moov лежит после mdat, браузер перед
+  началом воспроизведения запрашивает хвост файла отдельным Range-запросом.
+  ffmpeg -c copy -movflags +faststart переносит moov в начало без
+  перекодирования; результат пишется рядом и заменяет оригинал через
+  os.replace, имя файла в БД не меняется.
+- для эпизода без кадра (still_image) извлекается кадр из видео.
+
+Обработка запускается после коммита сохранения с новым video_file (загрузка
+по частям, форма админки) и пропускается, если этот файл уже обработан
+(поле video_processed). Для уже загруженных файлов — команда process_videos.
+"""
+import json
+import logging
+import os
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.signals import post_save
+from .models import Movie, Episode
+
+logger = logging.getLogger(__name__)
+
+VIDEO_MODELS = [Movie, Episode]
+
+# Контейнеры, в которых moov можно перенести; расширение → формат ffmpeg
+FASTSTART_FORMATS = {'.mp4': 'mp4', '.m4v': 'mp4', '.mov': 'mov'}
+
+# Кадр для эпизода берётся с этой доли длительности (после заставки)
+STILL_POSITION = 0.1
+
+PROBE_TIMEOUT = 60
+
+_executor = None
+
+
+def _run(args, timeout):
+    return subprocess.run(args, capture_output=True, check=True, timeout=timeout)
+
+
+def probe(path):
+    """Сведения о файле из ffprobe: {поле VideoMetadata: значение}."""
+    result = _run([
+        getattr(settings, 'FFPROBE_BINARY', 'ffprobe'), '-v', 'error', '-print_format', 'json',
+        '-show_format', '-show_streams', path,
+    ], timeout=PROBE_TIMEOUT)
+    data = json.loads(result.stdout or b'{}')
+    container = data.get('format', {})
+    streams = data.get('streams', [])
+    video = next((
+        stream for stream in streams
+        if stream.get('codec_type') == 'video' and not stream.get('disposition', {}).get('attached_pic')
+    ), {})
+    audio = next((stream for stream in streams if stream.get('codec_type') == 'audio'), {})
+    duration = container.get('duration') or video.get('duration')
+    bitrate = container.get('bit_rate')
+    return {
+        'video_duration': round(float(duration)) if duration else None,
+        'video_width': video.get('width'),
+        'video_height': video.get('height'),
+        'video_bitrate': int(bitrate) if bitrate else None,
+        'video_codec': video.get('codec_name', '')[:32],
+        'audio_codec': audio.get('codec_name', '')[:32],
+    }
+
+
+def moov_first(path):
+    """
+    True, если атом moov стоит перед mdat, False — если после, None — если
+    это не MP4/QuickTime. Читаются только заголовки атомов верхнего уровня.
+    """
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        offset = 0
+        while offset + 8 <= size:
+            file.seek(offset)
+            atom_size, kind = struct.unpack('>I4s', file.read(8))
+            if atom_size == 1:
+                # 64-битный размер сразу после типа
+                atom_size = struct.unpack('>Q', file.read(8))[0]
+            elif atom_size == 0:
+                # Атом до конца файла
+                atom_size = size - offset
+            if kind == b'moov':
+                return True
+            if kind == b'mdat':
+                return False
+            if atom_size < 8:
+                return None
+            offset += atom_size
+    return None
+
+
+def faststart(path):
+    """Переносит moov в начало файла без перекодирования; оригинал заменяется атомарно."""
+    container = FASTSTART_FORMATS[os.path.splitext(path)[1].lower()]
+    target = f'{path}.faststart.part'
+    try:
+        _run([
+            getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'), '-v', 'error', '-y', '-i', path,
+            '-map', '0:v', '-map', '0:a?', '-map', '0:s?', '-c', 'copy',
+            '-movflags', '+faststart', '-f', container, target,
+        ], timeout=getattr(settings, 'VIDEO_PROCESSING_TIMEOUT', 3600))
+        # Уже открытые отдачи дочитывают старый файл, новые получают перенесённый
+        os.replace(target, path)
+    finally:
+        if os.path.exists(target):
+            os.remove(target)
+
+
+def extract_still(path, duration):
+    """JPEG-кадр из видео (байты) или None."""
+    position = (duration or 0) * STILL_POSITION
+    result = _run([
+        getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'), '-v', 'error', '-ss', f'{position:.2f}', '-i', path,
+        '-frames:v', '1', '-q:v', '2', '-f', 'image2', '-c:v', 'mjpeg', 'pipe:1',
+    ], timeout=PROBE_TIMEOUT)
+    return result.stdout or None
+
+
+def process_video(model, pk, force=False):
+    """
+    Обрабатывает video_file объекта. Возвращает None, если обрабатывать
+    нечего, иначе True/False — был ли перенесён moov.
+    """
+    obj = model._base_manager.filter(pk=pk).first()
+    if obj is None or not obj.video_file or (obj.video_processed == obj.video_file.name and not force):
+        return None
+    name = obj.video_file.name
+    path = obj.video_file.path
+
+    metadata = probe(path)
+    relocated = False
+    if os.path.splitext(path)[1].lower() in FASTSTART_FORMATS and moov_first(path) is False:
+        faststart(path)
+        relocated = True
+    still = None
+    if model is Episode and not obj.still_image and metadata['video_width']:
+        still = extract_still(path, metadata['video_duration'])
+
+    with transaction.atomic():
+        current = model._base_manager.select_for_update().filter(pk=pk).first()
+        if current is None or current.video_file.name != name:
+            # Объект удалён или файл заменён, пока шла обработка
+            return relocated
+        update_fields = [*metadata, 'video_processed']
+        for field, value in metadata.items():
+            setattr(current, field, value)
+        current.video_processed = name
+        if metadata['video_duration']:
+            current.duration = max(round(metadata['video_duration'] / 60), 1)
+            update_fields.append('duration')
+        if still and not current.still_image:
+            current.still_image.save(f'still_{pk}.jpg', ContentFile(still), save=False)
+            update_fields.append('still_image')
+        current.save(update_fields=update_fields)
+
+    logger.info(
+        f"Видео '{name}': {metadata['video_width']}x{metadata['video_height']}, "
+        f"{metadata['video_codec']}/{metadata['audio_codec']}, {metadata['video_duration']} с"
+        f"{', moov перенесён в начало' if relocated else ''}"
+    )
+    return relocated
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'VIDEO_PROCESSING_WORKERS', 1),
+            thread_name_prefix='video-processing'
+        )
+    return _executor
+
+
+def _safe_process(model, pk):
+    try:
+        process_video(model, pk)
+    except FileNotFoundError as e:
+        logger.warning(f"Обработка видео {model.__name__} {pk} пропущена: {e}")
+    except subprocess.CalledProcessError as e:
+        stderr = e.stderr.decode(errors='replace').strip() if e.stderr else ''
+        logger.error(f"Ошибка ffmpeg/ffprobe для {model.__name__} {pk}: {stderr or e}")
+    except Exception as e:
+        logger.error(f"Ошибка обработки видео {model.__name__} {pk}: {e}", exc_info=True)
+
+
+def schedule_processing(model, pk):
+    """Ставит обработку в пул потоков после коммита текущей транзакции."""
+    transaction.on_commit(lambda: _get_executor().submit(_safe_process, model, pk))
+
+
+def process_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and 'video_file' not in update_fields):
+        return
+    if instance.video_file and instance.video_file.name != instance.video_processed:
+        schedule_processing(sender, instance.pk)
+
+
+for _model in VIDEO_MODELS:
+    post_save.connect(process_on_save, sender=_model, dispatch_uid=f'video_processing_{_model.__name__}')
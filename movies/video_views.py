@@ -1,22 +1,127 @@
-from ranged_response import RangedFileResponse
-from django.shortcuts import get_object_or_404
+"""
+Отдача видеофайлов с поддержкой Range (перемотка в плеере).
+
+Представления асинхронные: под ASGI файл читается кусками в потоках
+пула (asyncio.to_thread), и медленный клиент не занимает поток воркера
+на всё время скачивания. Под WSGI ответ отдаётся синхронным итератором
+по тем же кускам — асинхронный итератор Django под WSGI сначала
+прочитал бы весь файл в память.
+"""
+import asyncio
+import os
+import re
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from .models import Movie, Episode
 
-def serve_movie_video(request, slug):
-    movie = get_object_or_404(Movie, slug=slug)
-    # Предполагается, что у модели Movie есть поле video_file
-    response = RangedFileResponse(request, open(movie.video_file.path, 'rb'), content_type='video/mp4')
-    response['Content-Disposition'] = f'inline; filename="{movie.video_file.name}"'
-    return response
+VIDEO_CHUNK_SIZE = 512 * 1024
+VIDEO_CONTENT_TYPE = 'video/mp4'
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Диапазон (start, end) включительно из заголовка Range или None, если
+    заголовка нет или он не разобран (тогда отдаётся весь файл).
+    Составные диапазоны не поддерживаются и тоже дают весь файл.
+    """
+    match = _RANGE.match((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — последние N байт
+        length = int(last)
+        if not length:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _read_chunks(path, start, length):
+    with open(path, 'rb') as video:
+        video.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = video.read(min(VIDEO_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
 
-def serve_episode_video(request, series_slug, season_num, episode_num):
-    episode = get_object_or_404(
-        Episode, 
-        season__series__slug=series_slug, 
-        season__season_number=season_num, 
-        episode_number=episode_num
+
+async def _aread_chunks(path, start, length):
+    video = await asyncio.to_thread(open, path, 'rb')
+    try:
+        await asyncio.to_thread(video.seek, start)
+        remaining = length
+        while remaining > 0:
+            chunk = await asyncio.to_thread(video.read, min(VIDEO_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        video.close()
+
+
+async def stream_video(request, field_file):
+    """Ответ 200/206/416 для файла field_file с учётом заголовка Range."""
+    if not field_file:
+        raise Http404('Видеофайл не загружен')
+    path = field_file.path
+    try:
+        size = await asyncio.to_thread(os.path.getsize, path)
+    except OSError:
+        raise Http404('Видеофайл не найден')
+
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+    chunks = _aread_chunks if isinstance(request, ASGIRequest) else _read_chunks
+    response = StreamingHttpResponse(
+        chunks(path, start, length), status=206 if byte_range else 200, content_type=VIDEO_CONTENT_TYPE
     )
-    # Предполагается, что у модели Episode есть поле video_file
-    response = RangedFileResponse(request, open(episode.video_file.path, 'rb'), content_type='video/mp4')
-    response['Content-Disposition'] = f'inline; filename="{episode.video_file.name}"'
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = f'inline; filename="{os.path.basename(field_file.name)}"'
     return response
+
+
+async def serve_movie_video(request, slug):
+    try:
+        movie = await Movie.objects.only('video_file').aget(slug=slug)
+    except Movie.DoesNotExist:
+        raise Http404('Фильм не найден')
+    return await stream_video(request, movie.video_file)
+
+
+async def serve_episode_video(request, series_slug, season_num, episode_num):
+    try:
+        episode = await Episode.objects.only('video_file').aget(
+            season__series__slug=series_slug,
+            season__season_number=season_num,
+            episode_number=episode_num
+        )
+    except Episode.DoesNotExist:
+        raise Http404('Эпизод не найден')
+    return await stream_video(request, episode.video_file)
@@ -1,49 +1,51 @@
 """
 Views for movies app.
 """
+from asgiref.sync import sync_to_async
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q, Avg
+from django.db.models import Q, Avg, F
 from django.core.paginator import Paginator
 from django.utils.translation import get_language
 from django.views.decorators.cache import cache_page
 from .models import Movie, Series, Genre, Country, News, Comment, Rating, StaticPage
 from .filters import MovieFilter, SeriesFilter
+from .catalog import catalog_entries
+from .facets import compute_facets, annotate_options, decade_buckets
+from .catalog_index import filtered_catalog
+from .search_keys import fold, person_content_ids
+from .comment_threads import load_threads, paginate_threads, count_comments
 from users.models import UserActivity
+from users.library_service import get_request_library
 
 
 class HomeView(ListView):
     """Главная страница с каталогом."""
-    model = Movie
     template_name = 'movies/index.html'
     context_object_name = 'movies'
     paginate_by = 20
     
     def get_queryset(self):
-        return Movie.objects.filter(is_published=True).select_related().prefetch_related(
-            'genres', 'countries', 'directors', 'actors'
-        ).order_by('-created_at')
+        # Списки читаются из витрины каталога без JOIN и prefetch
+        return catalog_entries('movie').order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Рекомендуемые фильмы для слайдера
+        # Рекомендуемые фильмы для слайдера (нужны описание и фон)
         context['featured_movies'] = Movie.objects.filter(
             is_published=True,
             is_featured=True
         ).order_by('-rating_avg')[:5]
         
         # Популярные фильмы
-        context['popular_movies'] = Movie.objects.filter(
-            is_published=True
-        ).order_by('-views')[:12]
+        context['popular_movies'] = catalog_entries('movie').order_by('-views')[:12]
         
         # Новые сериалы
-        context['new_series'] = Series.objects.filter(
-            is_published=True
-        ).order_by('-created_at')[:8]
+        context['new_series'] = catalog_entries('series').order_by('-created_at')[:8]
         
         # Жанры для фильтра
         context['genres'] = Genre.objects.all()
@@ -57,49 +59,74 @@ class HomeView(ListView):
 
 class MovieListView(ListView):
     """Список фильмов с фильтрацией."""
-    model = Movie
     template_name = 'movies/movie_list.html'
     context_object_name = 'movies'
     paginate_by = 20
     
     def get_queryset(self):
-        queryset = Movie.objects.filter(is_published=True).select_related().prefetch_related(
-            'genres', 'countries'
-        )
-        self.filterset = MovieFilter(self.request.GET, queryset=queryset)
-        return self.filterset.qs.order_by('-created_at')
+        self.filterset = MovieFilter(self.request.GET, queryset=catalog_entries('movie'))
+        # Фильтры считаются по индексу в памяти, из БД читается только страница
+        return filtered_catalog(self.filterset, 'movie')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['filter'] = self.filterset
-        context['genres'] = Genre.objects.all()
-        context['countries'] = Country.objects.all()
+        # Счётчики фасетов одним запросом (кэшируются по комбинации фильтров)
+        facets = compute_facets(MovieFilter, self.request.GET, 'movie')
+        context['genres'] = annotate_options(Genre.objects.all(), facets['genres'])
+        context['countries'] = annotate_options(Country.objects.all(), facets['countries'])
+        context['year_buckets'] = decade_buckets(facets['decades'], self.request.GET)
         return context
 
 
 class SeriesListView(ListView):
     """Список сериалов с фильтрацией."""
-    model = Series
     template_name = 'movies/series_list.html'
     context_object_name = 'series'
     paginate_by = 20
     
     def get_queryset(self):
-        queryset = Series.objects.filter(is_published=True).select_related().prefetch_related(
-            'genres', 'countries'
-        )
-        self.filterset = SeriesFilter(self.request.GET, queryset=queryset)
-        return self.filterset.qs.order_by('-created_at')
+        self.filterset = SeriesFilter(self.request.GET, queryset=catalog_entries('series'))
+        # Фильтры считаются по индексу в памяти, из БД читается только страница
+        return filtered_catalog(self.filterset, 'series')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['filter'] = self.filterset
-        context['genres'] = Genre.objects.all()
-        context['countries'] = Country.objects.all()
+        # Счётчики фасетов одним запросом (кэшируются по комбинации фильтров)
+        facets = compute_facets(SeriesFilter, self.request.GET, 'series')
+        context['genres'] = annotate_options(Genre.objects.all(), facets['genres'])
+        context['countries'] = annotate_options(Country.objects.all(), facets['countries'])
+        context['year_buckets'] = decade_buckets(facets['decades'], self.request.GET)
         return context
 
 
-class MovieDetailView(DetailView):
+class AsyncDetailMixin:
+    """
+    Асинхронный get() детальной страницы.
+
+    Объект ищется через асинхронный ORM; контекст и шаблон (синхронные
+    помощники и ленивые QuerySet в шаблоне) собираются одним переходом
+    в поток, а запись активности пользователя идёт после рендеринга.
+    """
+    activity = None
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            self.object = await self.get_queryset().aget(slug=kwargs[self.slug_url_kwarg])
+        except self.model.DoesNotExist:
+            raise Http404(f'{self.model._meta.verbose_name} не найден')
+        response = await sync_to_async(self.render_page)()
+        if self.activity:
+            await UserActivity.objects.acreate(**self.activity)
+        return response
+
+    def render_page(self):
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context).render()
+
+
+class MovieDetailView(AsyncDetailMixin, DetailView):
     """Детальная страница фильма."""
     model = Movie
     template_name = 'movies/movie_detail.html'
@@ -107,7 +134,7 @@ class MovieDetailView(DetailView):
     
     def get_queryset(self):
         return Movie.objects.filter(is_published=True).prefetch_related(
-            'genres', 'countries', 'directors', 'actors', 'comments'
+            'genres', 'countries', 'directors', 'actors'
         )
     
     def get_context_data(self, **kwargs):
@@ -118,21 +145,18 @@ class MovieDetailView(DetailView):
         self.request.content_object = movie
         
         # Комментарии (только одобренные)
-        context['comments'] = movie.comments.filter(is_approved=True).select_related('user')
+        threads = load_threads('movie', movie.id)
+        context['comments'] = paginate_threads(threads, self.request.GET.get('comments_page'))
+        context['comments_count'] = count_comments(threads)
         
         # Рейтинг пользователя
         if self.request.user.is_authenticated:
-            try:
-                context['user_rating'] = Rating.objects.get(
-                    user=self.request.user,
-                    movie=movie
-                ).score
-            except Rating.DoesNotExist:
-                context['user_rating'] = None
+            library = get_request_library(self.request)
+            context['user_rating'] = library.user_rating('movie', movie.id)
             
             # Проверка избранного
-            context['is_favorite'] = self.request.user.profile.favorite_movies.filter(id=movie.id).exists()
-            context['in_watchlist'] = self.request.user.profile.watchlist_movies.filter(id=movie.id).exists()
+            context['is_favorite'] = library.is_favorite('movie', movie.id)
+            context['in_watchlist'] = library.in_watchlist('movie', movie.id)
         
         # Похожие фильмы (по жанрам)
         movie_genres = movie.genres.all()
@@ -141,9 +165,9 @@ class MovieDetailView(DetailView):
             genres__in=movie_genres
         ).exclude(id=movie.id).distinct().order_by('-rating_avg')[:6]
         
-        # Запись активности
+        # Запись активности (создаётся в get() после рендеринга)
         if self.request.user.is_authenticated:
-            UserActivity.objects.create(
+            self.activity = dict(
                 user=self.request.user,
                 activity_type='view',
                 content_type='movie',
@@ -154,7 +178,7 @@ class MovieDetailView(DetailView):
         return context
 
 
-class SeriesDetailView(DetailView):
+class SeriesDetailView(AsyncDetailMixin, DetailView):
     """Детальная страница сериала."""
     model = Series
     template_name = 'movies/series_detail.html'
@@ -162,7 +186,7 @@ class SeriesDetailView(DetailView):
     
     def get_queryset(self):
         return Series.objects.filter(is_published=True).prefetch_related(
-            'genres', 'countries', 'directors', 'actors', 'seasons__episodes', 'comments'
+            'genres', 'countries', 'directors', 'actors', 'seasons__episodes'
         )
     
     def get_context_data(self, **kwargs):
@@ -176,21 +200,18 @@ class SeriesDetailView(DetailView):
         context['seasons'] = series.seasons.all().prefetch_related('episodes')
         
         # Комментарии (только одобренные)
-        context['comments'] = series.comments.filter(is_approved=True).select_related('user')
+        threads = load_threads('series', series.id)
+        context['comments'] = paginate_threads(threads, self.request.GET.get('comments_page'))
+        context['comments_count'] = count_comments(threads)
         
         # Рейтинг пользователя
         if self.request.user.is_authenticated:
-            try:
-                context['user_rating'] = Rating.objects.get(
-                    user=self.request.user,
-                    series=series
-                ).score
-            except Rating.DoesNotExist:
-                context['user_rating'] = None
+            library = get_request_library(self.request)
+            context['user_rating'] = library.user_rating('series', series.id)
             
             # Проверка избранного
-            context['is_favorite'] = self.request.user.profile.favorite_series.filter(id=series.id).exists()
-            context['in_watchlist'] = self.request.user.profile.watchlist_series.filter(id=series.id).exists()
+            context['is_favorite'] = library.is_favorite('series', series.id)
+            context['in_watchlist'] = library.in_watchlist('series', series.id)
         
         # Похожие сериалы
         series_genres = series.genres.all()
@@ -199,9 +220,9 @@ class SeriesDetailView(DetailView):
             genres__in=series_genres
         ).exclude(id=series.id).distinct().order_by('-rating_avg')[:6]
         
-        # Запись активности
+        # Запись активности (создаётся в get() после рендеринга)
         if self.request.user.is_authenticated:
-            UserActivity.objects.create(
+            self.activity = dict(
                 user=self.request.user,
                 activity_type='view',
                 content_type='series',
@@ -225,19 +246,27 @@ class SearchView(ListView):
         if not query:
             return []
         
-        # Поиск по фильмам
-        movies_q = Q(title_az__icontains=query) | Q(title_uz__icontains=query) | Q(original_title__icontains=query)
-        movies_q |= Q(description_az__icontains=query) | Q(description_uz__icontains=query)
-        movies_q |= Q(actors__name__icontains=query) | Q(directors__name__icontains=query)
-        
+        # Поиск по свёрнутым ключам названий и описаний (латиница/кириллица, диакритика) и по ключам персон
+        key = fold(query)
+        if not key:
+            return []
+
         results = []
         
         if content_type in ['all', 'movie']:
-            movies = Movie.objects.filter(movies_q, is_published=True).distinct()
+            movies = Movie.objects.filter(
+                Q(search_key__contains=key) | Q(description_key__contains=key)
+                | Q(pk__in=person_content_ids(Movie, key)),
+                is_published=True
+            )
             results.extend([{'type': 'movie', 'object': m} for m in movies])
         
         if content_type in ['all', 'series']:
-            series = Series.objects.filter(movies_q, is_published=True).distinct()
+            series = Series.objects.filter(
+                Q(search_key__contains=key) | Q(description_key__contains=key)
+                | Q(pk__in=person_content_ids(Series, key)),
+                is_published=True
+            )
             results.extend([{'type': 'series', 'object': s} for s in series])
         
         return results
@@ -258,35 +287,10 @@ class GenreView(ListView):
     def get_queryset(self):
         self.genre = get_object_or_404(Genre, slug=self.kwargs['slug'])
         
-        # Получаем фильмы и сериалы как объекты
-        movies = Movie.objects.filter(genres=self.genre, is_published=True).select_related().prefetch_related('genres')
-        series = Series.objects.filter(genres=self.genre, is_published=True).select_related().prefetch_related('genres')
-        
-        # Объединяем и сортируем
-        content_list = []
-        
-        # Добавляем фильмы
-        for movie in movies:
-            content_list.append({
-                'object': movie,
-                'content_type': 'movie',
-                'year': movie.year,
-                'rating_avg': movie.rating_avg
-            })
-        
-        # Добавляем сериалы
-        for series in series:
-            content_list.append({
-                'object': series,
-                'content_type': 'series', 
-                'year': series.year,
-                'rating_avg': series.rating_avg
-            })
-        
-        # Сортируем по году
-        content_list.sort(key=lambda x: x['year'] if x['year'] else 0, reverse=True)
-        
-        return content_list
+        # Фильмы и сериалы жанра из витрины каталога, новые по году первыми
+        return catalog_entries().filter(genre_ids__contains=[self.genre.pk]).order_by(
+            F('year').desc(nulls_last=True), '-created_at'
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
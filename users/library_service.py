@@ -0,0 +1,241 @@
+"""
+Состояние библиотеки пользователя (избранное, список к просмотру, оценки).
+
+Множества id загружаются одним запросом на связь и кэшируются под номером
+версии. Любое изменение избранного, списка или оценки увеличивает версию,
+поэтому старые записи кэша просто перестают читаться.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+from movies.models import Movie, Series, Rating
+from .models import UserProfile
+
+LIBRARY_CACHE_TIMEOUT = 60 * 60 * 24
+
+CONTENT_TYPES = ('movie', 'series')
+
+CONTENT_MODELS = {
+    'movie': Movie,
+    'series': Series,
+}
+
+# Связь профиля -> (тип контента, поле id контента в through-таблице)
+LIBRARY_RELATIONS = {
+    'favorites': {
+        'movie': (UserProfile.favorite_movies.through, 'movie_id'),
+        'series': (UserProfile.favorite_series.through, 'series_id'),
+    },
+    'watchlist': {
+        'movie': (UserProfile.watchlist_movies.through, 'movie_id'),
+        'series': (UserProfile.watchlist_series.through, 'series_id'),
+    },
+}
+
+
+def version_cache_key(user_id):
+    return f'library:version:{user_id}'
+
+
+def state_cache_key(user_id, version):
+    return f'library:state:{user_id}:{version}'
+
+
+def get_version(user_id):
+    """Текущая версия библиотеки пользователя."""
+    key = version_cache_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Начальное значение от времени, чтобы после вытеснения ключа
+        # версия не совпала с уже закэшированным старым состоянием.
+        version = int(time.time() * 1000)
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def bump_version(user_id):
+    """Инвалидирует закэшированное состояние библиотеки пользователя."""
+    key = version_cache_key(user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+        return version
+
+
+class LibraryState:
+    """Множества id избранного, списка к просмотру и оценок пользователя."""
+
+    def __init__(self, version=0, favorites=None, watchlist=None, ratings=None):
+        self.version = version
+        self.favorites = {t: frozenset((favorites or {}).get(t, ())) for t in CONTENT_TYPES}
+        self.watchlist = {t: frozenset((watchlist or {}).get(t, ())) for t in CONTENT_TYPES}
+        self.ratings = {t: dict((ratings or {}).get(t, {})) for t in CONTENT_TYPES}
+
+    def is_favorite(self, content_type, content_id):
+        return content_id in self.favorites.get(content_type, ())
+
+    def in_watchlist(self, content_type, content_id):
+        return content_id in self.watchlist.get(content_type, ())
+
+    def user_rating(self, content_type, content_id):
+        return self.ratings.get(content_type, {}).get(content_id)
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'favorites': {t: sorted(ids) for t, ids in self.favorites.items()},
+            'watchlist': {t: sorted(ids) for t, ids in self.watchlist.items()},
+            'ratings': {t: dict(scores) for t, scores in self.ratings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            version=data['version'],
+            favorites=data['favorites'],
+            watchlist=data['watchlist'],
+            ratings=data['ratings'],
+        )
+
+
+EMPTY_LIBRARY = LibraryState()
+
+
+def _load_state(user, version):
+    """Загружает состояние из БД: по одному запросу на связь и один на оценки."""
+    profile_id = user.profile.pk
+    data = {'version': version, 'favorites': {}, 'watchlist': {}, 'ratings': {'movie': {}, 'series': {}}}
+
+    for relation, by_type in LIBRARY_RELATIONS.items():
+        for content_type, (through, field) in by_type.items():
+            data[relation][content_type] = list(
+                through.objects.filter(userprofile_id=profile_id).values_list(field, flat=True)
+            )
+
+    for movie_id, series_id, score in Rating.objects.filter(user=user).values_list('movie_id', 'series_id', 'score'):
+        if movie_id:
+            data['ratings']['movie'][movie_id] = score
+        elif series_id:
+            data['ratings']['series'][series_id] = score
+
+    return data
+
+
+def get_library_state(user):
+    """Возвращает LibraryState пользователя (из кэша или из БД)."""
+    if not user or not user.is_authenticated:
+        return EMPTY_LIBRARY
+
+    version = get_version(user.pk)
+    key = state_cache_key(user.pk, version)
+    data = cache.get(key)
+    if data is None:
+        data = _load_state(user, version)
+        cache.set(key, data, LIBRARY_CACHE_TIMEOUT)
+    return LibraryState.from_dict(data)
+
+
+def get_request_library(request):
+    """Состояние библиотеки, загружаемое не более одного раза за запрос."""
+    if not hasattr(request, '_library_state'):
+        request._library_state = get_library_state(getattr(request, 'user', None))
+    return request._library_state
+
+
+def add_to_library(profile, relation, content_type, content_ids):
+    """
+    Идемпотентно добавляет контент в избранное/список к просмотру.
+    Одна вставка в through-таблицу с ON CONFLICT DO NOTHING; повторный
+    запрос ничего не меняет. Возвращает новую версию библиотеки.
+    Что тайтлы существуют и опубликованы, проверяет вызывающий код.
+    """
+    through, field = LIBRARY_RELATIONS[relation][content_type]
+    with transaction.atomic():
+        through.objects.bulk_create(
+            [through(**{'userprofile_id': profile.pk, field: content_id}) for content_id in content_ids],
+            ignore_conflicts=True
+        )
+    return bump_version(profile.user_id)
+
+
+def remove_from_library(profile, relation, content_type, content_ids):
+    """
+    Идемпотентно удаляет контент из избранного/списка к просмотру одним DELETE.
+    Возвращает новую версию библиотеки.
+    """
+    through, field = LIBRARY_RELATIONS[relation][content_type]
+    through.objects.filter(userprofile_id=profile.pk, **{f'{field}__in': content_ids}).delete()
+    return bump_version(profile.user_id)
+
+
+def toggle_in_library(profile, relation, content_type, content_id):
+    """
+    Переключение для старых клиентов: сначала DELETE, и только если
+    удалять было нечего — INSERT. Возвращает True, если элемент добавлен.
+    """
+    through, field = LIBRARY_RELATIONS[relation][content_type]
+    deleted, _ = through.objects.filter(userprofile_id=profile.pk, **{field: content_id}).delete()
+    if deleted:
+        bump_version(profile.user_id)
+        return False
+    add_to_library(profile, relation, content_type, [content_id])
+    return True
+
+
+def apply_library_batch(profile, operations):
+    """
+    Применяет пачку операций синхронизации от клиента.
+
+    operations — список словарей {'list', 'op', 'content_type', 'content_id'},
+    где list — favorites/watchlist, op — add/remove. Для одного элемента
+    побеждает последняя операция. Несуществующие id отбрасываются одним
+    запросом на тип контента. Возвращает (число применённых, отклонённые).
+    """
+    final = {}
+    rejected = []
+    for operation in operations:
+        relation = operation.get('list')
+        op = operation.get('op')
+        content_type = operation.get('content_type')
+        try:
+            content_id = int(operation.get('content_id'))
+        except (TypeError, ValueError):
+            rejected.append(operation)
+            continue
+        if relation not in LIBRARY_RELATIONS or op not in ('add', 'remove') or content_type not in CONTENT_TYPES:
+            rejected.append(operation)
+            continue
+        final[(relation, content_type, content_id)] = op
+
+    existing = {}
+    for content_type in CONTENT_TYPES:
+        ids = {key[2] for key, op in final.items() if key[1] == content_type and op == 'add'}
+        if ids:
+            existing[content_type] = set(
+                CONTENT_MODELS[content_type].objects.filter(pk__in=ids, is_published=True).values_list('pk', flat=True)
+            )
+
+    grouped = {}
+    for (relation, content_type, content_id), op in final.items():
+        if op == 'add' and content_id not in existing.get(content_type, ()):
+            rejected.append({'list': relation, 'op': op, 'content_type': content_type, 'content_id': content_id})
+            continue
+        grouped.setdefault((relation, content_type, op), []).append(content_id)
+
+    with transaction.atomic():
+        for (relation, content_type, op), ids in grouped.items():
+            through, field = LIBRARY_RELATIONS[relation][content_type]
+            if op == 'add':
+                through.objects.bulk_create(
+                    [through(**{'userprofile_id': profile.pk, field: content_id}) for content_id in ids],
+                    ignore_conflicts=True
+                )
+            else:
+                through.objects.filter(userprofile_id=profile.pk, **{f'{field}__in': ids}).delete()
+
+    if grouped:
+        bump_version(profile.user_id)
+    return sum(len(ids) for ids in grouped.values()), rejected
@@ -1,10 +1,13 @@
 """
 Signals for automatic profile creation.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.contrib.auth.models import User
 from django.dispatch import receiver
+from movies.models import Movie, Series, Rating
 from .models import UserProfile
+from . import timeline_service
+from . import library_service
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -21,3 +24,58 @@ def save_user_profile(sender, instance, **kwargs):
     """
     instance.profile.save()
 
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def invalidate_movie_timeline(sender, instance, **kwargs):
+    """
+    Drop the cached slug/title/poster of a movie used by activity timelines.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not set(update_fields) & timeline_service.CONTENT_FIELDS:
+        return
+    timeline_service.invalidate_content('movie', instance.pk)
+
+@receiver(post_save, sender=Series)
+@receiver(post_delete, sender=Series)
+def invalidate_series_timeline(sender, instance, **kwargs):
+    """
+    Drop the cached slug/title/poster of a series used by activity timelines.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not set(update_fields) & timeline_service.CONTENT_FIELDS:
+        return
+    timeline_service.invalidate_content('series', instance.pk)
+
+@receiver(m2m_changed, sender=UserProfile.favorite_movies.through)
+@receiver(m2m_changed, sender=UserProfile.favorite_series.through)
+@receiver(m2m_changed, sender=UserProfile.watchlist_movies.through)
+@receiver(m2m_changed, sender=UserProfile.watchlist_series.through)
+def invalidate_library_on_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Bump the library version of every profile touched by a favorites/watchlist change.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        library_service.bump_version(instance.user_id)
+        return
+    # Изменение со стороны фильма/сериала: затронутые профили в pk_set,
+    # а при clear их нужно найти до удаления связей.
+    if action == 'pre_clear':
+        field_name = next(
+            field.name for field in UserProfile._meta.many_to_many
+            if field.remote_field.through is sender
+        )
+        profiles = UserProfile.objects.filter(**{field_name: instance})
+    else:
+        profiles = UserProfile.objects.filter(pk__in=pk_set or ())
+    for user_id in profiles.values_list('user_id', flat=True):
+        library_service.bump_version(user_id)
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def invalidate_library_on_rating(sender, instance, **kwargs):
+    """
+    Bump the library version when a user rates or un-rates a title.
+    """
+    library_service.bump_version(instance.user_id)
@@ -0,0 +1,91 @@
+"""
+Сервис ленты активности пользователя (история, профиль, API).
+"""
+from collections import defaultdict
+from django.core.cache import cache
+from movies.models import Movie, Series
+
+CONTENT_MODELS = {
+    'movie': Movie,
+    'series': Series,
+}
+
+# Поля, изменение которых сбрасывает кэш карточки
+CONTENT_FIELDS = {'slug', 'title_az', 'title_uz', 'poster'}
+
+CONTENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def content_cache_key(content_type, content_id):
+    """Ключ кэша для краткой карточки контента."""
+    return f'timeline:content:{content_type}:{content_id}'
+
+
+def invalidate_content(content_type, content_id):
+    """Сбрасывает закэшированную карточку (при переименовании, смене постера, удалении)."""
+    cache.delete(content_cache_key(content_type, content_id))
+
+
+def _load_content(content_type, ids):
+    """Загружает slug, название и постер одним in_bulk на тип контента."""
+    model = CONTENT_MODELS[content_type]
+    objects = model.objects.only('id', 'slug', 'title_az', 'title_uz', 'poster').in_bulk(ids)
+    return {
+        obj_id: {
+            'slug': obj.slug,
+            'title': obj.title_az or obj.title_uz,
+            'poster': obj.poster.url if obj.poster else None,
+        }
+        for obj_id, obj in objects.items()
+    }
+
+
+def get_content_map(content_type, ids):
+    """
+    Возвращает {id: {'slug', 'title', 'poster'}} для указанных id.
+    Сначала читает кэш, недостающие карточки догружает одним запросом.
+    """
+    if content_type not in CONTENT_MODELS or not ids:
+        return {}
+
+    keys = {content_cache_key(content_type, content_id): content_id for content_id in ids}
+    cached = cache.get_many(keys.keys())
+    result = {keys[key]: value for key, value in cached.items()}
+
+    missing = [content_id for content_id in ids if content_id not in result]
+    if missing:
+        loaded = _load_content(content_type, missing)
+        cache.set_many(
+            {content_cache_key(content_type, content_id): data for content_id, data in loaded.items()},
+            CONTENT_CACHE_TIMEOUT
+        )
+        result.update(loaded)
+
+    return result
+
+
+def resolve_activities(activities):
+    """
+    Проставляет активностям content_slug, content_poster и актуальное название.
+    Количество запросов не зависит от длины списка: максимум один на тип контента.
+    """
+    activities = list(activities)
+
+    ids_by_type = defaultdict(set)
+    for activity in activities:
+        if activity.content_type in CONTENT_MODELS:
+            ids_by_type[activity.content_type].add(activity.content_id)
+
+    maps = {
+        content_type: get_content_map(content_type, ids)
+        for content_type, ids in ids_by_type.items()
+    }
+
+    for activity in activities:
+        data = maps.get(activity.content_type, {}).get(activity.content_id)
+        activity.content_slug = data['slug'] if data else None
+        activity.content_poster = data['poster'] if data else None
+        if data and data['title']:
+            activity.content_title = data['title']
+
+    return activities
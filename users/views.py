@@ -4,16 +4,19 @@ Views for users app.
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.paginator import Paginator
 from .models import UserProfile, UserActivity
-from movies.models import Movie, Series
 from .forms import UserProfileForm
+from .timeline_service import resolve_activities
 
 
 @login_required
 def profile(request):
     """Страница профиля пользователя."""
     profile = request.user.profile
-    activities = UserActivity.objects.filter(user=request.user).order_by('-created_at')[:20]
+    activities = resolve_activities(
+        UserActivity.objects.filter(user=request.user).order_by('-created_at')[:20]
+    )
     
     context = {
         'profile': profile,
@@ -54,23 +57,15 @@ def watchlist(request):
 def history(request):
     """История активности."""
     activities = UserActivity.objects.filter(user=request.user).order_by('-created_at')
-    
-    for activity in activities:
-        if activity.content_type == 'movie':
-            try:
-                movie = Movie.objects.get(id=activity.content_id)
-                activity.content_slug = movie.slug
-            except Movie.DoesNotExist:
-                activity.content_slug = None
-        elif activity.content_type == 'series':
-            try:
-                series = Series.objects.get(id=activity.content_id)
-                activity.content_slug = series.slug
-            except Series.DoesNotExist:
-                activity.content_slug = None
+    paginator = Paginator(activities, 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    # Slug'и подтягиваются одним запросом на тип контента, а не по одному на запись
+    page_activities = resolve_activities(page_obj.object_list)
 
     context = {
-        'activities': activities,
+        'activities': page_activities,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages(),
     }
     return render(request, 'users/history.html', context)
-